@@ -9,7 +9,7 @@ from typing import List
 import numpy as np
 import torch
 
-from hama import ASRDecodeConfig, ASRModel
+from hama import ASRDecodeConfig, ASRModel, ASRStream
 
 try:
     import sounddevice as sd
@@ -37,21 +37,18 @@ class LiveConfig:
     vad_speech_pad_ms: int = 30
 
 
-def _transcribe_and_print(
-    asr: ASRModel,
-    waveform: np.ndarray,
-    sample_rate: int,
-    *,
-    show_unk: bool,
-) -> None:
-    if waveform.size == 0:
-        return
-    result = asr.transcribe_waveform(waveform=waveform, sample_rate=sample_rate)
-    tokens = result.phonemes if show_unk else [t for t in result.phonemes if t != "<unk>"]
+def _print_phonemes(label: str, phonemes: List[str], *, show_unk: bool) -> None:
+    tokens = phonemes if show_unk else [t for t in phonemes if t != "<unk>"]
     text = " ".join(tokens).strip()
     if not text:
         return
-    print(f"[phonemes] {text}")
+    print(f"[{label}] {text}")
+
+
+def _finish_and_print(stream: ASRStream, utterance_samples: int, min_samples: int, *, show_unk: bool) -> None:
+    result = stream.finish()
+    if utterance_samples >= min_samples:
+        _print_phonemes("phonemes", result.phonemes, show_unk=show_unk)
 
 
 def _silero_frame_size(sample_rate: int) -> int:
@@ -150,6 +147,10 @@ def main() -> None:
     )
 
     queue: Queue[np.ndarray] = Queue()
+    show_unk = bool(args.show_unk)
+    # Speech is fed to the stream as it arrives, so stable phonemes print while
+    # the speaker is still talking; the full utterance prints once VAD closes it.
+    stream: ASRStream | None = None
     speech_segments: List[np.ndarray] = []
     pending_silence_segments: List[np.ndarray] = []
     preroll_chunks: List[np.ndarray] = []
@@ -201,23 +202,19 @@ def main() -> None:
                                 pending_silence_samples = 0
                             speech_segments.append(frame)
                             speech_samples += frame.size
+                            _print_phonemes("partial", stream.push(frame), show_unk=show_unk)
                             continue
 
                         pending_silence_segments.append(frame)
                         pending_silence_samples += frame.size
+                        _print_phonemes("partial", stream.push(frame), show_unk=show_unk)
                         required_silence_ms = _required_silence_ms((speech_samples * 1000.0) / cfg.sample_rate)
                         observed_silence_ms = (pending_silence_samples * 1000.0) / cfg.sample_rate
                         if observed_silence_ms >= required_silence_ms:
-                            utterance = np.concatenate(speech_segments, axis=0) if speech_segments else np.zeros(0, dtype=np.float32)
                             speech_end_sample = processed_samples - pending_silence_samples
-                            print(f"[vad] speech {speech_start_sample} -> {speech_end_sample}, len={utterance.size}")
-                            if utterance.size >= min_utterance_samples:
-                                _transcribe_and_print(
-                                    asr,
-                                    utterance,
-                                    cfg.sample_rate,
-                                    show_unk=bool(args.show_unk),
-                                )
+                            print(f"[vad] speech {speech_start_sample} -> {speech_end_sample}, len={speech_samples}")
+                            _finish_and_print(stream, speech_samples, min_utterance_samples, show_unk=show_unk)
+                            stream = None
                             speech_segments = []
                             speech_samples = 0
                             preroll_chunks = [seg.copy() for seg in pending_silence_segments[-preroll_limit:]]
@@ -235,6 +232,8 @@ def main() -> None:
                         pending_silence_segments = []
                         pending_silence_samples = 0
                         print(f"[vad] speech start @ sample={speech_start_sample}")
+                        stream = asr.stream(cfg.sample_rate)
+                        _print_phonemes("partial", stream.push(np.concatenate(speech_segments)), show_unk=show_unk)
                         continue
 
                     preroll_chunks.append(frame)
@@ -249,15 +248,8 @@ def main() -> None:
     except KeyboardInterrupt:
         print("\n[live] stopping...")
 
-    if speech_segments:
-        utterance = np.concatenate(speech_segments, axis=0)
-        if utterance.size >= min_utterance_samples:
-            _transcribe_and_print(
-                asr,
-                utterance,
-                cfg.sample_rate,
-                show_unk=bool(args.show_unk),
-            )
+    if stream is not None:
+        _finish_and_print(stream, speech_samples, min_utterance_samples, show_unk=show_unk)
 
 
 if __name__ == "__main__":
@@ -5,43 +5,101 @@ The package exposes:
 - `split_text_to_jamo` / `join_jamo_tokens` for Hangul decomposition.
 - `G2PModel` for ONNXRuntime-backed IPA + alignment inference.
 - `ASRModel` for waveform-input phoneme ASR ONNX inference.
+- `models.get` / `models.release` for process-wide shared model instances.
+- `set_num_threads` / `get_num_threads` to size the native engine's worker pool.
+
+Public names are resolved lazily (PEP 562): `import hama` loads no submodule,
+numpy or native library; each name's module is imported on first access.
 """
 
-from .jamo import join_jamo_tokens, split_text_to_jamo
-from .asr import (
-    ASRDecodeConfig,
-    ASRModel,
-    ASRResult,
-    PhonemeSpan,
-    ctc_phoneme_spans,
-    decode_ctc_tokens,
-    read_wav_mono,
-)
-from .inference import G2PAlignment, G2PModel, G2PResult
-from .p2g import P2GAlignment, P2GModel, P2GResult
-from .pronunciation import (
-    PronunciationMatch,
-    PronunciationPatch,
-    PronunciationReplaceOptions,
-    PronunciationReplaceResult,
-    PronunciationScanOptions,
-    PronunciationScanResult,
-    PronunciationTerm,
-    pronunciation_replace,
-    pronunciation_scan,
-)
-from .tokenizer import TextTokenizer
-from .vocab import Vocabulary
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import models
+    from ._engine import get_num_threads, set_num_threads
+    from .jamo import join_jamo_tokens, split_text_to_jamo
+    from .asr import (
+        ASRDecodeConfig,
+        ASRModel,
+        ASRResult,
+        ASRStream,
+        PhonemeSpan,
+        ctc_phoneme_spans,
+        decode_ctc_tokens,
+        read_wav_blocks,
+        read_wav_mono,
+    )
+    from .cache import G2PCache, G2PCacheStats, G2PDiskCache
+    from .inference import G2PAlignment, G2PModel, G2PResult
+    from .p2g import P2GAlignment, P2GModel, P2GResult, P2GStream
+    from .pronunciation import (
+        PronunciationMatch,
+        PronunciationPatch,
+        PronunciationReplaceOptions,
+        PronunciationReplaceResult,
+        PronunciationScanOptions,
+        PronunciationScanResult,
+        PronunciationTerm,
+        pronunciation_replace,
+        pronunciation_scan,
+    )
+    from .tokenizer import TextTokenizer
+    from .vocab import Vocabulary
+
+_EXPORTS = {
+    "get_num_threads": "._engine",
+    "set_num_threads": "._engine",
+    "join_jamo_tokens": ".jamo",
+    "split_text_to_jamo": ".jamo",
+    "ASRDecodeConfig": ".asr",
+    "ASRModel": ".asr",
+    "ASRResult": ".asr",
+    "ASRStream": ".asr",
+    "PhonemeSpan": ".asr",
+    "ctc_phoneme_spans": ".asr",
+    "decode_ctc_tokens": ".asr",
+    "read_wav_blocks": ".asr",
+    "read_wav_mono": ".asr",
+    "G2PCache": ".cache",
+    "G2PCacheStats": ".cache",
+    "G2PDiskCache": ".cache",
+    "G2PAlignment": ".inference",
+    "G2PModel": ".inference",
+    "G2PResult": ".inference",
+    "P2GAlignment": ".p2g",
+    "P2GModel": ".p2g",
+    "P2GResult": ".p2g",
+    "P2GStream": ".p2g",
+    "PronunciationMatch": ".pronunciation",
+    "PronunciationPatch": ".pronunciation",
+    "PronunciationReplaceOptions": ".pronunciation",
+    "PronunciationReplaceResult": ".pronunciation",
+    "PronunciationScanOptions": ".pronunciation",
+    "PronunciationScanResult": ".pronunciation",
+    "PronunciationTerm": ".pronunciation",
+    "pronunciation_replace": ".pronunciation",
+    "pronunciation_scan": ".pronunciation",
+    "TextTokenizer": ".tokenizer",
+    "Vocabulary": ".vocab",
+}
 
 __all__ = [
+    "models",
     "join_jamo_tokens",
     "split_text_to_jamo",
     "G2PAlignment",
+    "G2PCache",
+    "G2PCacheStats",
+    "G2PDiskCache",
     "G2PModel",
     "G2PResult",
     "P2GModel",
     "P2GResult",
     "P2GAlignment",
+    "P2GStream",
     "PronunciationTerm",
     "PronunciationMatch",
     "PronunciationPatch",
@@ -54,10 +112,29 @@ __all__ = [
     "ASRDecodeConfig",
     "ASRModel",
     "ASRResult",
+    "ASRStream",
     "PhonemeSpan",
     "ctc_phoneme_spans",
     "decode_ctc_tokens",
+    "read_wav_blocks",
     "read_wav_mono",
     "TextTokenizer",
     "Vocabulary",
+    "get_num_threads",
+    "set_num_threads",
 ]
+
+
+def __getattr__(name: str):
+    if name == "models":
+        return import_module(".models", __name__)
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
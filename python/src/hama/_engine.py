@@ -3,12 +3,33 @@
 Exposes session shims (`EncoderSession`, `DecoderSession`, `AsrSession`) that
 mimic the small slice of the onnxruntime `InferenceSession` interface the
 runtime uses (`.run(output_names, feeds)`, `.get_inputs()`, `.get_outputs()`),
-so `inference.py` / `asr.py` switch backends with minimal change.
+so `inference.py` / `asr.py` switch backends with minimal change. `G2pSession`
+pairs an encoder and decoder session and runs the whole greedy G2P decode in
+one native call.
+
+Entry points added after the first release are bound only when the loaded
+library exports them (`has(name)`), so an older prebuilt library keeps working
+through the host-side fallbacks.
+
+Sessions take their `.hama` weights either as bytes or as a file path. A path
+is memory-mapped by the engine (`hama_*_load_path`), so no host-side copy is
+made and processes loading the same file share its pages.
+
+Sessions are safe to share between threads: a native handle is read-only
+once loaded and each call borrows its own scratch arena, and ctypes releases the
+GIL for the duration of the call, so concurrent calls on one session run in
+parallel. A session's handle is freed when the session is garbage-collected.
+
+Within a call, the engine splits large kernels across a process-wide worker
+pool, one thread per CPU by default. Size it with the HAMA_NUM_THREADS env var
+(read when the library is loaded) or `set_num_threads(n)`; outputs are
+bit-identical for every pool size.
 
 The native library is located via (in order): the HAMA_LIB env var, the
 packaged `hama/_libs/<plat>/` directory, or the local `zig/zig-out/lib` dev
-build. If none is found, `available()` returns False and constructing a model
-raises a clear error.
+build, the first time a session is created (or `available()`/`has()` is asked).
+If none is found, `available()` returns False and constructing a session raises
+a clear error.
 """
 
 from __future__ import annotations
@@ -16,6 +37,7 @@ from __future__ import annotations
 import ctypes
 import os
 import platform
+import threading
 from importlib import resources
 from pathlib import Path
 from types import SimpleNamespace
@@ -27,10 +49,12 @@ _ENC_FEAT = 192
 _ENC_HID = 96
 _DEC_CTX = 192
 _DEC_HID = 96
+_P2G_CACHE_SHAPE = (4, 416, 224)  # layers, positions, model dim
 
 c_f32 = ctypes.POINTER(ctypes.c_float)
 c_i64 = ctypes.POINTER(ctypes.c_int64)
 c_u8 = ctypes.POINTER(ctypes.c_uint8)
+c_i16 = ctypes.POINTER(ctypes.c_int16)
 
 
 def _lib_filename() -> str:
@@ -70,13 +94,34 @@ def _load_lib():
     return None
 
 
-_LIB = _load_lib()
+# Loaded on first use (`_lib()`), not at import, so importing the package stays
+# cheap for callers that never construct a model.
+_LIB = None
+_LIB_LOADED = False
+_LIB_LOCK = threading.Lock()
 
 
-def _bind() -> None:
-    if _LIB is None:
-        return
-    L = _LIB
+def _lib():
+    global _LIB, _LIB_LOADED
+    if not _LIB_LOADED:
+        with _LIB_LOCK:
+            if not _LIB_LOADED:
+                lib = _load_lib()
+                if lib is not None:
+                    _bind(lib)
+                    _apply_num_threads_env(lib)
+                _LIB = lib
+                _LIB_LOADED = True
+    return _LIB
+
+
+def has(name: str) -> bool:
+    """True when the native library exports the entry point `name`."""
+    lib = _lib()
+    return lib is not None and hasattr(lib, name)
+
+
+def _bind(L) -> None:
     L.hama_encoder_load.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
     L.hama_encoder_load.restype = ctypes.c_void_p
     L.hama_encoder_free.argtypes = [ctypes.c_void_p]
@@ -92,6 +137,30 @@ def _bind() -> None:
     ]
     L.hama_decoder_step.restype = ctypes.c_int
 
+    for kind in ("encoder", "decoder", "asr", "p2g"):
+        if hasattr(L, f"hama_{kind}_load_path"):
+            load_path = getattr(L, f"hama_{kind}_load_path")
+            load_path.argtypes = [ctypes.c_char_p]
+            load_path.restype = ctypes.c_void_p
+        if hasattr(L, f"hama_{kind}_scratch_peak"):
+            peak = getattr(L, f"hama_{kind}_scratch_peak")
+            peak.argtypes = [ctypes.c_void_p]
+            peak.restype = ctypes.c_uint64
+            getattr(L, f"hama_{kind}_scratch_trim").argtypes = [ctypes.c_void_p]
+
+    if hasattr(L, "hama_g2p_greedy"):
+        L.hama_g2p_greedy.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, c_i64, ctypes.c_int64, ctypes.c_int64,
+            ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, c_i64, c_i64,
+        ]
+        L.hama_g2p_greedy.restype = ctypes.c_int64
+    if hasattr(L, "hama_g2p_greedy_batch"):
+        L.hama_g2p_greedy_batch.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, c_i64, ctypes.c_int64, ctypes.c_int64, c_i64,
+            ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, c_i64, c_i64, c_i64,
+        ]
+        L.hama_g2p_greedy_batch.restype = ctypes.c_int
+
     L.hama_asr_load.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
     L.hama_asr_load.restype = ctypes.c_void_p
     L.hama_asr_free.argtypes = [ctypes.c_void_p]
@@ -99,6 +168,27 @@ def _bind() -> None:
     L.hama_asr_num_frames.restype = ctypes.c_int64
     L.hama_asr_run.argtypes = [ctypes.c_void_p, c_f32, ctypes.c_int64, c_f32, c_i64]
     L.hama_asr_run.restype = ctypes.c_int64
+    if hasattr(L, "hama_asr_greedy"):
+        L.hama_asr_greedy.argtypes = [
+            ctypes.c_void_p, c_f32, ctypes.c_int64, ctypes.c_float, ctypes.c_int64, ctypes.c_float,
+            ctypes.c_int64, ctypes.c_float, ctypes.c_int32, c_i64, c_i64, c_i64, c_i64, c_f32,
+        ]
+        L.hama_asr_greedy.restype = ctypes.c_int64
+    if hasattr(L, "hama_asr_greedy_pcm16"):
+        L.hama_asr_greedy_pcm16.argtypes = [
+            ctypes.c_void_p, c_i16, ctypes.c_int64, ctypes.c_int64, ctypes.c_float, ctypes.c_int64, ctypes.c_float,
+            ctypes.c_int64, ctypes.c_float, ctypes.c_int32, c_i64, c_i64, c_i64, c_i64, c_f32,
+        ]
+        L.hama_asr_greedy_pcm16.restype = ctypes.c_int64
+    if hasattr(L, "hama_asr_run_batch"):
+        L.hama_asr_run_batch.argtypes = [ctypes.c_void_p, c_f32, c_i64, ctypes.c_int64, c_f32, c_i64]
+        L.hama_asr_run_batch.restype = ctypes.c_int64
+    if hasattr(L, "hama_asr_greedy_batch"):
+        L.hama_asr_greedy_batch.argtypes = [
+            ctypes.c_void_p, c_f32, c_i64, ctypes.c_int64, ctypes.c_float, ctypes.c_int64, ctypes.c_float,
+            ctypes.c_int64, ctypes.c_float, ctypes.c_int32, c_i64, c_i64, c_i64, c_i64, c_i64,
+        ]
+        L.hama_asr_greedy_batch.restype = ctypes.c_int64
 
     L.hama_p2g_load.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
     L.hama_p2g_load.restype = ctypes.c_void_p
@@ -107,13 +197,75 @@ def _bind() -> None:
     L.hama_p2g_greedy.restype = ctypes.c_int64
     L.hama_p2g_greedy_align.argtypes = [ctypes.c_void_p, c_i64, ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, c_i64, c_i64]
     L.hama_p2g_greedy_align.restype = ctypes.c_int64
-
-
-_bind()
+    if hasattr(L, "hama_p2g_greedy_batch"):
+        L.hama_p2g_greedy_batch.argtypes = [
+            ctypes.c_void_p, c_i64, c_i64, c_i64, ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, ctypes.c_int64,
+            c_i64, ctypes.c_int64, c_i64, c_i64, c_i64,
+        ]
+        L.hama_p2g_greedy_batch.restype = ctypes.c_int32
+    if hasattr(L, "hama_p2g_extend"):
+        L.hama_p2g_extend.argtypes = [ctypes.c_void_p, c_f32, c_f32, ctypes.c_int64, c_i64, ctypes.c_int64]
+        L.hama_p2g_extend.restype = ctypes.c_int64
+        L.hama_p2g_greedy_from.argtypes = [
+            ctypes.c_void_p, c_f32, c_f32, ctypes.c_int64, c_i64, ctypes.c_int64, c_i64, ctypes.c_int64,
+            ctypes.c_int64, ctypes.c_int64, ctypes.c_int64, c_i64, ctypes.c_int64, c_i64, c_i64,
+        ]
+        L.hama_p2g_greedy_from.restype = ctypes.c_int64
+
+    if hasattr(L, "hama_set_num_threads"):
+        L.hama_set_num_threads.argtypes = [ctypes.c_int64]
+        L.hama_get_num_threads.restype = ctypes.c_int64
+
+
+def _apply_num_threads_env(L) -> None:
+    env = os.environ.get("HAMA_NUM_THREADS")
+    if not env or not hasattr(L, "hama_set_num_threads"):
+        return
+    try:
+        n = int(env)
+    except ValueError:
+        raise ValueError(f"HAMA_NUM_THREADS must be a non-negative integer, got {env!r}") from None
+    if n < 0:
+        raise ValueError(f"HAMA_NUM_THREADS must be a non-negative integer, got {env!r}")
+    L.hama_set_num_threads(n)
 
 
 def available() -> bool:
-    return _LIB is not None
+    return _lib() is not None
+
+
+def set_num_threads(n: int) -> None:
+    """Size the engine's intra-op worker pool: threads per native call,
+    including the caller. 0 restores the default of one per CPU and 1 runs
+    every kernel on the calling thread. A no-op on an older library."""
+    if n < 0:
+        raise ValueError(f"num_threads must be >= 0, got {n}")
+    if _lib() is None:
+        raise RuntimeError("libhama not available")
+    if has("hama_set_num_threads"):
+        _LIB.hama_set_num_threads(n)
+
+
+def get_num_threads() -> int:
+    """Threads the engine splits each large kernel across (1 on an older
+    library, which runs single-threaded)."""
+    if _lib() is None:
+        raise RuntimeError("libhama not available")
+    if not has("hama_get_num_threads"):
+        return 1
+    return int(_LIB.hama_get_num_threads())
+
+
+def _load(kind: str, source: bytes | str | os.PathLike) -> int | None:
+    """Create a native handle from `.hama` bytes or a file path (mapped by the
+    engine when the library supports it)."""
+    if _lib() is None:
+        raise RuntimeError("libhama not available")
+    if isinstance(source, (str, os.PathLike)):
+        if has(f"hama_{kind}_load_path"):
+            return getattr(_LIB, f"hama_{kind}_load_path")(os.fsencode(source))
+        source = Path(source).read_bytes()
+    return getattr(_LIB, f"hama_{kind}_load")(source, len(source))
 
 
 def _ptr_f32(a: np.ndarray):
@@ -124,11 +276,34 @@ def _names(*names: str) -> list[SimpleNamespace]:
     return [SimpleNamespace(name=n) for n in names]
 
 
-class EncoderSession:
-    def __init__(self, data: bytes):
-        if _LIB is None:
-            raise RuntimeError("libhama not available")
-        self._h = _LIB.hama_encoder_load(data, len(data))
+class _ScratchStats:
+    """Scratch-arena monitoring shared by the single-handle sessions.
+
+    The engine keeps each handle's scratch arenas between calls; these report
+    and release that memory. Both are no-ops (0 / nothing) on an older
+    library without the entry points.
+    """
+
+    _kind: str
+
+    @property
+    def scratch_peak_bytes(self) -> int:
+        """Largest scratch arena a single call on this session has needed."""
+        if not has(f"hama_{self._kind}_scratch_peak"):
+            return 0
+        return int(getattr(_LIB, f"hama_{self._kind}_scratch_peak")(self._h))
+
+    def trim_scratch(self) -> None:
+        """Free the session's idle scratch arenas (they regrow on demand)."""
+        if has(f"hama_{self._kind}_scratch_trim"):
+            getattr(_LIB, f"hama_{self._kind}_scratch_trim")(self._h)
+
+
+class EncoderSession(_ScratchStats):
+    _kind = "encoder"
+
+    def __init__(self, source: bytes | str | os.PathLike):
+        self._h = _load("encoder", source)
         if not self._h:
             raise RuntimeError("hama_encoder_load failed")
 
@@ -169,11 +344,11 @@ class EncoderSession:
             self._h = None
 
 
-class DecoderSession:
-    def __init__(self, data: bytes):
-        if _LIB is None:
-            raise RuntimeError("libhama not available")
-        self._h = _LIB.hama_decoder_load(data, len(data))
+class DecoderSession(_ScratchStats):
+    _kind = "decoder"
+
+    def __init__(self, source: bytes | str | os.PathLike):
+        self._h = _load("decoder", source)
         if not self._h:
             raise RuntimeError("hama_decoder_load failed")
 
@@ -219,11 +394,71 @@ class DecoderSession:
             self._h = None
 
 
-class AsrSession:
-    def __init__(self, data: bytes):
-        if _LIB is None:
-            raise RuntimeError("libhama not available")
-        self._h = _LIB.hama_asr_load(data, len(data))
+class G2pSession:
+    """Fused G2P greedy decode over a loaded encoder + decoder-step pair.
+
+    The encoder forward and the whole autoregressive decoder loop (with EOS
+    handling) run inside `hama_g2p_greedy`, so a segment costs one FFI call
+    instead of one per output token. Its scratch is drawn from the decoder
+    session's arenas (see `DecoderSession.scratch_peak_bytes`).
+    """
+
+    def __init__(self, encoder: EncoderSession, decoder: DecoderSession):
+        if not has("hama_g2p_greedy"):
+            raise RuntimeError("libhama does not export hama_g2p_greedy")
+        # Keep the sessions alive: the native call borrows their handles.
+        self._encoder = encoder
+        self._decoder = decoder
+
+    def greedy(
+        self, input_ids: np.ndarray, length: int, sos_id: int, eos_id: int, max_steps: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Decode one encoded segment; returns (token ids, attention argmaxes).
+
+        One entry per decoder step; the EOS token, when reached, is the last.
+        """
+        ids = np.ascontiguousarray(input_ids, dtype=np.int64).reshape(-1)
+        tokens = np.empty(max_steps, dtype=np.int64)
+        attns = np.empty(max_steps, dtype=np.int64)
+        n = _LIB.hama_g2p_greedy(
+            self._encoder._h, self._decoder._h, ids.ctypes.data_as(c_i64), ids.shape[0], length,
+            sos_id, eos_id, max_steps, tokens.ctypes.data_as(c_i64), attns.ctypes.data_as(c_i64),
+        )
+        if n < 0:
+            raise RuntimeError("hama_g2p_greedy failed")
+        return tokens[:n], attns[:n]
+
+    def greedy_batch(
+        self, input_ids: np.ndarray, lengths, sos_id: int, eos_id: int, max_steps: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Decode a padded [B, T] batch in one native call (`hama_g2p_greedy_batch`).
+
+        Returns one (token ids, attention argmaxes) pair per row, identical to
+        calling `greedy` on each row.
+        """
+        if not has("hama_g2p_greedy_batch"):
+            raise RuntimeError("libhama does not export hama_g2p_greedy_batch")
+        ids = np.ascontiguousarray(input_ids, dtype=np.int64)
+        B, T = ids.shape
+        lens = np.ascontiguousarray(lengths, dtype=np.int64).reshape(B)
+        tokens = np.empty((B, max_steps), dtype=np.int64)
+        attns = np.empty((B, max_steps), dtype=np.int64)
+        counts = np.empty(B, dtype=np.int64)
+        rc = _LIB.hama_g2p_greedy_batch(
+            self._encoder._h, self._decoder._h, ids.ctypes.data_as(c_i64), B, T,
+            lens.ctypes.data_as(c_i64), sos_id, eos_id, max_steps,
+            tokens.ctypes.data_as(c_i64), attns.ctypes.data_as(c_i64), counts.ctypes.data_as(c_i64),
+        )
+        if rc != 0:
+            raise RuntimeError("hama_g2p_greedy_batch failed")
+        return [(tokens[b, : counts[b]], attns[b, : counts[b]]) for b in range(B)]
+
+
+class AsrSession(_ScratchStats):
+    _kind = "asr"
+
+    def __init__(self, source: bytes | str | os.PathLike):
+        self._h = _load("asr", source)
         if not self._h:
             raise RuntimeError("hama_asr_load failed")
 
@@ -248,17 +483,134 @@ class AsrSession:
         }
         return [out[n] for n in output_names]
 
+    def greedy(
+        self,
+        waveform: np.ndarray,
+        *,
+        temperature: float,
+        blank_id: int,
+        blank_bias: float,
+        unk_id: int,
+        unk_bias: float,
+        collapse_repeats: bool,
+        return_log_probs: bool = False,
+    ):
+        """Forward pass and greedy CTC decode in one native call (`hama_asr_greedy`).
+
+        Returns (frame argmax ids [T], collapsed token ids, the frame each token
+        is emitted at), plus log_probs [T, vocab] when `return_log_probs`.
+        Frame scores are log_probs / temperature with the biases added to the
+        blank and (if unk_id >= 0) unk columns, as in `ASRModel`'s decoding.
+
+        An int16 waveform ([N] or [N, channels] PCM) goes to
+        `hama_asr_greedy_pcm16`, which converts it to mono float in the engine.
+        """
+        pcm = np.asarray(waveform).dtype == np.int16
+        name = "hama_asr_greedy_pcm16" if pcm else "hama_asr_greedy"
+        if not has(name):
+            raise RuntimeError(f"libhama does not export {name}")
+        if pcm:
+            frames = np.ascontiguousarray(waveform)
+            frames = frames if frames.ndim == 2 else frames.reshape(-1, 1)
+            N, C = frames.shape
+        else:
+            wav = np.ascontiguousarray(waveform, dtype=np.float32).reshape(-1)
+            N = wav.shape[0]
+        T = int(_LIB.hama_asr_num_frames(N))
+        frame_ids = np.empty(T, dtype=np.int64)
+        tokens = np.empty(T, dtype=np.int64)
+        token_frames = np.empty(T, dtype=np.int64)
+        n_tokens = np.empty(1, dtype=np.int64)
+        log_probs = np.empty((T, _VOCAB_ASR), dtype=np.float32) if return_log_probs else None
+        decode_args = (
+            temperature, blank_id, blank_bias, unk_id, unk_bias, int(bool(collapse_repeats)),
+            frame_ids.ctypes.data_as(c_i64), tokens.ctypes.data_as(c_i64),
+            token_frames.ctypes.data_as(c_i64), n_tokens.ctypes.data_as(c_i64),
+            log_probs.ctypes.data_as(c_f32) if log_probs is not None else None,
+        )
+        if pcm:
+            rc = _LIB.hama_asr_greedy_pcm16(self._h, frames.ctypes.data_as(c_i16), N, C, *decode_args)
+        else:
+            rc = _LIB.hama_asr_greedy(self._h, wav.ctypes.data_as(c_f32), N, *decode_args)
+        if rc < 0:
+            raise RuntimeError(f"{name} failed")
+        n = int(n_tokens[0])
+        out = (frame_ids, tokens[:n], token_frames[:n])
+        return out + (log_probs,) if return_log_probs else out
+
+    def run_batch(self, waveforms) -> list[np.ndarray]:
+        """Log-probs [T_i, vocab] of each waveform from one batched native call
+        (`hama_asr_run_batch`); each equals `run` on that waveform alone."""
+        if not has("hama_asr_run_batch"):
+            raise RuntimeError("libhama does not export hama_asr_run_batch")
+        wavs = [np.asarray(w, dtype=np.float32).reshape(-1) for w in waveforms]
+        lengths = np.array([w.shape[0] for w in wavs], dtype=np.int64)
+        frames = [int(_LIB.hama_asr_num_frames(int(n))) for n in lengths]
+        wav = np.ascontiguousarray(np.concatenate(wavs) if wavs else np.zeros(0), dtype=np.float32)
+        log_probs = np.empty(sum(frames) * _VOCAB_ASR, dtype=np.float32)
+        out_lens = np.empty(len(wavs), dtype=np.int64)
+        rc = _LIB.hama_asr_run_batch(
+            self._h, wav.ctypes.data_as(c_f32), lengths.ctypes.data_as(c_i64), len(wavs),
+            log_probs.ctypes.data_as(c_f32), out_lens.ctypes.data_as(c_i64),
+        )
+        if rc < 0:
+            raise RuntimeError("hama_asr_run_batch failed")
+        rows = log_probs.reshape(-1, _VOCAB_ASR)
+        offsets = np.concatenate([[0], np.cumsum(out_lens)])
+        return [rows[offsets[i] : offsets[i + 1]] for i in range(len(wavs))]
+
+    def greedy_batch(
+        self,
+        waveforms,
+        *,
+        temperature: float,
+        blank_id: int,
+        blank_bias: float,
+        unk_id: int,
+        unk_bias: float,
+        collapse_repeats: bool,
+    ) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """`run_batch` and `greedy`'s decoding in one native call
+        (`hama_asr_greedy_batch`); returns `greedy`'s (frame ids, token ids,
+        token frames) for each waveform."""
+        if not has("hama_asr_greedy_batch"):
+            raise RuntimeError("libhama does not export hama_asr_greedy_batch")
+        wavs = [np.asarray(w, dtype=np.float32).reshape(-1) for w in waveforms]
+        lengths = np.array([w.shape[0] for w in wavs], dtype=np.int64)
+        frames = [int(_LIB.hama_asr_num_frames(int(n))) for n in lengths]
+        wav = np.ascontiguousarray(np.concatenate(wavs) if wavs else np.zeros(0), dtype=np.float32)
+        rows = sum(frames)
+        frame_ids = np.empty(rows, dtype=np.int64)
+        tokens = np.empty(rows, dtype=np.int64)
+        token_frames = np.empty(rows, dtype=np.int64)
+        frame_counts = np.empty(len(wavs), dtype=np.int64)
+        token_counts = np.empty(len(wavs), dtype=np.int64)
+        rc = _LIB.hama_asr_greedy_batch(
+            self._h, wav.ctypes.data_as(c_f32), lengths.ctypes.data_as(c_i64), len(wavs),
+            temperature, blank_id, blank_bias, unk_id, unk_bias, int(bool(collapse_repeats)),
+            frame_ids.ctypes.data_as(c_i64), tokens.ctypes.data_as(c_i64), token_frames.ctypes.data_as(c_i64),
+            frame_counts.ctypes.data_as(c_i64), token_counts.ctypes.data_as(c_i64),
+        )
+        if rc < 0:
+            raise RuntimeError("hama_asr_greedy_batch failed")
+        out = []
+        off = 0
+        for T, n_frames, n_tokens in zip(frames, frame_counts, token_counts):
+            out.append((frame_ids[off : off + n_frames], tokens[off : off + n_tokens], token_frames[off : off + n_tokens]))
+            off += T
+        return out
+
     def __del__(self):
         if getattr(self, "_h", None) and _LIB is not None:
             _LIB.hama_asr_free(self._h)
             self._h = None
 
 
-class P2gSession:
-    def __init__(self, data: bytes):
-        if _LIB is None:
-            raise RuntimeError("libhama not available")
-        self._h = _LIB.hama_p2g_load(data, len(data))
+class P2gSession(_ScratchStats):
+    _kind = "p2g"
+
+    def __init__(self, source: bytes | str | os.PathLike):
+        self._h = _load("p2g", source)
         if not self._h:
             raise RuntimeError("hama_p2g_load failed")
 
@@ -288,6 +640,96 @@ class P2gSession:
             raise RuntimeError("hama_p2g_greedy_align failed")
         return out[:n].tolist(), align[:n].tolist()
 
+    def greedy_batch(
+        self,
+        prefixes: list[list[int]],
+        max_new: list[int],
+        eos_id: int,
+        pad_id: int,
+        shortlist: np.ndarray | None = None,
+    ) -> list[tuple[list[int], list[int]]]:
+        """Decode many prefixes in one native call (`hama_p2g_greedy_batch`).
+
+        Returns one (generated ids, source-phoneme index per token) pair per
+        prefix, identical to calling `greedy_align` on each. `shortlist`, a
+        strictly ascending int64 array of token ids, restricts the tokens
+        decoding may emit.
+        """
+        if not has("hama_p2g_greedy_batch"):
+            raise RuntimeError("libhama does not export hama_p2g_greedy_batch")
+        if not prefixes:
+            return []
+        B = len(prefixes)
+        ids = np.ascontiguousarray(np.concatenate([np.asarray(p, dtype=np.int64) for p in prefixes]))
+        lengths = np.array([len(p) for p in prefixes], dtype=np.int64)
+        limits = np.ascontiguousarray(max_new, dtype=np.int64)
+        stride = int(limits.max(initial=0))
+        out = np.empty((B, stride), dtype=np.int64)
+        align = np.empty((B, stride), dtype=np.int64)
+        counts = np.empty(B, dtype=np.int64)
+        rc = _LIB.hama_p2g_greedy_batch(
+            self._h, ids.ctypes.data_as(c_i64), lengths.ctypes.data_as(c_i64), limits.ctypes.data_as(c_i64),
+            B, stride, eos_id, pad_id,
+            shortlist.ctypes.data_as(c_i64) if shortlist is not None else None,
+            0 if shortlist is None else shortlist.shape[0],
+            out.ctypes.data_as(c_i64), align.ctypes.data_as(c_i64), counts.ctypes.data_as(c_i64),
+        )
+        if rc != 0:
+            raise RuntimeError("hama_p2g_greedy_batch failed")
+        return [(out[b, : counts[b]].tolist(), align[b, : counts[b]].tolist()) for b in range(B)]
+
+    def new_cache(self) -> tuple[np.ndarray, np.ndarray]:
+        """An empty (keys, values) cache for `extend` / `greedy_from`."""
+        return np.empty(_P2G_CACHE_SHAPE, dtype=np.float32), np.empty(_P2G_CACHE_SHAPE, dtype=np.float32)
+
+    def extend(self, cache: tuple[np.ndarray, np.ndarray], cached: int, ids: list[int]) -> int:
+        """Append prefix `ids` after the first `cached` positions of `cache`
+        (`hama_p2g_extend`); returns the new cached length."""
+        if not has("hama_p2g_extend"):
+            raise RuntimeError("libhama does not export hama_p2g_extend")
+        kc, vc = cache
+        arr = np.ascontiguousarray(ids, dtype=np.int64)
+        n = _LIB.hama_p2g_extend(
+            self._h, kc.ctypes.data_as(c_f32), vc.ctypes.data_as(c_f32), cached, arr.ctypes.data_as(c_i64), arr.shape[0]
+        )
+        if n < 0:
+            raise RuntimeError("hama_p2g_extend failed")
+        return int(n)
+
+    def greedy_from(
+        self,
+        cache: tuple[np.ndarray, np.ndarray],
+        cached: int,
+        tail: list[int],
+        forced: list[int],
+        max_new: int,
+        eos_id: int,
+        pad_id: int,
+        shortlist: np.ndarray | None = None,
+    ) -> tuple[list[int], list[int]]:
+        """Greedy decode after `extend` (`hama_p2g_greedy_from`): `tail` ends
+        the prefix and `forced` starts the output; `shortlist` as for
+        `greedy_batch`. Returns (generated ids, source-phoneme index per
+        token), `forced` included."""
+        if not has("hama_p2g_greedy_from"):
+            raise RuntimeError("libhama does not export hama_p2g_greedy_from")
+        kc, vc = cache
+        tail_arr = np.ascontiguousarray(tail, dtype=np.int64)
+        forced_arr = np.ascontiguousarray(forced, dtype=np.int64)
+        out = np.empty(max_new, dtype=np.int64)
+        align = np.empty(max_new, dtype=np.int64)
+        n = _LIB.hama_p2g_greedy_from(
+            self._h, kc.ctypes.data_as(c_f32), vc.ctypes.data_as(c_f32), cached,
+            tail_arr.ctypes.data_as(c_i64), tail_arr.shape[0], forced_arr.ctypes.data_as(c_i64), forced_arr.shape[0],
+            max_new, eos_id, pad_id,
+            shortlist.ctypes.data_as(c_i64) if shortlist is not None else None,
+            0 if shortlist is None else shortlist.shape[0],
+            out.ctypes.data_as(c_i64), align.ctypes.data_as(c_i64),
+        )
+        if n < 0:
+            raise RuntimeError("hama_p2g_greedy_from failed")
+        return out[:n].tolist(), align[:n].tolist()
+
     def __del__(self):
         if getattr(self, "_h", None) and _LIB is not None:
             _LIB.hama_p2g_free(self._h)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from importlib import resources
+import os
 from pathlib import Path
-from typing import Iterable, List, Sequence
+import threading
+from typing import Iterable, Iterator, List, Sequence
 import wave
 
 import numpy as np
@@ -31,6 +35,8 @@ class ASRResult:
     token_ids: List[int]
     frame_token_ids: List[int]
     num_frames: int
+    # Frame at which each of `token_ids` is emitted (see `ASRModel.phoneme_spans`).
+    token_frames: List[int] = field(default_factory=list)
 
 
 def _resolve_name(available: Sequence[str], primary: str, *fallbacks: str) -> str:
@@ -50,22 +56,24 @@ def _resolve_name(available: Sequence[str], primary: str, *fallbacks: str) -> st
     raise KeyError(f"Could not resolve ONNX tensor name for '{primary}'. Available: {list(available)}")
 
 
-def _read_asr_hama_bytes(path_like) -> bytes:
-    """Resolve ASR `.hama` weight bytes from an explicit path (a `.hama`, or a
-    sibling of a `.onnx` path) or fall back to the packaged asset."""
+def _resolve_asr_hama(path_like) -> Path | bytes:
+    """Resolve ASR `.hama` weights from an explicit path (a `.hama`, or a
+    sibling of a `.onnx` path) or fall back to the packaged asset. A file path
+    is returned where one exists so the engine can memory-map it."""
     if path_like is not None:
         p = Path(str(path_like))
         if p.suffix != ".hama":
             p = p.with_suffix(".hama")
-        return p.read_bytes()
-    return resources.files("hama.assets").joinpath("asr_waveform.hama").read_bytes()
+        if not p.is_file():
+            raise FileNotFoundError(p)
+        return p
+    asset = resources.files("hama.assets").joinpath("asr_waveform.hama")
+    return asset if isinstance(asset, Path) and asset.is_file() else asset.read_bytes()
 
 
 def _to_float32_mono(waveform: np.ndarray) -> np.ndarray:
     arr = np.asarray(waveform)
-    if arr.ndim == 2:
-        arr = arr.mean(axis=1)
-    if arr.ndim != 1:
+    if arr.ndim not in (1, 2):
         raise ValueError("waveform must be rank-1 (mono) or rank-2 (time, channels)")
 
     if np.issubdtype(arr.dtype, np.integer):
@@ -74,17 +82,13 @@ def _to_float32_mono(waveform: np.ndarray) -> np.ndarray:
         arr = arr.astype(np.float32) / float(denom)
     else:
         arr = arr.astype(np.float32)
+    if arr.ndim == 2:
+        arr = arr.mean(axis=1, dtype=np.float32)
     return np.clip(arr, -1.0, 1.0)
 
 
-def read_wav_mono(path: str | Path) -> tuple[np.ndarray, int]:
-    with wave.open(str(path), "rb") as rf:
-        sample_rate = int(rf.getframerate())
-        n_channels = int(rf.getnchannels())
-        sample_width = int(rf.getsampwidth())
-        n_frames = int(rf.getnframes())
-        raw = rf.readframes(n_frames)
-
+def _pcm_to_float32_mono(raw: bytes, sample_width: int, n_channels: int) -> np.ndarray:
+    """Interleaved little-endian WAV frames to float32 mono in [-1, 1]."""
     if sample_width == 1:
         data = np.frombuffer(raw, dtype=np.uint8).astype(np.float32)
         data = (data - 128.0) / 128.0
@@ -107,7 +111,49 @@ def read_wav_mono(path: str | Path) -> tuple[np.ndarray, int]:
 
     if n_channels > 1:
         data = data.reshape(-1, n_channels).mean(axis=1)
-    return np.clip(data.astype(np.float32), -1.0, 1.0), sample_rate
+    return np.clip(data.astype(np.float32), -1.0, 1.0)
+
+
+def _read_wav_raw(path: str | Path) -> tuple[bytes, int, int, int]:
+    """(raw frames, sample rate, channels, sample width) of a WAV file."""
+    with wave.open(str(path), "rb") as rf:
+        sample_rate = int(rf.getframerate())
+        n_channels = int(rf.getnchannels())
+        sample_width = int(rf.getsampwidth())
+        raw = rf.readframes(int(rf.getnframes()))
+    return raw, sample_rate, n_channels, sample_width
+
+
+def read_wav_mono(path: str | Path) -> tuple[np.ndarray, int]:
+    raw, sample_rate, n_channels, sample_width = _read_wav_raw(path)
+    return _pcm_to_float32_mono(raw, sample_width, n_channels), sample_rate
+
+
+def read_wav_blocks(path: str | Path, block_frames: int = 1 << 16) -> tuple[Iterator[np.ndarray], int]:
+    """Read a WAV file as consecutive float32 mono blocks of `block_frames` samples.
+
+    Returns (blocks, sample_rate). The header is read (and validated) right
+    away; the blocks are read lazily, so only one block is in memory at a time
+    and their concatenation equals `read_wav_mono(path)[0]`. Feed them to
+    `ASRModel.transcribe_long(*read_wav_blocks(path))` to transcribe a long
+    recording in memory proportional to the block and window sizes.
+    """
+    if block_frames < 1:
+        raise ValueError("block_frames must be >= 1")
+    rf = wave.open(str(path), "rb")
+    sample_rate = int(rf.getframerate())
+    n_channels = int(rf.getnchannels())
+    sample_width = int(rf.getsampwidth())
+    if sample_width not in (1, 2, 3, 4):
+        rf.close()
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    def blocks() -> Iterator[np.ndarray]:
+        with rf:
+            while raw := rf.readframes(block_frames):
+                yield _pcm_to_float32_mono(raw, sample_width, n_channels)
+
+    return blocks(), sample_rate
 
 
 def _resample_linear(waveform: np.ndarray, src_sr: int, dst_sr: int) -> np.ndarray:
@@ -123,38 +169,73 @@ def _resample_linear(waveform: np.ndarray, src_sr: int, dst_sr: int) -> np.ndarr
     return np.interp(dst_t, src_t, src).astype(np.float32)
 
 
-def _ctc_collapse(
+class _LinearResampler:
+    """Linear-interpolation resampling of consecutive blocks of one signal.
+
+    Output sample m sits at input position m * src_sr / dst_sr, so a stream
+    resamples identically however it is split into blocks. (`_resample_linear`
+    instead stretches a whole clip so both endpoints line up.)
+    """
+
+    def __init__(self, src_sr: int, dst_sr: int):
+        self._step = float(src_sr) / float(dst_sr)
+        self._last: np.ndarray | None = None  # previous block's final sample
+        self._consumed = 0  # input samples pushed before the current block
+        self._emitted = 0  # output samples produced so far
+
+    def push(self, block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float32)
+        if block.size == 0:
+            return block
+        if self._last is None:
+            src, base = block, self._consumed
+        else:
+            src, base = np.concatenate([self._last, block]), self._consumed - 1
+        end = int(np.floor((self._consumed + block.size - 1) / self._step)) + 1
+        pos = np.arange(self._emitted, end, dtype=np.float64) * self._step - base
+        out = np.interp(pos, np.arange(src.size, dtype=np.float64), src).astype(np.float32)
+        self._emitted = max(self._emitted, end)
+        self._consumed += block.size
+        self._last = block[-1:]
+        return out
+
+
+def _ctc_emissions(
     frame_token_ids: Iterable[int],
     *,
     blank_id: int,
     collapse_repeats: bool,
-) -> List[int]:
-    out: List[int] = []
+) -> tuple[List[int], List[int]]:
+    """Collapsed token ids and the frame each is emitted at."""
+    ids: List[int] = []
+    frames: List[int] = []
     prev = -1
-    for token_id in frame_token_ids:
+    for frame, token_id in enumerate(frame_token_ids):
         tok = int(token_id)
         if collapse_repeats and tok == prev:
             continue
         prev = tok
         if tok == blank_id:
             continue
-        out.append(tok)
-    return out
+        ids.append(tok)
+        frames.append(frame)
+    return ids, frames
 
 
-def decode_ctc_tokens(
-    frame_token_ids: Sequence[int],
-    decoder_tokens: Sequence[str],
+def _ctc_collapse(
+    frame_token_ids: Iterable[int],
     *,
     blank_id: int,
+    collapse_repeats: bool,
+) -> List[int]:
+    return _ctc_emissions(frame_token_ids, blank_id=blank_id, collapse_repeats=collapse_repeats)[0]
+
+
+def _split_words(
+    collapsed_ids: Sequence[int],
+    decoder_tokens: Sequence[str],
     word_boundary_token: str,
-    collapse_repeats: bool = True,
-) -> tuple[List[int], List[str], List[List[str]]]:
-    collapsed_ids = _ctc_collapse(
-        frame_token_ids,
-        blank_id=blank_id,
-        collapse_repeats=collapse_repeats,
-    )
+) -> tuple[List[str], List[List[str]]]:
     tokens = [
         decoder_tokens[token_id] if 0 <= token_id < len(decoder_tokens) else "<unk>"
         for token_id in collapsed_ids
@@ -170,12 +251,32 @@ def decode_ctc_tokens(
         cur.append(token)
     if cur:
         words.append(cur)
-    return collapsed_ids, [t for t in tokens if t != word_boundary_token], words
+    return [t for t in tokens if t != word_boundary_token], words
+
+
+def decode_ctc_tokens(
+    frame_token_ids: Sequence[int],
+    decoder_tokens: Sequence[str],
+    *,
+    blank_id: int,
+    word_boundary_token: str,
+    collapse_repeats: bool = True,
+) -> tuple[List[int], List[str], List[List[str]]]:
+    collapsed_ids = _ctc_collapse(
+        frame_token_ids,
+        blank_id=blank_id,
+        collapse_repeats=collapse_repeats,
+    )
+    phonemes, words = _split_words(collapsed_ids, decoder_tokens, word_boundary_token)
+    return collapsed_ids, phonemes, words
 
 
 # The shipped ASR model subsamples by 2 over a 160-sample STFT hop, so each output
 # frame (one entry of `frame_token_ids`) spans 160 * 2 = 320 input samples.
 ASR_OUTPUT_FRAME_SAMPLES = 320
+# The engine keeps at most this many STFT frames (160-sample hop) per call, so a
+# single call covers up to 3000 * 160 - 1 samples (~30 s at 16 kHz).
+ASR_MAX_STFT_FRAMES = 3000
 
 
 @dataclass
@@ -203,20 +304,25 @@ def ctc_phoneme_spans(
     a phoneme runs from the frame it is emitted until the next emission (or the
     end). CTC is peaky, so these are coarse acoustic spans, not precise boundaries.
     """
-    emissions: List[tuple[int, str]] = []  # (frame_index, token_str)
-    prev = -1
-    for frame, token_id in enumerate(frame_token_ids):
-        tok = int(token_id)
-        if collapse_repeats and tok == prev:
-            continue
-        prev = tok
-        if tok == blank_id:
-            continue
-        emissions.append(
-            (frame, decoder_tokens[tok] if 0 <= tok < len(decoder_tokens) else "<unk>")
-        )
+    frame_token_ids = list(frame_token_ids)
+    token_ids, token_frames = _ctc_emissions(frame_token_ids, blank_id=blank_id, collapse_repeats=collapse_repeats)
+    return _spans_from_emissions(
+        token_ids, token_frames, decoder_tokens, word_boundary_token, len(frame_token_ids), frame_ms
+    )
+
 
-    n_frames = len(list(frame_token_ids)) if not isinstance(frame_token_ids, (list, tuple)) else len(frame_token_ids)
+def _spans_from_emissions(
+    token_ids: Sequence[int],
+    token_frames: Sequence[int],
+    decoder_tokens: Sequence[str],
+    word_boundary_token: str,
+    n_frames: int,
+    frame_ms: float,
+) -> List[PhonemeSpan]:
+    emissions = [  # (frame_index, token_str)
+        (frame, decoder_tokens[tok] if 0 <= tok < len(decoder_tokens) else "<unk>")
+        for tok, frame in zip(token_ids, token_frames)
+    ]
     spans: List[PhonemeSpan] = []
     for i, (frame, token) in enumerate(emissions):
         if token == word_boundary_token:
@@ -256,9 +362,29 @@ class ASRModel:
             else None
         )
 
-        self.session = _engine.AsrSession(_read_asr_hama_bytes(model_path))
-        input_names = [node.name for node in self.session.get_inputs()]
-        output_names = [node.name for node in self.session.get_outputs()]
+        # Weights are only located here; the native session is created on first
+        # use (see `load`), so constructing a model is cheap.
+        self._weight_source = _resolve_asr_hama(model_path)
+        self._session: _engine.AsrSession | None = None
+        self._session_lock = threading.Lock()
+
+    def load(self) -> ASRModel:
+        """Create the native session now rather than on the first transcription."""
+        _ = self.session
+        return self
+
+    @property
+    def session(self) -> _engine.AsrSession:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> _engine.AsrSession:
+        session = _engine.AsrSession(self._weight_source)
+        input_names = [node.name for node in session.get_inputs()]
+        output_names = [node.name for node in session.get_outputs()]
         has_waveform = "waveform" in input_names or any(name.startswith("waveform.") for name in input_names)
         if not has_waveform:
             raise RuntimeError(
@@ -271,6 +397,7 @@ class ASRModel:
         )
         self._log_probs_output_name = _resolve_name(output_names, "log_probs")
         self._out_lengths_output_name = _resolve_name(output_names, "out_lengths")
+        return session
 
     @property
     def input_format(self) -> str:
@@ -280,29 +407,282 @@ class ASRModel:
         return self.transcribe_waveform(waveform=waveform, sample_rate=sample_rate)
 
     def transcribe_file(self, wav_path: str | Path) -> ASRResult:
-        waveform, sample_rate = read_wav_mono(wav_path)
+        raw, sample_rate, n_channels, sample_width = _read_wav_raw(wav_path)
+        if sample_width == 2:
+            # 16-bit frames are passed as-is; the engine can take them directly.
+            waveform = np.frombuffer(raw, dtype="<i2").reshape(-1, n_channels)
+        else:
+            waveform = _pcm_to_float32_mono(raw, sample_width, n_channels)
         return self.transcribe_waveform(waveform=waveform, sample_rate=sample_rate)
 
     def transcribe_waveform(self, waveform: np.ndarray, sample_rate: int) -> ASRResult:
-        mono = _to_float32_mono(waveform)
+        arr = np.asarray(waveform)
+        if (
+            arr.dtype == np.int16
+            and arr.ndim in (1, 2)
+            and int(sample_rate) == self.model_sample_rate
+            and _engine.has("hama_asr_greedy_pcm16")
+        ):
+            # The engine converts int16 PCM to mono float itself, so no float
+            # copy of the clip is made on the host.
+            return self._transcribe_mono(arr)
+        mono = _to_float32_mono(arr)
         if int(sample_rate) != self.model_sample_rate:
             mono = _resample_linear(mono, int(sample_rate), self.model_sample_rate)
+        return self._transcribe_mono(mono)
+
+    def _transcribe_mono(self, mono: np.ndarray) -> ASRResult:
+        """Transcribe a model-rate clip, decoding inside the engine when it can.
+
+        `mono` is float mono, or int16 PCM frames when the engine exports
+        `hama_asr_greedy_pcm16`.
+        """
+        session = self.session
+        if not _engine.has("hama_asr_greedy"):
+            log_probs, out_length = self._run(mono)
+            return self._decode_single(log_probs, out_length)
+        frame_ids, token_ids, token_frames = session.greedy(mono, **self._greedy_options())
+        return self._result_from_tokens(frame_ids.tolist(), token_ids.tolist(), token_frames.tolist())
+
+    def _greedy_options(self) -> dict:
+        """`decode_cfg` as the engine's greedy-decode keywords."""
+        cfg = self.decode_cfg
+        # The same conditions under which `_frame_token_ids` applies each one.
+        apply_temperature = cfg.temperature > 0.0 and abs(cfg.temperature - 1.0) > 1e-8
+        apply_unk = self.unk_id is not None and abs(cfg.unk_bias) > 1e-8
+        return {
+            "temperature": float(cfg.temperature) if apply_temperature else 1.0,
+            "blank_id": self.blank_id,
+            "blank_bias": float(cfg.blank_bias) if abs(cfg.blank_bias) > 1e-8 else 0.0,
+            "unk_id": self.unk_id if apply_unk else -1,
+            "unk_bias": float(cfg.unk_bias) if apply_unk else 0.0,
+            "collapse_repeats": cfg.collapse_repeats,
+        }
+
+    def _run(self, mono: np.ndarray) -> tuple[np.ndarray, int]:
+        """Log-probs [T, vocab] and valid frame count for one model-rate clip."""
         wav = mono.reshape(1, -1).astype(np.float32, copy=False)
         lengths = np.array([wav.shape[1]], dtype=np.int64)
+        session = self.session  # resolves the tensor names on first use
         feeds = {
             self._waveform_input_name: wav,
             self._waveform_lengths_input_name: lengths,
         }
-        log_probs, out_lengths = self.session.run(
+        log_probs, out_lengths = session.run(
             [self._log_probs_output_name, self._out_lengths_output_name],
             feeds,
         )
-        out_lengths_arr = np.asarray(out_lengths).reshape(-1)
-        return self._decode_single(log_probs[0], int(out_lengths_arr[0]))
+        return log_probs[0], int(np.asarray(out_lengths).reshape(-1)[0])
+
+    def transcribe_batch(
+        self,
+        waveforms: Sequence[np.ndarray],
+        sample_rates: int | Sequence[int],
+        *,
+        batch_size: int = 32,
+        max_batch_seconds: float = 120.0,
+    ) -> List[ASRResult]:
+        """Transcribe many clips; returns one `ASRResult` per clip, in order.
+
+        `sample_rates` is one rate for every clip or one per clip. Clips are
+        sorted by length and cut into batches of at most `batch_size` clips
+        and `max_batch_seconds` of audio, so each batch holds clips of similar
+        length. A batch is one native call whose projections and feed-forward
+        layers run over all of its frames at once, and which decodes every
+        clip in the engine as `transcribe_waveform` does. Each result equals
+        `transcribe_waveform` on that clip.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        rates = [int(sample_rates)] * len(waveforms) if isinstance(sample_rates, int) else [int(r) for r in sample_rates]
+        if len(rates) != len(waveforms):
+            raise ValueError("sample_rates must be an int or have one entry per waveform")
+        if not waveforms:
+            return []
+        monos = []
+        for waveform, rate in zip(waveforms, rates):
+            mono = _to_float32_mono(waveform)
+            if rate != self.model_sample_rate:
+                mono = _resample_linear(mono, rate, self.model_sample_rate)
+            monos.append(mono)
+        session = self.session
+        if not _engine.has("hama_asr_run_batch"):
+            return [self._transcribe_mono(mono) for mono in monos]
+        fused = _engine.has("hama_asr_greedy_batch")
+
+        budget = max(1, int(max_batch_seconds * self.model_sample_rate))
+        order = sorted(range(len(monos)), key=lambda idx: monos[idx].size)
+        results: List[ASRResult | None] = [None] * len(monos)
+        start = 0
+        while start < len(order):
+            end = start + 1
+            samples = monos[order[start]].size
+            while end < len(order) and end - start < batch_size and samples + monos[order[end]].size <= budget:
+                samples += monos[order[end]].size
+                end += 1
+            chunk = order[start:end]
+            batch = [monos[idx] for idx in chunk]
+            if fused:
+                for idx, (frame_ids, token_ids, token_frames) in zip(
+                    chunk, session.greedy_batch(batch, **self._greedy_options())
+                ):
+                    results[idx] = self._result_from_tokens(frame_ids.tolist(), token_ids.tolist(), token_frames.tolist())
+            else:
+                for idx, log_probs in zip(chunk, session.run_batch(batch)):
+                    results[idx] = self._decode_single(log_probs, log_probs.shape[0])
+            start = end
+        return results  # type: ignore[return-value]
+
+    def transcribe_long(
+        self,
+        audio: np.ndarray | Iterable[np.ndarray],
+        sample_rate: int,
+        *,
+        window_seconds: float = 20.0,
+        overlap_seconds: float = 4.0,
+        workers: int = 1,
+    ) -> ASRResult:
+        """Transcribe audio of any length in overlapping windows.
+
+        `audio` is a waveform, or an iterable of consecutive blocks of one
+        (e.g. read from a file), at `sample_rate`. A window of `window_seconds`
+        (at most ~30 s, the engine's per-call cap) starts every
+        `window_seconds - overlap_seconds`. Each overlap is split at its middle,
+        so every output frame comes from a window giving it at least
+        `overlap_seconds / 2` of context on both sides. The frame argmax ids are
+        stitched on the global frame timeline and decoded once: the result, and
+        `phoneme_spans(result)`, are in the coordinates of the whole recording.
+        Up to `workers` windows are transcribed at once; only those windows and
+        the stitched ids are held in memory.
+        """
+        frame = ASR_OUTPUT_FRAME_SAMPLES
+        rate = float(self.model_sample_rate)
+        win_frames = int(round(window_seconds * rate / frame))
+        overlap_frames = int(round(overlap_seconds * rate / frame))
+        if win_frames < 1 or (win_frames * frame) // 160 + 1 > ASR_MAX_STFT_FRAMES:
+            max_s = (ASR_MAX_STFT_FRAMES - 1) * 160 // frame * frame / rate
+            raise ValueError(f"window_seconds must be between {frame / rate:g} and {max_s:g}")
+        if not 0 <= overlap_frames < win_frames:
+            raise ValueError("overlap_seconds must be >= 0 and shorter than window_seconds")
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+
+        if isinstance(audio, np.ndarray):
+            mono = _to_float32_mono(audio)
+            if int(sample_rate) != self.model_sample_rate:
+                mono = _resample_linear(mono, int(sample_rate), self.model_sample_rate)
+            blocks: Iterable[np.ndarray] = (mono,)
+        else:
+            blocks = self._model_rate_blocks(audio, int(sample_rate))
+
+        step = win_frames - overlap_frames
+        half = overlap_frames // 2
+        frame_ids: List[int] = []
+        prev: tuple[int, List[int]] | None = None  # (start frame, ids) awaiting its successor
+        for start, ids in self._transcribe_windows(blocks, win_frames * frame, step * frame, workers):
+            if prev is not None:
+                # prev's frames up to the middle of the overlap with this window
+                p_start, p_ids = prev
+                lo = 0 if p_start == 0 else half
+                frame_ids.extend(p_ids[lo : start + half - p_start])
+            prev = (start, ids)
+        if prev is not None:
+            p_start, p_ids = prev
+            frame_ids.extend(p_ids[0 if p_start == 0 else half :])
+        return self._result_from_frames(frame_ids)
+
+    def stream(
+        self,
+        sample_rate: int,
+        *,
+        step_seconds: float = 0.32,
+        right_context_seconds: float = 0.64,
+        left_context_seconds: float = 3.2,
+    ) -> ASRStream:
+        """Start an incremental transcription of one utterance; see `ASRStream`."""
+        return ASRStream(
+            self,
+            sample_rate,
+            step_seconds=step_seconds,
+            right_context_seconds=right_context_seconds,
+            left_context_seconds=left_context_seconds,
+        )
+
+    def _model_rate_blocks(self, blocks: Iterable[np.ndarray], sample_rate: int) -> Iterator[np.ndarray]:
+        resampler = _LinearResampler(sample_rate, self.model_sample_rate) if sample_rate != self.model_sample_rate else None
+        for block in blocks:
+            mono = _to_float32_mono(block)
+            yield resampler.push(mono) if resampler is not None else mono
+
+    def _transcribe_windows(
+        self, blocks: Iterable[np.ndarray], win: int, step: int, workers: int
+    ) -> Iterator[tuple[int, List[int]]]:
+        """(start frame, frame argmax ids) of each window, in order."""
+
+        def run(samples: np.ndarray) -> List[int]:
+            log_probs, out_length = self._run(samples)
+            return self._frame_token_ids(log_probs, out_length)
+
+        windows = _iter_windows(blocks, win, step)
+        if workers == 1:
+            for start, samples in windows:
+                yield start // ASR_OUTPUT_FRAME_SAMPLES, run(samples)
+            return
+        self.load()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: deque = deque()
+            for start, samples in windows:
+                pending.append((start, pool.submit(run, samples)))
+                if len(pending) >= workers:
+                    s0, fut = pending.popleft()
+                    yield s0 // ASR_OUTPUT_FRAME_SAMPLES, fut.result()
+            while pending:
+                s0, fut = pending.popleft()
+                yield s0 // ASR_OUTPUT_FRAME_SAMPLES, fut.result()
+
+    def transcribe_many(
+        self,
+        inputs: Sequence[str | os.PathLike[str] | np.ndarray],
+        sample_rate: int | None = None,
+        workers: int | None = None,
+    ) -> List[ASRResult]:
+        """Transcribe many WAV paths and/or waveforms on a pool of `workers`
+        threads (default: one per CPU); returns one `ASRResult` per input, in
+        input order.
+
+        Waveform arrays are taken at `sample_rate`. All workers share this
+        model's native session, which is safe to call from many threads.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if sample_rate is None and any(isinstance(item, np.ndarray) for item in inputs):
+            raise ValueError("sample_rate is required for waveform inputs")
+
+        def run(item: str | os.PathLike[str] | np.ndarray) -> ASRResult:
+            if isinstance(item, np.ndarray):
+                return self.transcribe_waveform(waveform=item, sample_rate=int(sample_rate))
+            return self.transcribe_file(item)
+
+        if workers == 1 or len(inputs) <= 1:
+            return [run(item) for item in inputs]
+        self.load()
+        with ThreadPoolExecutor(max_workers=min(workers, len(inputs))) as pool:
+            return list(pool.map(run, inputs))
 
     def phoneme_spans(self, result: ASRResult) -> List[PhonemeSpan]:
         """Approximate per-phoneme time spans (ms) from an `ASRResult`."""
         frame_ms = 1000.0 * ASR_OUTPUT_FRAME_SAMPLES / float(self.model_sample_rate)
+        if len(result.token_frames) == len(result.token_ids):
+            return _spans_from_emissions(
+                result.token_ids,
+                result.token_frames,
+                self.decoder_tokens,
+                self.decode_cfg.word_boundary_token,
+                len(result.frame_token_ids),
+                frame_ms,
+            )
         return ctc_phoneme_spans(
             result.frame_token_ids,
             self.decoder_tokens,
@@ -313,17 +693,14 @@ class ASRModel:
         )
 
     def _decode_single(self, log_probs: np.ndarray, out_length: int) -> ASRResult:
+        return self._result_from_frames(self._frame_token_ids(log_probs, out_length))
+
+    def _frame_token_ids(self, log_probs: np.ndarray, out_length: int) -> List[int]:
+        """Per-frame argmax ids after the decode config's temperature and biases."""
         valid = max(0, min(int(out_length), int(log_probs.shape[0])))
         logits = np.asarray(log_probs[:valid], dtype=np.float32)
         if logits.size == 0:
-            return ASRResult(
-                phonemes=[],
-                phoneme_text="",
-                word_phoneme_text="",
-                token_ids=[],
-                frame_token_ids=[],
-                num_frames=0,
-            )
+            return []
 
         if self.decode_cfg.temperature > 0.0 and abs(self.decode_cfg.temperature - 1.0) > 1e-8:
             logits = logits.copy()
@@ -337,19 +714,182 @@ class ASRModel:
                 logits = logits.copy()
             logits[:, self.unk_id] += float(self.decode_cfg.unk_bias)
 
-        frame_token_ids = np.argmax(logits, axis=-1).astype(np.int64).tolist()
-        token_ids, phonemes, words = decode_ctc_tokens(
+        return np.argmax(logits, axis=-1).astype(np.int64).tolist()
+
+    def _result_from_frames(self, frame_token_ids: List[int]) -> ASRResult:
+        token_ids, token_frames = _ctc_emissions(
             frame_token_ids,
-            self.decoder_tokens,
             blank_id=self.blank_id,
-            word_boundary_token=self.decode_cfg.word_boundary_token,
             collapse_repeats=self.decode_cfg.collapse_repeats,
         )
+        return self._result_from_tokens(frame_token_ids, token_ids, token_frames)
+
+    def _result_from_tokens(self, frame_token_ids: List[int], token_ids: List[int], token_frames: List[int]) -> ASRResult:
+        phonemes, words = _split_words(token_ids, self.decoder_tokens, self.decode_cfg.word_boundary_token)
         return ASRResult(
             phonemes=phonemes,
             phoneme_text=" ".join(phonemes),
             word_phoneme_text=" | ".join(" ".join(word) for word in words if word),
             token_ids=token_ids,
             frame_token_ids=frame_token_ids,
-            num_frames=valid,
+            num_frames=len(frame_token_ids),
+            token_frames=token_frames,
         )
+
+
+class ASRStream:
+    """Incremental transcription of one utterance fed as PCM chunks.
+
+    Create with `ASRModel.stream(sample_rate)`. `push` returns the phonemes
+    that became final with that chunk; they never change afterwards, and the
+    concatenation of every `push` and the tail of `finish()` is the result's
+    `phonemes`. `partial` adds the still-tentative frames at the end. Only the
+    left context and the unfinished audio are held in memory. A stream is
+    meant for one feeding thread; separate streams may share a model.
+
+    Every `step_seconds` of pushed audio the stream re-runs the model over
+    the not-yet-final audio plus `left_context_seconds` before it. The
+    default covers the conv backbone's receptive field. A frame becomes final
+    once `right_context_seconds` of audio follow it, so phonemes arrive about
+    `step_seconds + right_context_seconds` after they are spoken.
+
+    The model is not incremental, so each step recomputes its whole window of
+    about `window_seconds = left + right + step` seconds. Per second of audio
+    that is `window_seconds / step_seconds` seconds of model input: about 13x
+    with the defaults (4.16 s every 0.32 s). A shorter left context or a
+    longer step lowers the CPU cost. The price is frames finalized with less
+    context, or later phonemes.
+    """
+
+    def __init__(
+        self,
+        model: ASRModel,
+        sample_rate: int,
+        *,
+        step_seconds: float = 0.32,
+        right_context_seconds: float = 0.64,
+        left_context_seconds: float = 3.2,
+    ):
+        frame = ASR_OUTPUT_FRAME_SAMPLES
+        rate = float(model.model_sample_rate)
+        step = int(round(step_seconds * rate / frame)) * frame
+        right_frames = int(round(right_context_seconds * rate / frame))
+        left_frames = int(round(left_context_seconds * rate / frame))
+        if step < frame:
+            raise ValueError(f"step_seconds must be at least {frame / rate:g}")
+        if right_frames < 0 or left_frames < 0:
+            raise ValueError("context lengths must be >= 0")
+        # Longest buffer a decode sees: left context, the unfinished frames and a step.
+        longest = (left_frames + right_frames + 1) * frame + step
+        if longest // 160 + 1 > ASR_MAX_STFT_FRAMES:
+            raise ValueError("step_seconds + right_context_seconds + left_context_seconds must stay under ~30 s")
+        sample_rate = int(sample_rate)
+        self._model = model
+        self._resampler = (
+            _LinearResampler(sample_rate, model.model_sample_rate) if sample_rate != model.model_sample_rate else None
+        )
+        self._step = step
+        self._right_frames = right_frames
+        self._left_frames = left_frames
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._buf_start = 0  # sample index of _buf[0], always on a frame boundary
+        self._total = 0  # model-rate samples received
+        self._decoded_total = 0  # _total at the last decode
+        self._final: List[int] = []  # frame ids that will not change
+        self._tentative: List[int] = []  # frame ids after them, from the last decode
+        self._prev_id = -1  # last final frame id, for repeat collapsing
+        self._finished = False
+
+    @property
+    def window_seconds(self) -> float:
+        """Audio one step decodes at most: left context, unfinished frames and a step."""
+        frames = self._left_frames + self._right_frames
+        return (frames * ASR_OUTPUT_FRAME_SAMPLES + self._step) / self._model.model_sample_rate
+
+    @property
+    def partial(self) -> ASRResult:
+        """Final frames plus the last decode's tentative tail."""
+        return self._model._result_from_frames(self._final + self._tentative)
+
+    def push(self, chunk: np.ndarray) -> List[str]:
+        """Append audio; returns the phonemes that became final."""
+        if self._finished:
+            raise RuntimeError("push() after finish()")
+        mono = _to_float32_mono(chunk)
+        if self._resampler is not None:
+            mono = self._resampler.push(mono)
+        out: List[str] = []
+        # Feed at most a step at a time so no decode outgrows the engine's cap.
+        while mono.size:
+            take = min(mono.size, self._decoded_total + self._step - self._total)
+            self._buf = np.concatenate([self._buf, mono[:take]])
+            self._total += take
+            mono = mono[take:]
+            if self._total - self._decoded_total >= self._step:
+                out.extend(self._decode(final=False))
+        return out
+
+    def finish(self) -> ASRResult:
+        """Finalize the remaining frames and return the whole utterance."""
+        if not self._finished:
+            if self._total > self._decoded_total:
+                self._decode(final=True)
+            else:
+                self._commit(self._tentative)
+            self._tentative = []
+            self._buf = np.zeros(0, dtype=np.float32)
+            self._finished = True
+        return self._model._result_from_frames(list(self._final))
+
+    def _decode(self, *, final: bool) -> List[str]:
+        frame = ASR_OUTPUT_FRAME_SAMPLES
+        log_probs, out_length = self._model._run(self._buf)
+        ids = self._model._frame_token_ids(log_probs, out_length)
+        first = self._buf_start // frame
+        end = first + len(ids)
+        if not final:
+            end = min(end, self._total // frame - self._right_frames)
+        done = len(self._final)
+        new = self._commit(ids[done - first : max(done, end) - first])
+        self._tentative = ids[len(self._final) - first :]
+        self._decoded_total = self._total
+        keep_from = max(0, len(self._final) - self._left_frames) * frame
+        if keep_from > self._buf_start:
+            self._buf = self._buf[keep_from - self._buf_start :]
+            self._buf_start = keep_from
+        return new
+
+    def _commit(self, ids: List[int]) -> List[str]:
+        model = self._model
+        cfg = model.decode_cfg
+        phonemes: List[str] = []
+        for token_id in ids:
+            tok = int(token_id)
+            self._final.append(tok)
+            if cfg.collapse_repeats and tok == self._prev_id:
+                continue
+            self._prev_id = tok
+            if tok == model.blank_id:
+                continue
+            token = model.decoder_tokens[tok] if 0 <= tok < len(model.decoder_tokens) else "<unk>"
+            if token != cfg.word_boundary_token:
+                phonemes.append(token)
+        return phonemes
+
+
+def _iter_windows(blocks: Iterable[np.ndarray], win: int, step: int) -> Iterator[tuple[int, np.ndarray]]:
+    """(start sample, samples) of windows of `win` samples every `step` samples
+    over a stream of blocks. The last window holds whatever remains after the
+    previous one and is only emitted if that includes new samples."""
+    buf = np.zeros(0, dtype=np.float32)
+    start = 0
+    emitted = False
+    for block in blocks:
+        buf = np.concatenate([buf, np.asarray(block, dtype=np.float32).reshape(-1)])
+        while buf.size >= win:
+            yield start, buf[:win]
+            emitted = True
+            buf = buf[step:]
+            start += step
+    if buf.size > (win - step if emitted else 0):
+        yield start, buf
@@ -0,0 +1,210 @@
+"""Segment-level memoization of G2P results.
+
+`G2PCache` is an opt-in, bounded LRU that `G2PModel` consults per segment
+before running the engine. Entries are keyed by the segment text and the
+`preserve_literals` mode and store the segment's result relative to character
+index 0; `G2PModel` re-bases alignments onto each occurrence's offset. A cache
+holds results from a single model's weights, so give each model its own.
+
+`G2PDiskCache` is the persistent tier: a sqlite file shared by every process
+that opens it, keyed additionally by a hash of the model weights so one file
+can serve several models. `tools/build_g2p_cache.py` pre-fills it from a word
+list.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import sqlite3
+import sys
+import threading
+from typing import TYPE_CHECKING, Hashable, Iterable
+
+if TYPE_CHECKING:
+    from .inference import G2PResult
+
+# Rough per-alignment footprint: the G2PAlignment instance, its __dict__ and the
+# int fields. The phoneme strings are counted separately.
+_ALIGNMENT_OVERHEAD = 200
+
+
+@dataclass(frozen=True)
+class G2PCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+
+class G2PCache:
+    """Bounded LRU of segment-level `G2PResult`s.
+
+    Evicts least-recently-used entries once more than `max_entries` are held
+    or their estimated size exceeds `max_bytes` (either bound may be None).
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int | None = 4096, max_bytes: int | None = 32 * 1024 * 1024):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be >= 1 or None")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1 or None")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[G2PResult, int]] = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> G2PResult | None:
+        """Return the cached result for `key` (marking it recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, result: G2PResult) -> None:
+        nbytes = _estimate_nbytes(key, result)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (result, nbytes)
+            self._nbytes += nbytes
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self._nbytes > self.max_bytes
+            ):
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self) -> G2PCacheStats:
+        with self._lock:
+            return G2PCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                nbytes=self._nbytes,
+            )
+
+
+class G2PDiskCache:
+    """Persistent, process-shared G2P segment cache backed by sqlite.
+
+    `path` is the database file, or a directory to hold `g2p_cache.sqlite3`.
+    It defaults to `$HAMA_CACHE_DIR`, else `~/.cache/hama`. Rows are keyed by
+    (model key, `preserve_literals`, segment text). `G2PModel` derives the
+    model key from its weights, so stale entries are never served after a
+    weights change. Safe to share between threads and processes.
+    """
+
+    FILENAME = "g2p_cache.sqlite3"
+
+    def __init__(self, path: str | os.PathLike[str] | None = None):
+        if path is None:
+            path = os.environ.get("HAMA_CACHE_DIR") or Path.home() / ".cache" / "hama"
+        p = Path(path)
+        if p.is_dir() or not p.suffix:
+            p = p / self.FILENAME
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self.path = p
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(p), timeout=30.0, check_same_thread=False, isolation_level=None)
+        # WAL lets readers in other processes proceed while one process writes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS g2p ("
+            " model TEXT NOT NULL, mode TEXT NOT NULL, text TEXT NOT NULL, result TEXT NOT NULL,"
+            " PRIMARY KEY (model, mode, text)) WITHOUT ROWID"
+        )
+
+    def get(self, model_key: str, preserve_literals: str, text: str) -> G2PResult | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM g2p WHERE model = ? AND mode = ? AND text = ?",
+                (model_key, preserve_literals, text),
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return _result_from_json(row[0])
+
+    def put_many(self, model_key: str, preserve_literals: str, items: Iterable[tuple[str, G2PResult]]) -> None:
+        """Insert (segment text, result) pairs in one transaction."""
+        rows = [(model_key, preserve_literals, text, _result_to_json(result)) for text, result in items]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO g2p VALUES (?, ?, ?, ?)", rows)
+
+    def stats(self) -> G2PCacheStats:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM g2p").fetchone()
+            return G2PCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=0,
+                entries=entries,
+                nbytes=self.path.stat().st_size,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _result_to_json(result: G2PResult) -> str:
+    return json.dumps(
+        [result.ipa, result.display_ipa, [[a.phoneme, a.phoneme_index, a.char_index] for a in result.alignments]],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _result_from_json(raw: str) -> G2PResult:
+    from .inference import G2PAlignment, G2PResult
+
+    ipa, display_ipa, alignments = json.loads(raw)
+    return G2PResult(
+        ipa=ipa,
+        display_ipa=display_ipa,
+        alignments=[G2PAlignment(phoneme=p, phoneme_index=i, char_index=c) for p, i, c in alignments],
+    )
+
+
+def _estimate_nbytes(key: Hashable, result: G2PResult) -> int:
+    nbytes = sys.getsizeof(key) + sys.getsizeof(result.ipa) + sys.getsizeof(result.display_ipa)
+    if isinstance(key, tuple):
+        nbytes += sum(sys.getsizeof(part) for part in key)
+    for alignment in result.alignments:
+        nbytes += _ALIGNMENT_OVERHEAD + sys.getsizeof(alignment.phoneme)
+    return nbytes
@@ -1,28 +1,56 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+import hashlib
 from importlib import resources
+import os
 from pathlib import Path
 import re
+import threading
 from typing import List, Literal, Pattern, Sequence
 import unicodedata
 
 import numpy as np
 
 from . import _engine
-from .tokenizer import TextTokenizer
+from .cache import G2PCache, G2PDiskCache
+from .tokenizer import EncodedText, TextTokenizer
 from .vocab import Vocabulary
 
 
-def _read_hama_bytes(path_like, asset_name: str) -> bytes:
-    """Resolve `.hama` weight bytes from an explicit path (a `.hama` file, or a
-    sibling of a given `.onnx` path) or fall back to the packaged asset."""
+def _resolve_hama(path_like, asset_name: str) -> Path | bytes:
+    """Resolve `.hama` weights from an explicit path (a `.hama` file, or a
+    sibling of a given `.onnx` path) or fall back to the packaged asset.
+
+    Returns a file path, which the engine memory-maps, unless the asset lives
+    somewhere without one (e.g. a zipped install), in which case its bytes."""
     if path_like is not None:
         p = Path(str(path_like))
         if p.suffix != ".hama":
             p = p.with_suffix(".hama")
-        return p.read_bytes()
-    return resources.files("hama.assets").joinpath(asset_name).read_bytes()
+        if not p.is_file():
+            raise FileNotFoundError(p)
+        return p
+    asset = resources.files("hama.assets").joinpath(asset_name)
+    return asset if isinstance(asset, Path) and asset.is_file() else asset.read_bytes()
+
+
+def _resolve_g2p_sources(
+    model_path, encoder_model_path, decoder_step_model_path
+) -> tuple[Path | bytes, Path | bytes]:
+    """Resolve the (encoder, decoder-step) `.hama` weights of a `G2PModel`."""
+    if (encoder_model_path is None) != (decoder_step_model_path is None):
+        raise ValueError("encoder_model_path and decoder_step_model_path must be provided together")
+
+    # Split encoder + decoder-step over the `.hama` weights, run by the Zig engine.
+    # A directory `model_path` resolves the split weights inside it.
+    enc_src = encoder_model_path if encoder_model_path is not None else model_path
+    dec_src = decoder_step_model_path if decoder_step_model_path is not None else model_path
+    if model_path is not None and Path(str(model_path)).is_dir():
+        enc_src = Path(str(model_path)) / "encoder.hama"
+        dec_src = Path(str(model_path)) / "decoder_step.hama"
+    return _resolve_hama(enc_src, "encoder.hama"), _resolve_hama(dec_src, "decoder_step.hama")
 
 
 @dataclass
@@ -73,31 +101,68 @@ class G2PModel:
         max_input_len: int = 128,
         max_output_len: int = 32,
         providers: Sequence[str] | None = None,
+        cache: G2PCache | None = None,
+        disk_cache: G2PDiskCache | None = None,
     ):
         self.vocab = Vocabulary.load(vocab_path)
         self.tokenizer = TextTokenizer(self.vocab, max_input_len=max_input_len)
         self.max_output_len = max_output_len
+        # Opt-in segment memoization; see `hama.cache`. The disk tier is only
+        # consulted on in-memory misses.
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self._model_key_value: str | None = None
 
         _ = providers  # retained for API compatibility; the Zig engine is CPU-only
         self.session = None
-        self.encoder_session = None
-        self.decoder_step_session = None
         self._encoder_output_names: dict[str, str] | None = None
         self._decoder_step_input_names: dict[str, str] | None = None
         self._decoder_step_output_names: dict[str, str] | None = None
 
-        if (encoder_model_path is None) != (decoder_step_model_path is None):
-            raise ValueError("encoder_model_path and decoder_step_model_path must be provided together")
-
-        # Split encoder + decoder-step over the `.hama` weights, run by the Zig engine.
-        # A directory `model_path` resolves the split weights inside it.
-        enc_src = encoder_model_path if encoder_model_path is not None else model_path
-        dec_src = decoder_step_model_path if decoder_step_model_path is not None else model_path
-        if model_path is not None and Path(str(model_path)).is_dir():
-            enc_src = Path(str(model_path)) / "encoder.hama"
-            dec_src = Path(str(model_path)) / "decoder_step.hama"
-        self.encoder_session = _engine.EncoderSession(_read_hama_bytes(enc_src, "encoder.hama"))
-        self.decoder_step_session = _engine.DecoderSession(_read_hama_bytes(dec_src, "decoder_step.hama"))
+        # Weights are only located here; the native sessions are created on
+        # first use (see `load`), so constructing a model is cheap.
+        self._weight_sources = _resolve_g2p_sources(model_path, encoder_model_path, decoder_step_model_path)
+        self._sessions: tuple[_engine.EncoderSession, _engine.DecoderSession, _engine.G2pSession | None] | None = None
+        self._session_lock = threading.Lock()
+
+    def load(self) -> G2PModel:
+        """Create the native sessions now rather than on the first prediction."""
+        self._load_sessions()
+        return self
+
+    @property
+    def encoder_session(self) -> _engine.EncoderSession:
+        return self._load_sessions()[0]
+
+    @property
+    def decoder_step_session(self) -> _engine.DecoderSession:
+        return self._load_sessions()[1]
+
+    @property
+    def g2p_session(self) -> _engine.G2pSession | None:
+        """Fused native decode loop, or None when the engine predates it."""
+        return self._load_sessions()[2]
+
+    def _load_sessions(self) -> tuple[_engine.EncoderSession, _engine.DecoderSession, _engine.G2pSession | None]:
+        if self._sessions is None:
+            with self._session_lock:
+                if self._sessions is None:
+                    encoder = _engine.EncoderSession(self._weight_sources[0])
+                    decoder = _engine.DecoderSession(self._weight_sources[1])
+                    fused = _engine.G2pSession(encoder, decoder) if _engine.has("hama_g2p_greedy") else None
+                    self._sessions = (encoder, decoder, fused)
+        return self._sessions
+
+    @property
+    def _model_key(self) -> str:
+        # Persistent cache entries must not outlive the weights (or the length
+        # limits) that produced them.
+        if self._model_key_value is None:
+            digest = hashlib.sha256()
+            for source in self._weight_sources:
+                digest.update(source if isinstance(source, bytes) else source.read_bytes())
+            self._model_key_value = f"{digest.hexdigest()}:{self.tokenizer.max_input_len}:{self.max_output_len}"
+        return self._model_key_value
 
     def __call__(
         self,
@@ -138,29 +203,111 @@ class G2PModel:
             )
             for segment_text, segment_start in segments
         ]
+        return _join_segment_results(segment_results, output_delimiter)
 
-        ipa_parts: List[str] = []
-        display_parts: List[str] = []
-        alignments: List[G2PAlignment] = []
-        for idx, segment_result in enumerate(segment_results):
-            if idx > 0:
-                ipa_parts.append(output_delimiter)
-                display_parts.append(output_delimiter)
-            ipa_parts.append(segment_result.ipa)
-            display_parts.append(segment_result.display_ipa)
-            for alignment in segment_result.alignments:
-                alignments.append(
-                    G2PAlignment(
-                        phoneme=alignment.phoneme,
-                        phoneme_index=len(alignments),
-                        char_index=alignment.char_index,
-                    )
-                )
-        return G2PResult(
-            ipa="".join(ipa_parts),
-            display_ipa="".join(display_parts),
-            alignments=alignments,
-        )
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        split_delimiter: str | Pattern[str] | None = r"\s+",
+        output_delimiter: str = " ",
+        preserve_literals: Literal["none", "punct"] = "none",
+        batch_size: int = 32,
+    ) -> List[G2PResult]:
+        """Predict many texts at once; returns one `G2PResult` per text, in order.
+
+        Every segment of every text is pooled and decoded `batch_size` segments
+        per native call, so the decoder's per-token projections run as batched
+        matmuls. Each result equals `predict(text, ...)` with the same options.
+        """
+        if preserve_literals not in {"none", "punct"}:
+            raise ValueError("preserve_literals must be 'none' or 'punct'")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if not texts:
+            return []
+
+        # (text, base_char_index) per segment, grouped by input text; a text
+        # with no segments is predicted whole (unjoined), exactly like `predict`.
+        per_text: List[List[tuple[str, int]]] = []
+        whole: List[bool] = []
+        for text in texts:
+            segments = self._segment_text(text=text, split_delimiter=split_delimiter)
+            whole.append(not segments)
+            per_text.append(segments or [(text, 0)])
+
+        # Each distinct segment is resolved once at character offset 0 (from the
+        # caches when enabled) and then re-based onto every occurrence.
+        relative: dict[str, G2PResult] = {}
+        computed: List[str] = []
+        pending: dict[str, _PreparedText] = {}
+        for segments in per_text:
+            for segment_text, _ in segments:
+                if segment_text in relative or segment_text in pending:
+                    continue
+                cached = self._lookup_segment(segment_text, preserve_literals)
+                if cached is not None:
+                    relative[segment_text] = cached
+                    continue
+                prepared = _prepare_text_for_prediction(segment_text, preserve_literals)
+                if _is_literal_only(prepared, preserve_literals):
+                    relative[segment_text] = _literal_only_result(segment_text)
+                    computed.append(segment_text)
+                else:
+                    pending[segment_text] = prepared
+        raw_results = self._predict_raw_many([prepared.model_text for prepared in pending.values()], batch_size)
+        for (segment_text, prepared), raw_result in zip(pending.items(), raw_results):
+            relative[segment_text] = _finish_prediction(raw_result, prepared, segment_text, 0, preserve_literals)
+            computed.append(segment_text)
+        self._store_segments({segment_text: relative[segment_text] for segment_text in computed}, preserve_literals)
+
+        results: List[G2PResult] = []
+        for segments, is_whole in zip(per_text, whole):
+            segment_results = [_rebase_result(relative[segment_text], start) for segment_text, start in segments]
+            if is_whole:
+                results.append(segment_results[0])
+            else:
+                results.append(_join_segment_results(segment_results, output_delimiter))
+        return results
+
+    def predict_many(
+        self,
+        texts: Sequence[str],
+        split_delimiter: str | Pattern[str] | None = r"\s+",
+        output_delimiter: str = " ",
+        preserve_literals: Literal["none", "punct"] = "none",
+        workers: int | None = None,
+        batch_size: int = 32,
+    ) -> List[G2PResult]:
+        """Predict many texts on a pool of `workers` threads (default: one per
+        CPU); returns one `G2PResult` per text, in input order.
+
+        Texts are split into `predict_batch` chunks of `batch_size` and the
+        chunks run concurrently over this model's one set of native sessions,
+        which are safe to share between threads. Each result equals
+        `predict(text, ...)` with the same options.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        chunks = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        def run(chunk: Sequence[str]) -> List[G2PResult]:
+            return self.predict_batch(
+                chunk,
+                split_delimiter=split_delimiter,
+                output_delimiter=output_delimiter,
+                preserve_literals=preserve_literals,
+                batch_size=batch_size,
+            )
+
+        if workers == 1 or len(chunks) <= 1:
+            return [result for chunk in chunks for result in run(chunk)]
+        self.load()
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            return [result for chunk_results in pool.map(run, chunks) for result in chunk_results]
 
     def get_max_input_len(self) -> int:
         return self.tokenizer.max_input_len
@@ -170,32 +317,90 @@ class G2PModel:
         text: str,
         base_char_index: int,
         preserve_literals: Literal["none", "punct"],
+    ) -> G2PResult:
+        if self.cache is None and self.disk_cache is None:
+            return self._predict_segment(text, base_char_index, preserve_literals)
+        result = self._lookup_segment(text, preserve_literals)
+        if result is None:
+            result = self._predict_segment(text, 0, preserve_literals)
+            self._store_segments({text: result}, preserve_literals)
+        return _rebase_result(result, base_char_index)
+
+    def _lookup_segment(self, text: str, preserve_literals: Literal["none", "punct"]) -> G2PResult | None:
+        """Cached offset-0 result for a segment: memory first, then disk."""
+        if self.cache is not None:
+            result = self.cache.get((text, preserve_literals))
+            if result is not None:
+                return result
+        if self.disk_cache is None:
+            return None
+        result = self.disk_cache.get(self._model_key, preserve_literals, text)
+        if result is not None and self.cache is not None:
+            self.cache.put((text, preserve_literals), result)
+        return result
+
+    def _store_segments(self, results: dict[str, G2PResult], preserve_literals: Literal["none", "punct"]) -> None:
+        if self.cache is not None:
+            for text, result in results.items():
+                self.cache.put((text, preserve_literals), result)
+        if self.disk_cache is not None:
+            self.disk_cache.put_many(self._model_key, preserve_literals, results.items())
+
+    def _predict_segment(
+        self,
+        text: str,
+        base_char_index: int,
+        preserve_literals: Literal["none", "punct"],
     ) -> G2PResult:
         prepared = _prepare_text_for_prediction(text, preserve_literals)
-        if preserve_literals == "punct" and not any(not ch.isspace() for ch in prepared.model_text):
-            return G2PResult(
-                ipa="",
-                display_ipa="".join(ch for ch in text if _is_punctuation(ch)),
-                alignments=[],
-            )
+        if _is_literal_only(prepared, preserve_literals):
+            return _literal_only_result(text)
 
         if self.encoder_session is not None and self.decoder_step_session is not None:
             raw_result = self._predict_single_split(text=prepared.model_text, base_char_index=0)
         else:
             raw_result = self._predict_single_legacy(text=prepared.model_text, base_char_index=0)
-
-        relative_alignments = [
-            G2PAlignment(
-                phoneme=alignment.phoneme,
-                phoneme_index=alignment.phoneme_index,
-                char_index=(
-                    prepared.char_index_map[alignment.char_index]
-                    if 0 <= alignment.char_index < len(prepared.char_index_map)
-                    else -1
-                ),
+        return _finish_prediction(raw_result, prepared, text, base_char_index, preserve_literals)
+
+    def _predict_raw_many(self, texts: Sequence[str], batch_size: int) -> List[G2PResult]:
+        """Raw (model-text relative) predictions for `texts`, decoded in padded
+        batches when the engine exports `hama_g2p_greedy_batch`."""
+        if self.g2p_session is None or not _engine.has("hama_g2p_greedy_batch"):
+            return [self._predict_single_split(text=text, base_char_index=0) for text in texts]
+
+        encodings = [self.tokenizer.encode(text) for text in texts]
+        # Batch similar lengths together so each batch pads to a small width.
+        order = sorted(range(len(encodings)), key=lambda idx: encodings[idx].length)
+        pad_id = self.vocab.encoder_token_to_id["<pad>"]
+        results: List[G2PResult | None] = [None] * len(encodings)
+        for start in range(0, len(order), batch_size):
+            chunk = order[start : start + batch_size]
+            width = max(encodings[idx].ids.shape[0] for idx in chunk)
+            input_ids = np.full((len(chunk), width), pad_id, dtype=np.int64)
+            for row, idx in enumerate(chunk):
+                input_ids[row, : encodings[idx].ids.shape[0]] = encodings[idx].ids
+            decoded = self.g2p_session.greedy_batch(
+                input_ids,
+                [encodings[idx].length for idx in chunk],
+                self.vocab.sos_id,
+                self.vocab.eos_id,
+                self.max_output_len,
             )
-            for alignment in raw_result.alignments
-        ]
+            for idx, (decoded_arr, attn_arr) in zip(chunk, decoded):
+                phonemes, alignments = self._decode(decoded_arr, attn_arr, encodings[idx].position_map)
+                results[idx] = G2PResult(ipa="".join(phonemes), display_ipa="".join(phonemes), alignments=alignments)
+        return results  # type: ignore[return-value]
+
+    def _predict_single_legacy(self, text: str, base_char_index: int) -> G2PResult:
+        encoding = self.tokenizer.encode(text)
+        inputs = {
+            "input_ids": encoding.ids.reshape(1, -1),
+            "input_lengths": np.array([encoding.length], dtype=np.int64),
+        }
+        if self.session is None:  # pragma: no cover - guarded by __init__/branch above
+            raise RuntimeError("Legacy ONNX session is not initialized")
+        decoded_ids, attn_indices = self.session.run(None, inputs)
+        phonemes, alignments = self._decode(decoded_ids[0], attn_indices[0], encoding.position_map)
         adjusted_alignments = [
             G2PAlignment(
                 phoneme=alignment.phoneme,
@@ -206,25 +411,30 @@ class G2PModel:
                     else alignment.char_index + base_char_index
                 ),
             )
-            for alignment in relative_alignments
+            for alignment in alignments
         ]
-        display_ipa = (
-            _build_display_ipa(raw_result.ipa, relative_alignments, text)
-            if preserve_literals == "punct"
-            else raw_result.ipa
+        return G2PResult(
+            ipa="".join(phonemes),
+            display_ipa="".join(phonemes),
+            alignments=adjusted_alignments,
         )
-        return G2PResult(ipa=raw_result.ipa, display_ipa=display_ipa, alignments=adjusted_alignments)
 
-    def _predict_single_legacy(self, text: str, base_char_index: int) -> G2PResult:
+    def _predict_single_split(self, text: str, base_char_index: int) -> G2PResult:
+        if self.encoder_session is None or self.decoder_step_session is None:  # pragma: no cover
+            raise RuntimeError("Split ONNX sessions are not initialized")
+
         encoding = self.tokenizer.encode(text)
-        inputs = {
-            "input_ids": encoding.ids.reshape(1, -1),
-            "input_lengths": np.array([encoding.length], dtype=np.int64),
-        }
-        if self.session is None:  # pragma: no cover - guarded by __init__/branch above
-            raise RuntimeError("Legacy ONNX session is not initialized")
-        decoded_ids, attn_indices = self.session.run(None, inputs)
-        phonemes, alignments = self._decode(decoded_ids[0], attn_indices[0], encoding.position_map)
+        if self.g2p_session is not None:
+            decoded_arr, attn_arr = self.g2p_session.greedy(
+                encoding.ids,
+                encoding.length,
+                self.vocab.sos_id,
+                self.vocab.eos_id,
+                self.max_output_len,
+            )
+        else:
+            decoded_arr, attn_arr = self._greedy_split_steps(encoding)
+        phonemes, alignments = self._decode(decoded_arr, attn_arr, encoding.position_map)
         adjusted_alignments = [
             G2PAlignment(
                 phoneme=alignment.phoneme,
@@ -243,12 +453,12 @@ class G2PModel:
             alignments=adjusted_alignments,
         )
 
-    def _predict_single_split(self, text: str, base_char_index: int) -> G2PResult:
+    def _greedy_split_steps(self, encoding: EncodedText) -> tuple[np.ndarray, np.ndarray]:
+        """Host-driven greedy loop (one decoder-step call per output token), used
+        when the loaded engine predates the fused `hama_g2p_greedy` entry point."""
         if self.encoder_session is None or self.decoder_step_session is None:  # pragma: no cover
             raise RuntimeError("Split ONNX sessions are not initialized")
         self._ensure_split_name_maps()
-
-        encoding = self.tokenizer.encode(text)
         encoder_feeds = {
             "input_ids": encoding.ids.reshape(1, -1),
             "input_lengths": np.array([encoding.length], dtype=np.int64),
@@ -301,26 +511,7 @@ class G2PModel:
             if token_id == self.vocab.eos_id:
                 break
 
-        decoded_arr = np.asarray(decoded_ids, dtype=np.int64)
-        attn_arr = np.asarray(attn_indices, dtype=np.int64)
-        phonemes, alignments = self._decode(decoded_arr, attn_arr, encoding.position_map)
-        adjusted_alignments = [
-            G2PAlignment(
-                phoneme=alignment.phoneme,
-                phoneme_index=alignment.phoneme_index,
-                char_index=(
-                    alignment.char_index
-                    if alignment.char_index < 0
-                    else alignment.char_index + base_char_index
-                ),
-            )
-            for alignment in alignments
-        ]
-        return G2PResult(
-            ipa="".join(phonemes),
-            display_ipa="".join(phonemes),
-            alignments=adjusted_alignments,
-        )
+        return np.asarray(decoded_ids, dtype=np.int64), np.asarray(attn_indices, dtype=np.int64)
 
     def _ensure_split_name_maps(self) -> None:
         if self.encoder_session is None or self.decoder_step_session is None:  # pragma: no cover
@@ -422,6 +613,103 @@ class _PreparedText:
     char_index_map: List[int]
 
 
+def _is_literal_only(prepared: _PreparedText, preserve_literals: Literal["none", "punct"]) -> bool:
+    return preserve_literals == "punct" and not any(not ch.isspace() for ch in prepared.model_text)
+
+
+def _literal_only_result(text: str) -> G2PResult:
+    return G2PResult(
+        ipa="",
+        display_ipa="".join(ch for ch in text if _is_punctuation(ch)),
+        alignments=[],
+    )
+
+
+def _finish_prediction(
+    raw_result: G2PResult,
+    prepared: _PreparedText,
+    text: str,
+    base_char_index: int,
+    preserve_literals: Literal["none", "punct"],
+) -> G2PResult:
+    """Map a raw model-text prediction back onto the original segment `text`."""
+    relative_alignments = [
+        G2PAlignment(
+            phoneme=alignment.phoneme,
+            phoneme_index=alignment.phoneme_index,
+            char_index=(
+                prepared.char_index_map[alignment.char_index]
+                if 0 <= alignment.char_index < len(prepared.char_index_map)
+                else -1
+            ),
+        )
+        for alignment in raw_result.alignments
+    ]
+    adjusted_alignments = [
+        G2PAlignment(
+            phoneme=alignment.phoneme,
+            phoneme_index=alignment.phoneme_index,
+            char_index=(
+                alignment.char_index
+                if alignment.char_index < 0
+                else alignment.char_index + base_char_index
+            ),
+        )
+        for alignment in relative_alignments
+    ]
+    display_ipa = (
+        _build_display_ipa(raw_result.ipa, relative_alignments, text)
+        if preserve_literals == "punct"
+        else raw_result.ipa
+    )
+    return G2PResult(ipa=raw_result.ipa, display_ipa=display_ipa, alignments=adjusted_alignments)
+
+
+def _rebase_result(result: G2PResult, base_char_index: int) -> G2PResult:
+    """Copy of a segment result with alignments shifted by `base_char_index`."""
+    return G2PResult(
+        ipa=result.ipa,
+        display_ipa=result.display_ipa,
+        alignments=[
+            G2PAlignment(
+                phoneme=alignment.phoneme,
+                phoneme_index=alignment.phoneme_index,
+                char_index=(
+                    alignment.char_index
+                    if alignment.char_index < 0
+                    else alignment.char_index + base_char_index
+                ),
+            )
+            for alignment in result.alignments
+        ],
+    )
+
+
+def _join_segment_results(segment_results: Sequence[G2PResult], output_delimiter: str) -> G2PResult:
+    ipa_parts: List[str] = []
+    display_parts: List[str] = []
+    alignments: List[G2PAlignment] = []
+    for idx, segment_result in enumerate(segment_results):
+        if idx > 0:
+            ipa_parts.append(output_delimiter)
+            display_parts.append(output_delimiter)
+        ipa_parts.append(segment_result.ipa)
+        display_parts.append(segment_result.display_ipa)
+        for alignment in segment_result.alignments:
+            alignments.append(
+                G2PAlignment(
+                    phoneme=alignment.phoneme,
+                    phoneme_index=len(alignments),
+                    char_index=alignment.char_index,
+                )
+            )
+    return G2PResult(
+        ipa="".join(ipa_parts),
+        display_ipa="".join(display_parts),
+        alignments=alignments,
+    )
+
+
 def _is_punctuation(ch: str) -> bool:
     return unicodedata.category(ch).startswith("P")
 
@@ -0,0 +1,128 @@
+"""Process-wide registry of shared models.
+
+`get(kind, path=...)` returns one model instance per distinct set of weights
+and options, so every caller in the process (including hama's own
+pronunciation helpers) shares a single copy of the vocab, weights and native
+sessions. Each `get` takes a reference; `release(model)` drops one and, once
+the last is gone, forgets the model so its native memory is freed when the
+caller's own references go away.
+
+    from hama import models
+
+    g2p = models.get("g2p")
+    try:
+        g2p.predict("안녕하세요")
+    finally:
+        models.release(g2p)
+
+Weights are keyed by file path, or by a hash of their bytes when the packaged
+assets are not plain files. Extra keyword options are passed to the model
+constructor on first use and are part of the key, so they must be hashable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, Any, Hashable, Literal, overload
+
+if TYPE_CHECKING:
+    from .asr import ASRModel
+    from .inference import G2PModel
+    from .p2g import P2GModel
+
+ModelKind = Literal["g2p", "asr", "p2g"]
+
+_LOCK = threading.Lock()
+# key -> [model, reference count]
+_ENTRIES: dict[Hashable, list[Any]] = {}
+
+
+@overload
+def get(kind: Literal["g2p"], path: str | os.PathLike[str] | None = None, **options: Any) -> G2PModel: ...
+@overload
+def get(kind: Literal["asr"], path: str | os.PathLike[str] | None = None, **options: Any) -> ASRModel: ...
+@overload
+def get(kind: Literal["p2g"], path: str | os.PathLike[str] | None = None, **options: Any) -> P2GModel: ...
+
+
+def get(kind: ModelKind, path: str | os.PathLike[str] | None = None, **options: Any) -> Any:
+    """Return the shared model for `kind` ("g2p", "asr" or "p2g"), creating it
+    on first use, and take a reference to it.
+
+    `path` is the model's `model_path` (packaged weights when None). A shared
+    G2P model gets an in-memory `G2PCache` unless `cache` is given.
+    """
+    key = (kind, _weights_key(kind, path, options), _options_key(options))
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            entry = _ENTRIES[key] = [_create(kind, path, options), 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def release(model: Any) -> None:
+    """Drop one reference taken by `get`; the last one removes the model from
+    the registry."""
+    with _LOCK:
+        for key, entry in _ENTRIES.items():
+            if entry[0] is model:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del _ENTRIES[key]
+                return
+    raise ValueError("model is not held by the registry")
+
+
+def refcount(model: Any) -> int:
+    """Number of outstanding `get` references to `model` (0 if not registered)."""
+    with _LOCK:
+        return next((entry[1] for entry in _ENTRIES.values() if entry[0] is model), 0)
+
+
+def _create(kind: ModelKind, path: str | os.PathLike[str] | None, options: dict[str, Any]) -> Any:
+    if kind == "g2p":
+        from .cache import G2PCache
+        from .inference import G2PModel
+
+        if "cache" not in options:
+            options = {**options, "cache": G2PCache()}
+        return G2PModel(model_path=path, **options)
+    if kind == "asr":
+        from .asr import ASRModel
+
+        return ASRModel(model_path=path, **options)
+    from .p2g import P2GModel
+
+    return P2GModel(model_path=path, **options)
+
+
+def _weights_key(kind: ModelKind, path: str | os.PathLike[str] | None, options: dict[str, Any]) -> tuple[str, ...]:
+    if kind == "g2p":
+        from .inference import _resolve_g2p_sources
+
+        sources = _resolve_g2p_sources(path, options.get("encoder_model_path"), options.get("decoder_step_model_path"))
+    elif kind == "asr":
+        from .asr import _resolve_asr_hama
+
+        sources = (_resolve_asr_hama(path),)
+    elif kind == "p2g":
+        from .p2g import _resolve_p2g_hama
+
+        sources = (_resolve_p2g_hama(path),)
+    else:
+        raise ValueError(f"unknown model kind {kind!r}; expected 'g2p', 'asr' or 'p2g'")
+    return tuple(
+        hashlib.sha256(source).hexdigest() if isinstance(source, bytes) else str(source.resolve())
+        for source in sources
+    )
+
+
+def _options_key(options: dict[str, Any]) -> tuple[tuple[str, Hashable], ...]:
+    return tuple(
+        (name, str(Path(value).resolve()) if name.endswith("_path") and value is not None else value)
+        for name, value in sorted(options.items())
+    )
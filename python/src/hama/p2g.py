@@ -15,7 +15,10 @@ from dataclasses import dataclass
 from importlib import resources
 import json
 from pathlib import Path
-from typing import List, Sequence
+import threading
+from typing import Iterable, List, Sequence
+
+import numpy as np
 
 from . import _engine
 
@@ -110,6 +113,20 @@ class P2GResult:
     alignments: List[P2GAlignment]
 
 
+def korean_output_tokens(tokens: Sequence[str]) -> List[str]:
+    """The tokens of vocabulary `tokens` that Korean text renders from: Hangul
+    jamo, digits, punctuation and the space. Use as (or extend into) a
+    `P2GModel` shortlist."""
+    keep: List[str] = []
+    for token in tokens:
+        if len(token) != 1:
+            continue
+        category = unicodedata.category(token)
+        if 0x1100 <= ord(token) < 0x1200 or category == "Nd" or category == "Zs" or category.startswith("P"):
+            keep.append(token)
+    return keep
+
+
 def _load_vocab(vocab_path: Path | None) -> List[str]:
     if vocab_path is not None:
         data = json.loads(Path(vocab_path).read_text(encoding="utf-8"))
@@ -118,17 +135,85 @@ def _load_vocab(vocab_path: Path | None) -> List[str]:
     return [str(t) for t in data["tokens"]]
 
 
-def _read_p2g_hama(path_like) -> bytes:
+def _resolve_p2g_hama(path_like) -> Path | bytes:
     if path_like is not None:
         p = Path(str(path_like))
         if p.suffix != ".hama":
             p = p.with_suffix(".hama")
-        return p.read_bytes()
-    return resources.files("hama.assets").joinpath("p2g.hama").read_bytes()
+        if not p.is_file():
+            raise FileNotFoundError(p)
+        return p
+    asset = resources.files("hama.assets").joinpath("p2g.hama")
+    # A real file is memory-mapped by the engine; otherwise (zipped install) read it.
+    return asset if isinstance(asset, Path) and asset.is_file() else asset.read_bytes()
+
+
+def _chunk_spans(source: Sequence[str], chunk_size: int) -> List[tuple[int, int]]:
+    """[start, end) spans of normalized `source` holding whole words, at most
+    `chunk_size` tokens each; a word longer than that is cut into pieces."""
+    pieces: List[tuple[int, int]] = []
+    start = 0
+    for idx, token in enumerate([*source, "|"]):
+        if token != "|":
+            continue
+        for cut in range(start, idx, chunk_size):
+            pieces.append((cut, min(cut + chunk_size, idx)))
+        start = idx + 1
+    spans: List[tuple[int, int]] = []
+    for start, end in pieces:
+        if spans and end - spans[-1][0] <= chunk_size:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def _after_last_separator(tokens: Sequence[str]) -> int:
+    """Index just past the last "|" in `tokens` (0 if none), scanning back."""
+    for idx in range(len(tokens) - 1, -1, -1):
+        if tokens[idx] == "|":
+            return idx + 1
+    return 0
+
+
+def _shift_alignment(a: P2GAlignment, offset: int) -> P2GAlignment:
+    index = a.phoneme_index + offset if a.phoneme_index >= 0 else -1
+    return P2GAlignment(token=a.token, phoneme_index=index, phoneme=a.phoneme)
+
+
+def _join_results(first: P2GResult, second: P2GResult, bar: int | None) -> P2GResult:
+    """`first` then `second`, with a space aligned to the "|" at `bar` between
+    them (none when `bar` is None, i.e. a word was cut)."""
+    if not first.tokens or not second.tokens:
+        return second if not first.tokens else first
+    tokens = list(first.tokens)
+    alignments = list(first.alignments)
+    if bar is not None:
+        tokens.append(" ")
+        alignments.append(P2GAlignment(token=" ", phoneme_index=bar, phoneme="|"))
+    tokens.extend(second.tokens)
+    alignments.extend(second.alignments)
+    sep = " " if bar is not None else ""
+    return P2GResult(text=normalize_p2g_text(first.text + sep + second.text), tokens=tokens, alignments=alignments)
 
 
 class P2GModel:
-    def __init__(self, model_path: Path | None = None, vocab_path: Path | None = None):
+    """Phoneme-to-grapheme model.
+
+    `shortlist` restricts the output vocabulary for restricted-domain use:
+    `"korean"` for `korean_output_tokens`, or any iterable of output tokens
+    and/or token ids. Each decode step then scores only those tokens (plus
+    eos) instead of all 21367. The default, None, decodes over the full
+    vocabulary.
+    """
+
+    def __init__(
+        self,
+        model_path: Path | None = None,
+        vocab_path: Path | None = None,
+        *,
+        shortlist: str | Iterable[str | int] | None = None,
+    ):
         self.tokens = _load_vocab(vocab_path)
         self.token2id = {t: i for i, t in enumerate(self.tokens)}
         self.pad_id = self.token2id["<pad>"]
@@ -137,19 +222,137 @@ class P2GModel:
         self.eos_id = self.token2id["<eos>"]
         self.src_id = self.token2id["<src>"]
         self.tgt_id = self.token2id["<tgt>"]
-        self.session = _engine.P2gSession(_read_p2g_hama(model_path))
+        self.shortlist = None if shortlist is None else self._shortlist_ids(shortlist)
+        # The native session is created on first use (see `load`).
+        self._weight_source = _resolve_p2g_hama(model_path)
+        self._session: _engine.P2gSession | None = None
+        self._session_lock = threading.Lock()
+
+    def load(self) -> P2GModel:
+        """Create the native session now rather than on the first prediction."""
+        _ = self.session
+        return self
+
+    @property
+    def session(self) -> _engine.P2gSession:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = _engine.P2gSession(self._weight_source)
+        return self._session
 
     def __call__(self, phonemes: str | Sequence[str]) -> P2GResult:
         return self.predict(phonemes)
 
+    def _shortlist_ids(self, shortlist: str | Iterable[str | int]) -> np.ndarray:
+        if isinstance(shortlist, str):
+            if shortlist != "korean":
+                raise ValueError('shortlist must be "korean" or an iterable of tokens/ids')
+            shortlist = korean_output_tokens(self.tokens)
+        ids = {self.eos_id, self.pad_id}
+        for item in shortlist:
+            if isinstance(item, str):
+                if item not in self.token2id:
+                    raise ValueError(f"shortlist token not in the P2G vocabulary: {item!r}")
+                ids.add(self.token2id[item])
+            else:
+                if not 0 <= int(item) < len(self.tokens):
+                    raise ValueError(f"shortlist id out of range: {item}")
+                ids.add(int(item))
+        return np.array(sorted(ids), dtype=np.int64)
+
     def predict(self, phonemes: str | Sequence[str]) -> P2GResult:
+        source, prefix, max_new = self._prepare(phonemes)
+        if self.shortlist is not None:
+            [(gen_ids, align_idx)] = self.session.greedy_batch(
+                [prefix], [max_new], self.eos_id, self.pad_id, shortlist=self.shortlist
+            )
+        else:
+            gen_ids, align_idx = self.session.greedy_align(prefix, max_new, self.eos_id, self.pad_id)
+        return self._result(source, gen_ids, align_idx)
+
+    def predict_batch(self, phoneme_sequences: Sequence[str | Sequence[str]], batch_size: int = 32) -> List[P2GResult]:
+        """Predict many phoneme sequences; returns one `P2GResult` per input, in order.
+
+        Inputs are sorted by length and decoded `batch_size` per native call:
+        the prefill runs over every prefix at once, and each decode step runs
+        the projections and the vocabulary projection as one matmul over the
+        sequences still decoding, which drop out at eos. Each result equals
+        `predict(phonemes)`.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        prepared = [self._prepare(phonemes) for phonemes in phoneme_sequences]
+        if not prepared:
+            return []
+        session = self.session
+        if self.shortlist is None and not _engine.has("hama_p2g_greedy_batch"):
+            return [
+                self._result(source, *session.greedy_align(prefix, max_new, self.eos_id, self.pad_id))
+                for source, prefix, max_new in prepared
+            ]
+
+        order = sorted(range(len(prepared)), key=lambda idx: len(prepared[idx][1]))
+        results: List[P2GResult | None] = [None] * len(prepared)
+        for start in range(0, len(order), batch_size):
+            chunk = order[start : start + batch_size]
+            decoded = session.greedy_batch(
+                [prepared[idx][1] for idx in chunk],
+                [prepared[idx][2] for idx in chunk],
+                self.eos_id,
+                self.pad_id,
+                shortlist=self.shortlist,
+            )
+            for idx, (gen_ids, align_idx) in zip(chunk, decoded):
+                results[idx] = self._result(prepared[idx][0], gen_ids, align_idx)
+        return results  # type: ignore[return-value]
+
+    def predict_long(self, phonemes: str | Sequence[str], chunk_size: int = 64, batch_size: int = 32) -> P2GResult:
+        """Predict a phoneme sequence of any length.
+
+        `predict` keeps only the first `MAX_INPUT_LEN` phonemes. Here the
+        normalized phonemes are split at `|` into chunks of at most
+        `chunk_size` (a longer word is cut), which are decoded with
+        `predict_batch` and joined with a space. Alignment `phoneme_index`es
+        point into the whole normalized sequence. Cost grows linearly with the
+        input; each chunk only sees its own words, so the text can differ from
+        `predict` on inputs that fit in one call.
+        """
+        if not 1 <= chunk_size <= MAX_INPUT_LEN:
+            raise ValueError(f"chunk_size must be in [1, {MAX_INPUT_LEN}]")
+        source = normalize_phoneme_tokens(phonemes)
+        spans = _chunk_spans(source, chunk_size)
+        if len(spans) < 2:
+            return self.predict(source)
+        results = self.predict_batch([source[start:end] for start, end in spans], batch_size=batch_size)
+        tokens: List[str] = []
+        alignments: List[P2GAlignment] = []
+        prev_end = 0
+        for (start, end), result in zip(spans, results):
+            if tokens and start > prev_end:  # the chunks are split at the "|" at prev_end
+                tokens.append(" ")
+                alignments.append(P2GAlignment(token=" ", phoneme_index=prev_end, phoneme="|"))
+            tokens.extend(result.tokens)
+            alignments.extend(_shift_alignment(a, start) for a in result.alignments)
+            prev_end = end
+        return P2GResult(text=normalize_p2g_text(render_text(tokens)), tokens=tokens, alignments=alignments)
+
+    def stream(self) -> P2GStream:
+        """Start an incremental conversion of one phoneme sequence; see `P2GStream`."""
+        if not _engine.has("hama_p2g_greedy_from"):
+            raise RuntimeError("libhama does not export hama_p2g_greedy_from")
+        return P2GStream(self)
+
+    def _prepare(self, phonemes: str | Sequence[str]) -> tuple[List[str], List[int], int]:
+        """(source phonemes, prefix ids `[bos, src, phones..., tgt]`, max new tokens)."""
         source = normalize_phoneme_tokens(phonemes)[:MAX_INPUT_LEN] or ["<unk>"]
         prefix = [self.bos_id, self.src_id, *(self.token2id.get(t, self.unk_id) for t in source), self.tgt_id]
         if len(prefix) >= MAX_SEQUENCE_LEN:
             prefix = prefix[: MAX_SEQUENCE_LEN - 1] + [self.tgt_id]
         max_new = min(MAX_OUTPUT_LEN + 1, MAX_SEQUENCE_LEN - len(prefix))
+        return source, prefix, max_new
 
-        gen_ids, align_idx = self.session.greedy_align(prefix, max_new, self.eos_id, self.pad_id)
+    def _result(self, source: List[str], gen_ids: List[int], align_idx: List[int]) -> P2GResult:
         gen_tokens: List[str] = []
         alignments: List[P2GAlignment] = []
         for token_id, ai in zip(gen_ids, align_idx):
@@ -164,3 +367,152 @@ class P2GModel:
             tokens=gen_tokens,
             alignments=alignments,
         )
+
+
+class P2GStream:
+    """Incremental P2G over phonemes fed a few at a time, e.g. from `ASRStream`.
+
+    Create with `P2GModel.stream()`. Every `push` returns the result for all
+    phonemes so far. Completed words (everything up to the last `|`) are
+    prefilled once into a K/V cache kept by the stream; each push only runs
+    the newly completed words and the unfinished tail through the model. The
+    output of words that were already complete at the previous push is kept
+    and fed back instead of being decoded again, so decoding resumes at the
+    first word that may change.
+
+    The model reads at most `MAX_INPUT_LEN` phonemes at a time. When the
+    current chunk is full, the stream rolls over at its last `|`, as
+    `predict_long` chunks: the output of the words before it is frozen, and a
+    new cache starts with the words after it. Alignment `phoneme_index`es
+    always point into everything pushed (after normalization). Per-push cost
+    depends on the new phonemes and the current chunk only.
+
+    This is an approximation of `predict`: there, every phoneme attends to the
+    whole input, while a cached word only sees itself and the words before it,
+    and nothing sees across a rollover. Results can therefore differ from
+    `predict` on the same phonemes. A stream is meant for one feeding thread;
+    separate streams may share a model.
+    """
+
+    def __init__(self, model: P2GModel):
+        self._model = model
+        self._session = model.session
+        self._cache = self._session.new_cache()
+        # The current chunk: normalized phonemes (a trailing "|" is kept until
+        # the next word starts) and their ids.
+        self._source: List[str] = []
+        self._ids: List[int] = []
+        self._offset = 0  # index of _source[0] among all normalized phonemes
+        self._pending = False  # phonemes appended since the last decode
+        self._cached = 0  # prefix positions in the cache: [bos, src, complete words...] or none
+        self._frozen_words = 0  # complete words at the previous decode
+        self._gen_ids: List[int] = []
+        self._chunk = P2GResult(text="", tokens=[], alignments=[])  # current chunk, global indices
+        # Output of the chunks rolled over so far, and the "|" index joining
+        # them to the current chunk (None after a cut inside a word).
+        self._done = P2GResult(text="", tokens=[], alignments=[])
+        self._join: int | None = None
+        self._result = P2GResult(text="", tokens=[], alignments=[])
+
+    @property
+    def result(self) -> P2GResult:
+        """The result as of the last `push`."""
+        return self._result
+
+    def push(self, phonemes: str | Sequence[str]) -> P2GResult:
+        """Append phoneme tokens; returns the result for everything pushed so far."""
+        model = self._model
+        for raw in phonemes.split() if isinstance(phonemes, str) else phonemes:
+            token = str(raw).strip()
+            # The same rules as `normalize_phoneme_tokens`, one token at a time.
+            if not token or (token == "|" and (not self._source or self._source[-1] == "|")):
+                continue
+            if token != "|" and len(self._source) >= MAX_INPUT_LEN:
+                if self._pending:
+                    self._decode()
+                self._roll_over()
+            self._source.append(token)
+            self._ids.append(model.token2id.get(token, model.unk_id))
+            self._pending = True
+        if self._pending:
+            self._decode()
+        return self._result
+
+    def _decode(self) -> None:
+        model = self._model
+        self._pending = False
+        n = len(self._source) - (1 if self._source and self._source[-1] == "|" else 0)
+        source, ids = self._source[:n], self._ids[:n]
+        if not source:
+            if self._done.tokens:
+                self._chunk = P2GResult(text="", tokens=[], alignments=[])
+                self._result = self._done
+                return
+            source, ids = ["<unk>"], [model.unk_id]
+        stable = _after_last_separator(source)
+        if stable > max(self._cached - 2, 0):
+            new = ids[self._cached - 2 : stable] if self._cached else [model.bos_id, model.src_id, *ids[:stable]]
+            self._cached = self._session.extend(self._cache, self._cached, new)
+        # Until a word is complete nothing is cached and the decode is a plain `predict`.
+        head = [model.bos_id, model.src_id] if not self._cached else []
+        tail = [*head, *ids[stable:], model.tgt_id]
+        max_new = min(MAX_OUTPUT_LEN + 1, MAX_SEQUENCE_LEN - (len(source) + 3))
+        self._gen_ids, align_idx = self._session.greedy_from(
+            self._cache,
+            self._cached,
+            tail,
+            self._frozen_prefix(),
+            max_new,
+            model.eos_id,
+            model.pad_id,
+            shortlist=model.shortlist,
+        )
+        self._frozen_words = source[:stable].count("|")
+        local = model._result(source, self._gen_ids, align_idx)
+        self._chunk = P2GResult(
+            text=local.text,
+            tokens=local.tokens,
+            alignments=[_shift_alignment(a, self._offset) for a in local.alignments],
+        )
+        self._result = _join_results(self._done, self._chunk, self._join)
+
+    def _roll_over(self) -> None:
+        """Freeze the output of the chunk's complete words and start a new
+        chunk (and cache) after its last "|"; with no "|", cut the chunk."""
+        bar = _after_last_separator(self._source) - 1
+        tokens, alignments = self._chunk.tokens, self._chunk.alignments
+        if 0 <= bar < len(self._source) - 1:
+            # Keep the output before the space that ends the last complete word.
+            words = self._source[:bar].count("|") + 1
+            spaces = [i for i, t in enumerate(tokens) if t == " "]
+            if len(spaces) >= words:
+                end = spaces[words - 1]
+            else:  # fewer words in the output: cut before the first token of a later word
+                end = next(
+                    (i for i, a in enumerate(alignments) if a.phoneme_index > self._offset + bar), len(tokens)
+                )
+            tokens, alignments = tokens[:end], alignments[:end]
+        frozen = P2GResult(text=normalize_p2g_text(render_text(tokens)), tokens=tokens, alignments=alignments)
+        self._done = _join_results(self._done, frozen, self._join)
+        self._join = self._offset + bar if bar >= 0 else None
+        start = bar + 1 if bar >= 0 else len(self._source)
+        self._source, self._ids = self._source[start:], self._ids[start:]
+        self._offset += start
+        self._cached = 0
+        self._frozen_words = 0
+        self._gen_ids = []
+        self._chunk = P2GResult(text="", tokens=[], alignments=[])
+
+    def _frozen_prefix(self) -> List[int]:
+        """The last output up to the space after its `_frozen_words`-th word."""
+        space = self._model.token2id.get(" ")
+        end = 0
+        if space is not None and self._frozen_words:
+            seen = 0
+            for i, token_id in enumerate(self._gen_ids):
+                if token_id == space:
+                    seen += 1
+                    end = i + 1
+                    if seen == self._frozen_words:
+                        break
+        return self._gen_ids[:end]
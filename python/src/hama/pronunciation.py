@@ -7,6 +7,7 @@ import math
 import re
 import unicodedata
 
+from . import models
 from .inference import G2PModel
 from .jamo import split_text_to_jamo
 
@@ -456,7 +457,10 @@ def _empty_scan_stats(token_count: int) -> PronunciationScanStats:
 def _get_default_g2p_model() -> G2PModel:
     global _DEFAULT_G2P_MODEL
     if _DEFAULT_G2P_MODEL is None:
-        _DEFAULT_G2P_MODEL = G2PModel()
+        # Share the registry's G2P model (and its segment cache) with any
+        # application code that uses the default weights; held for the life of
+        # the process.
+        _DEFAULT_G2P_MODEL = models.get("g2p")
     return _DEFAULT_G2P_MODEL
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence
 
 import numpy as np
 
@@ -16,10 +16,36 @@ class EncodedText:
     position_map: List[int]
 
 
+DEFAULT_LENGTH_BUCKETS = (16, 32, 64, 128)
+
+
 class TextTokenizer:
-    def __init__(self, vocab: Vocabulary, max_input_len: int):
+    """Jamo tokenizer for the G2P encoder.
+
+    `encode` pads ids to the smallest of `length_buckets` that fits the input
+    (capped at `max_input_len`) rather than always to `max_input_len`, so short
+    words don't pay for 128 encoder/attention positions. Padding is masked in
+    the model, so the bucket never changes the prediction. `length_buckets=None`
+    pads to `max_input_len` as before.
+    """
+
+    def __init__(
+        self,
+        vocab: Vocabulary,
+        max_input_len: int,
+        length_buckets: Sequence[int] | None = DEFAULT_LENGTH_BUCKETS,
+    ):
         self.vocab = vocab
         self.max_input_len = max_input_len
+        buckets = sorted(b for b in (length_buckets or ()) if 0 < b < max_input_len)
+        self.length_buckets = tuple(buckets) + (max_input_len,)
+
+    def padded_length(self, length: int) -> int:
+        """Smallest bucket size that holds `length` tokens."""
+        for bucket in self.length_buckets:
+            if length <= bucket:
+                return bucket
+        return self.max_input_len
 
     def encode(self, text: str) -> EncodedText:
         jamo_sequence: JamoSequence = split_text_to_jamo(text)
@@ -34,7 +60,7 @@ class TextTokenizer:
         ]
         length = min(len(ids), self.max_input_len)
         trimmed_ids = ids[: self.max_input_len]
-        padded = np.full((self.max_input_len,), self.vocab.encoder_token_to_id["<pad>"], dtype=np.int64)
+        padded = np.full((self.padded_length(length),), self.vocab.encoder_token_to_id["<pad>"], dtype=np.int64)
         padded[: len(trimmed_ids)] = trimmed_ids
         position_map = jamo_sequence.original_indices[:length] or [-1]
         return EncodedText(ids=padded, length=length, position_map=position_map)
@@ -4,8 +4,10 @@ from pathlib import Path
 import wave
 
 import numpy as np
+import pytest
 
-from hama import ASRDecodeConfig, ASRModel, decode_ctc_tokens
+from hama import ASRDecodeConfig, ASRModel, ASRResult, ctc_phoneme_spans, decode_ctc_tokens, read_wav_blocks, read_wav_mono
+import hama.asr as asr_module
 
 
 def test_decode_ctc_tokens_collapses_repeats_and_removes_blank():
@@ -62,6 +64,83 @@ def test_asr_transcribe_file_runs(tmp_path: Path):
     assert result.num_frames > 0
 
 
+def _write_wav(path: Path, frames: np.ndarray, sample_width: int, sr: int = 16000) -> None:
+    """Write [N, channels] int frames as little-endian PCM of `sample_width` bytes."""
+    raw = frames.astype("<i4").view(np.uint8).reshape(frames.shape + (4,))[..., :sample_width]
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(frames.shape[1])
+        wf.setsampwidth(sample_width)
+        wf.setframerate(sr)
+        wf.writeframes(raw.tobytes())
+
+
+@pytest.mark.parametrize("sample_width,channels", [(2, 2), (3, 1), (1, 3)])
+def test_read_wav_blocks_concatenate_to_read_wav_mono(tmp_path: Path, sample_width: int, channels: int):
+    rng = np.random.default_rng(sample_width)
+    bits = 8 * sample_width
+    lo, hi = (0, 256) if sample_width == 1 else (-(1 << (bits - 1)), 1 << (bits - 1))
+    frames = rng.integers(lo, hi, size=(10_007, channels))
+    wav_path = tmp_path / "noise.wav"
+    _write_wav(wav_path, frames, sample_width)
+
+    blocks, sr = read_wav_blocks(wav_path, block_frames=4096)
+    blocks = list(blocks)
+    mono, mono_sr = read_wav_mono(wav_path)
+
+    assert sr == mono_sr == 16000
+    assert [len(b) for b in blocks] == [4096, 4096, 1815]
+    assert all(b.dtype == np.float32 for b in blocks)
+    np.testing.assert_array_equal(np.concatenate(blocks), mono)
+
+
+def test_to_float32_mono_scales_integer_channels_like_the_wav_reader(tmp_path: Path):
+    frames = np.random.default_rng(0).integers(-32768, 32768, size=(3000, 2)).astype(np.int16)
+    wav_path = tmp_path / "stereo.wav"
+    _write_wav(wav_path, frames, 2)
+    np.testing.assert_array_equal(asr_module._to_float32_mono(frames), read_wav_mono(wav_path)[0])
+
+
+def test_asr_int16_pcm_matches_float_input(tmp_path: Path):
+    model = ASRModel()
+    sr = model.model_sample_rate
+    t = np.arange(sr, dtype=np.float32) / sr
+    left = 0.3 * np.sin(2.0 * np.pi * 220.0 * t)
+    right = 0.2 * np.sin(2.0 * np.pi * 330.0 * t)
+    frames = np.round(np.stack([left, right], axis=1) * 32767.0).astype(np.int16)
+    wav_path = tmp_path / "stereo.wav"
+    _write_wav(wav_path, frames, 2, sr)
+
+    expected = model.transcribe_waveform(read_wav_mono(wav_path)[0], sample_rate=sr)
+    assert model.transcribe_waveform(frames, sample_rate=sr) == expected
+    assert model.transcribe_waveform(frames[:, 0], sample_rate=sr) == model.transcribe_waveform(
+        frames[:, 0].astype(np.float32) / 32768.0, sample_rate=sr
+    )
+    assert model.transcribe_file(wav_path) == expected
+
+
+def test_asr_int16_pcm_past_the_frame_cap_keeps_scratch_bounded(tmp_path: Path):
+    from hama import _engine
+
+    if not _engine.has("hama_asr_scratch_peak"):
+        pytest.skip("libhama predates scratch reporting")
+    sr = 16000
+    rng = np.random.default_rng(0)
+    long = rng.integers(-3000, 3000, size=(300 * sr, 1)).astype(np.int16)
+    _write_wav(tmp_path / "short.wav", long[: 31 * sr], 2, sr)
+    _write_wav(tmp_path / "long.wav", long, 2, sr)
+
+    # Only the samples behind the first 30 s of STFT frames are converted, so a
+    # longer clip needs no more scratch than a 31 s one and decodes the same.
+    results, peaks = [], []
+    for name in ("short", "long"):
+        model = ASRModel()
+        results.append(model.transcribe_file(tmp_path / f"{name}.wav"))
+        peaks.append(model.session.scratch_peak_bytes)
+    assert results[1] == results[0]
+    assert peaks[1] == peaks[0]
+    assert model.transcribe_waveform(long[:, 0].astype(np.float32) / 32768.0, sample_rate=sr) == results[0]
+
+
 def test_asr_unk_bias_can_suppress_unk_predictions():
     model = ASRModel(decode=ASRDecodeConfig(unk_bias=-10.0))
     unk_id = model.decoder_tokens.index("<unk>")
@@ -93,3 +172,187 @@ def test_asr_temperature_is_applied_before_argmax():
     result = model._decode_single(logits, out_length=4)
 
     assert result.phonemes
+
+
+def test_asr_transcribe_many_matches_transcribe_in_order():
+    model = ASRModel()
+    sr = 16000
+    t = np.arange(sr // 2, dtype=np.float32) / sr
+    waveforms = [(0.1 * np.sin(2.0 * np.pi * f * t)).astype(np.float32) for f in (220.0, 440.0, 880.0, 1760.0)]
+    expected = [model.transcribe_waveform(w, sample_rate=sr) for w in waveforms]
+    assert model.transcribe_many(waveforms, sample_rate=sr, workers=4) == expected
+
+
+def test_asr_transcribe_long_matches_transcribe_waveform_for_short_audio():
+    model = ASRModel()
+    sr = 16000
+    t = np.arange(3 * sr, dtype=np.float32) / sr
+    waveform = (0.1 * np.sin(2.0 * np.pi * 330.0 * t)).astype(np.float32)
+    assert model.transcribe_long(waveform, sample_rate=sr) == model.transcribe_waveform(waveform, sample_rate=sr)
+
+
+def test_asr_transcribe_long_covers_the_whole_recording():
+    model = ASRModel()
+    sr = 16000
+    n = 45 * sr + 123
+    t = np.arange(n, dtype=np.float32) / sr
+    waveform = (0.1 * np.sin(2.0 * np.pi * 220.0 * t * (1.0 + t / 45.0))).astype(np.float32)
+    result = model.transcribe_long(waveform, sample_rate=sr)
+
+    assert result.num_frames == len(result.frame_token_ids) == (n // 160 + 2) // 2
+    blocks = (waveform[i : i + 7000] for i in range(0, n, 7000))
+    assert model.transcribe_long(blocks, sample_rate=sr) == result
+    assert model.transcribe_long(waveform, sample_rate=sr, workers=2) == result
+
+
+def test_asr_transcribe_long_stitches_windows_on_the_global_frame_timeline(monkeypatch):
+    model = ASRModel()
+    # Each window "predicts" the global index of every frame it sees, so the
+    # stitched sequence is exactly 0..T-1 if no frame is dropped or repeated.
+    monkeypatch.setattr(asr_module, "_to_float32_mono", lambda w: np.asarray(w, dtype=np.float64))
+    monkeypatch.setattr(model, "_run", lambda samples: (samples, -1))
+
+    def frame_ids(samples, _):
+        first = int(samples[0]) // 320
+        return list(range(first, first + (samples.size // 160 + 2) // 2))
+
+    monkeypatch.setattr(model, "_frame_token_ids", frame_ids)
+    n = 16000 * 11 + 500
+    waveform = np.arange(n, dtype=np.float64)
+    collected = []
+    monkeypatch.setattr(model, "_result_from_frames", lambda ids: collected.append(ids))
+    model.transcribe_long(waveform, sample_rate=16000, window_seconds=4.0, overlap_seconds=1.0)
+
+    assert collected == [list(range((n // 160 + 2) // 2))]
+
+
+def test_asr_stream_finalizes_incrementally_and_matches_its_result():
+    model = ASRModel()
+    sr = 16000
+    n = 6 * sr + 77
+    t = np.arange(n, dtype=np.float32) / sr
+    waveform = (0.1 * np.sin(2.0 * np.pi * 220.0 * t * (1.0 + t / 6.0))).astype(np.float32)
+
+    stream = model.stream(sample_rate=sr)
+    streamed = []
+    pushed = 6 * 5120  # six 0.32 s steps
+    for i in range(0, pushed, 1024):
+        streamed += stream.push(waveform[i : i + 1024])
+    # Everything pushed so far has been decoded, final or tentative.
+    assert stream.partial.num_frames == (pushed // 160 + 2) // 2
+    for i in range(pushed, n, 1536):
+        streamed += stream.push(waveform[i : i + 1536])
+    result = stream.finish()
+
+    assert result.num_frames == (n // 160 + 2) // 2
+    assert result.phonemes[: len(streamed)] == streamed
+    with pytest.raises(RuntimeError):
+        stream.push(waveform[:160])
+
+
+def test_asr_stream_with_full_right_context_matches_transcribe_waveform():
+    model = ASRModel()
+    sr = 16000
+    t = np.arange(3 * sr, dtype=np.float32) / sr
+    waveform = (0.1 * np.sin(2.0 * np.pi * 330.0 * t)).astype(np.float32)
+    stream = model.stream(sample_rate=sr, right_context_seconds=5.0)
+    for i in range(0, waveform.size, 4000):
+        assert stream.push(waveform[i : i + 4000]) == []
+    assert stream.finish() == model.transcribe_waveform(waveform, sample_rate=sr)
+
+
+def test_asr_stream_keeps_a_bounded_buffer_on_the_global_frame_timeline(monkeypatch):
+    model = ASRModel()
+    # As in the transcribe_long stitching test, each decode "predicts" the
+    # global index of every frame it sees.
+    monkeypatch.setattr(asr_module, "_to_float32_mono", lambda w: np.asarray(w, dtype=np.float64))
+    monkeypatch.setattr(model, "_run", lambda samples: (samples, -1))
+
+    def frame_ids(samples, _):
+        first = int(samples[0]) // 320
+        return list(range(first, first + (samples.size // 160 + 2) // 2))
+
+    monkeypatch.setattr(model, "_frame_token_ids", frame_ids)
+    monkeypatch.setattr(model, "_result_from_frames", lambda ids: ids)
+    n = 16000 * 20 + 500
+    waveform = np.arange(n, dtype=np.float64)
+    stream = model.stream(sample_rate=16000, step_seconds=0.32, right_context_seconds=0.64, left_context_seconds=1.0)
+    longest = 0
+    for i in range(0, n, 5000):
+        stream.push(waveform[i : i + 5000])
+        longest = max(longest, stream._buf.size)
+
+    assert stream.finish() == list(range((n // 160 + 2) // 2))
+    assert longest <= 16000 * (0.32 + 0.64 + 1.0) + 2 * 320
+    assert stream.window_seconds == pytest.approx(0.32 + 0.64 + 1.0)
+
+
+def test_asr_stream_context_window_is_a_constructor_option():
+    model = ASRModel()
+    default = asr_module.ASRStream(model, 16000)
+    assert default.window_seconds == pytest.approx(4.16)
+    cheaper = asr_module.ASRStream(model, 16000, left_context_seconds=0.96, step_seconds=0.64)
+    assert cheaper.window_seconds / 0.64 < default.window_seconds / 0.32
+    with pytest.raises(ValueError):
+        asr_module.ASRStream(model, 16000, left_context_seconds=40.0)
+
+
+def test_asr_transcribe_batch_matches_transcribe_waveform_in_order():
+    model = ASRModel()
+    rng = np.random.default_rng(18)
+    rates = [16000, 8000, 16000, 16000, 22050, 16000]
+    seconds = [1.3, 0.4, 0.0, 2.1, 0.7, 0.01]
+    waveforms = [(0.1 * rng.standard_normal(int(s * r))).astype(np.float32) for s, r in zip(seconds, rates)]
+    expected = [model.transcribe_waveform(w, sample_rate=r) for w, r in zip(waveforms, rates)]
+
+    assert model.transcribe_batch(waveforms, rates) == expected
+    assert model.transcribe_batch(waveforms, rates, batch_size=2, max_batch_seconds=1.0) == expected
+    same_rate = [w for w, r in zip(waveforms, rates) if r == 16000]
+    assert model.transcribe_batch(same_rate, 16000) == [e for e, r in zip(expected, rates) if r == 16000]
+
+
+def test_asr_transcribe_batch_of_nothing_does_not_load_the_model():
+    model = ASRModel()
+    assert model.transcribe_batch([], 16000) == []
+    assert model._session is None
+
+
+def test_asr_native_greedy_decode_matches_host_decode_of_log_probs():
+    rng = np.random.default_rng(19)
+    waveform = (0.1 * rng.standard_normal(16000 * 2 + 37)).astype(np.float32)
+    for decode in (
+        ASRDecodeConfig(),
+        ASRDecodeConfig(temperature=0.7, blank_bias=0.4, unk_bias=-1.0),
+        ASRDecodeConfig(blank_bias=0.0, collapse_repeats=False),
+    ):
+        model = ASRModel(decode=decode)
+        result = model.transcribe_waveform(waveform, sample_rate=16000)
+        log_probs, out_length = model._run(waveform)
+        assert result == model._decode_single(log_probs, out_length)
+        assert model.phoneme_spans(result) == ctc_phoneme_spans(
+            result.frame_token_ids,
+            model.decoder_tokens,
+            blank_id=model.blank_id,
+            word_boundary_token=decode.word_boundary_token,
+            frame_ms=20.0,
+            collapse_repeats=decode.collapse_repeats,
+        )
+
+
+def test_asr_phoneme_spans_without_token_frames_rescan_the_frames():
+    model = ASRModel()
+    blank = model.blank_id
+    frames = [blank, 0, 0, blank, 1, 1]
+    token_ids, phonemes, _ = decode_ctc_tokens(
+        frames, model.decoder_tokens, blank_id=blank, word_boundary_token="<wb>"
+    )
+    bare = ASRResult(
+        phonemes=phonemes,
+        phoneme_text=" ".join(phonemes),
+        word_phoneme_text=" ".join(phonemes),
+        token_ids=token_ids,
+        frame_token_ids=frames,
+        num_frames=len(frames),
+    )
+    spans = model.phoneme_spans(bare)
+    assert [(s.start_frame, s.end_frame) for s in spans] == [(1, 4), (4, 6)]
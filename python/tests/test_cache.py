@@ -0,0 +1,68 @@
+from hama import G2PCache, G2PDiskCache, G2PModel
+from hama.inference import G2PAlignment, G2PResult
+
+
+def _result(ipa: str) -> G2PResult:
+    return G2PResult(
+        ipa=ipa,
+        display_ipa=ipa,
+        alignments=[G2PAlignment(phoneme=ch, phoneme_index=i, char_index=i) for i, ch in enumerate(ipa)],
+    )
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = G2PCache(max_entries=2, max_bytes=None)
+    cache.put("a", _result("a"))
+    cache.put("b", _result("b"))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", _result("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (3, 1, 1, 2)
+
+
+def test_max_bytes_bounds_the_estimated_size():
+    cache = G2PCache(max_entries=None, max_bytes=4096)
+    for i in range(100):
+        cache.put(f"word{i}", _result("abcdefgh"))
+    stats = cache.stats()
+    assert 0 < stats.nbytes <= 4096
+    assert stats.evictions == 100 - stats.entries
+
+
+def test_cached_predictions_match_uncached_and_rebase_alignments():
+    plain = G2PModel()
+    cached = G2PModel(cache=G2PCache())
+    text = "학교 학교에 학교 hello 학교"
+    for preserve_literals in ("none", "punct"):
+        assert cached.predict(text, preserve_literals=preserve_literals) == plain.predict(
+            text, preserve_literals=preserve_literals
+        )
+    stats = cached.cache.stats()
+    assert stats.hits == 4  # "학교" repeats twice per mode
+    assert stats.entries == 6
+    assert cached.predict_batch([text, "학교"]) == [plain.predict(text), plain.predict("학교")]
+
+
+def test_disk_cache_persists_across_models_and_processes(tmp_path):
+    plain = G2PModel()
+    text = "학교에 갑니다 학교"
+    writer = G2PModel(disk_cache=G2PDiskCache(tmp_path))
+    assert writer.predict(text) == plain.predict(text)
+    assert writer.disk_cache.stats().entries == 3
+
+    # A fresh handle on the same file (as a restarted worker would open) is warm.
+    reader = G2PModel(cache=G2PCache(), disk_cache=G2PDiskCache(tmp_path / G2PDiskCache.FILENAME))
+    assert reader.predict(text) == plain.predict(text)
+    assert reader.predict_batch([text, "학교"]) == [plain.predict(text), plain.predict("학교")]
+    disk_stats = reader.disk_cache.stats()
+    assert (disk_stats.hits, disk_stats.misses) == (3, 0)  # later lookups hit memory
+
+
+def test_disk_cache_entries_are_scoped_to_the_model_key(tmp_path):
+    cache = G2PDiskCache(tmp_path)
+    cache.put_many("weights-a", "none", [("학교", _result("hak"))])
+    assert cache.get("weights-a", "none", "학교") == _result("hak")
+    assert cache.get("weights-b", "none", "학교") is None
+    assert cache.get("weights-a", "punct", "학교") is None
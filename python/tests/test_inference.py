@@ -1,6 +1,13 @@
+import os
 from pathlib import Path
+import subprocess
+import sys
 
-from hama import G2PModel
+import numpy as np
+import pytest
+
+import hama
+from hama import G2PModel, TextTokenizer
 
 
 def test_inference_runs_with_default_assets():
@@ -98,3 +105,127 @@ def test_preserve_literals_does_not_preserve_split_delimiter_as_punctuation():
     )
     assert " | " in result.display_ipa
     assert "," not in result.display_ipa
+
+
+def test_fused_native_greedy_matches_host_driven_loop():
+    model = G2PModel()
+    if model.g2p_session is None:
+        pytest.skip("loaded libhama predates hama_g2p_greedy")
+    for text in ["안녕하세요", "hello", "학교에 갑니다", "가😀나"]:
+        encoding = model.tokenizer.encode(text)
+        fused_ids, fused_attn = model.g2p_session.greedy(
+            encoding.ids, encoding.length, model.vocab.sos_id, model.vocab.eos_id, model.max_output_len
+        )
+        host_ids, host_attn = model._greedy_split_steps(encoding)
+        assert fused_ids.tolist() == host_ids.tolist()
+        assert fused_attn.tolist() == host_attn.tolist()
+
+
+@pytest.mark.parametrize("preserve_literals", ["none", "punct"])
+def test_predict_batch_matches_predict(preserve_literals):
+    model = G2PModel()
+    texts = ["안녕하세요", "", "   ", "hello world", "학교에 갑니다!", "?!", "가😀나 | 다"]
+    expected = [model.predict(text, preserve_literals=preserve_literals) for text in texts]
+    assert model.predict_batch(texts, preserve_literals=preserve_literals, batch_size=3) == expected
+    assert model.predict_batch([]) == []
+
+
+def test_length_buckets_pad_to_smallest_fitting_bucket():
+    model = G2PModel()
+    assert model.tokenizer.encode("가").ids.shape == (16,)
+    assert model.tokenizer.encode("가" * 10).ids.shape == (32,)
+    assert model.tokenizer.encode("가" * 100).ids.shape == (128,)
+    unbucketed = TextTokenizer(model.vocab, max_input_len=128, length_buckets=None)
+    assert unbucketed.encode("가").ids.shape == (128,)
+
+
+def test_length_buckets_do_not_change_predictions():
+    model = G2PModel()
+    texts = ["안녕하세요", "hello world", "학교에 갑니다", "가😀나", "가나다라마바사아자차카타파하" * 2]
+    bucketed = [model.predict(text) for text in texts]
+    model.tokenizer = TextTokenizer(model.vocab, max_input_len=128, length_buckets=None)
+    assert [model.predict(text) for text in texts] == bucketed
+
+
+def test_sessions_load_identically_from_path_and_bytes():
+    from hama import _engine
+    from hama.inference import _resolve_hama
+
+    source = _resolve_hama(None, "encoder.hama")
+    if not isinstance(source, Path):
+        pytest.skip("packaged assets are not plain files")
+    from_path = _engine.EncoderSession(source)
+    from_bytes = _engine.EncoderSession(source.read_bytes())
+    model = G2PModel()
+    encoding = model.tokenizer.encode("학교에 갑니다")
+    feeds = {"input_ids": encoding.ids.reshape(1, -1), "input_lengths": np.array([encoding.length])}
+    names = [arg.name for arg in from_path.get_outputs()]
+    for got, want in zip(from_path.run(names, feeds), from_bytes.run(names, feeds)):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_import_is_lazy():
+    code = "import sys, hama; print(sorted(m for m in ('numpy', 'hama.inference', 'hama._engine') if m in sys.modules))"
+    src = str(Path(hama.__file__).resolve().parents[1])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")]))}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env).stdout
+    assert out.strip() == "[]"
+
+
+def test_sessions_are_built_on_first_predict():
+    model = G2PModel()
+    assert model._sessions is None
+    assert model.load() is model
+    sessions = model._sessions
+    assert sessions is not None
+    model.predict("안녕하세요")
+    assert model._sessions is sessions
+
+
+def test_predict_batch_of_nothing_does_not_load_the_model():
+    model = G2PModel()
+    assert model.predict_batch([]) == []
+    assert model._sessions is None
+
+
+def test_predict_many_matches_predict_in_order():
+    model = G2PModel()
+    texts = ["안녕하세요", "hello world", "학교에 갑니다", "", "가😀나", "Really? What's up"] * 3
+    expected = [model.predict(text, preserve_literals="punct") for text in texts]
+    assert model.predict_many(texts, preserve_literals="punct", workers=4, batch_size=4) == expected
+    assert model.predict_many(texts, preserve_literals="punct", workers=1) == expected
+
+
+def test_sessions_report_retained_scratch():
+    from hama import _engine
+
+    if not _engine.has("hama_decoder_scratch_peak"):
+        pytest.skip("libhama predates scratch reporting")
+    model = G2PModel()
+    model.predict("학교에 갑니다")
+    peak = model.decoder_step_session.scratch_peak_bytes
+    assert peak > 0
+    model.predict("안녕하세요")
+    assert model.decoder_step_session.scratch_peak_bytes >= peak
+    before = model.predict("학교에 갑니다")
+    model.decoder_step_session.trim_scratch()
+    assert model.predict("학교에 갑니다") == before
+
+
+def test_engine_thread_count_does_not_change_outputs():
+    from hama import _engine, get_num_threads, set_num_threads
+
+    if not _engine.has("hama_set_num_threads"):
+        pytest.skip("libhama predates the worker pool")
+    model = G2PModel()
+    text = "학교에 갑니다 안녕하세요 반갑습니다"
+    try:
+        set_num_threads(1)
+        assert get_num_threads() == 1
+        serial = model.predict(text)
+        set_num_threads(4)
+        assert get_num_threads() == 4
+        assert model.predict(text) == serial
+    finally:
+        set_num_threads(0)
+    assert get_num_threads() >= 1
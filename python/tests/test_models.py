@@ -0,0 +1,63 @@
+import pytest
+
+from hama import G2PModel, models
+from hama.cache import G2PCache
+from hama.inference import _resolve_hama
+
+
+def test_get_shares_one_model_per_weights():
+    first = models.get("g2p")
+    second = models.get("g2p")
+    try:
+        assert first is second
+        assert isinstance(first, G2PModel)
+        assert isinstance(first.cache, G2PCache)
+        assert models.refcount(first) >= 2
+    finally:
+        models.release(first)
+        models.release(second)
+
+
+def test_get_keys_on_weights_path_and_options():
+    encoder = _resolve_hama(None, "encoder.hama")
+    if isinstance(encoder, bytes):
+        pytest.skip("packaged assets are not plain files")
+    default = models.get("g2p")
+    by_dir = models.get("g2p", path=encoder.parent)
+    shorter = models.get("g2p", max_output_len=16)
+    try:
+        assert by_dir is default
+        assert shorter is not default
+        assert shorter.max_output_len == 16
+    finally:
+        for model in (default, by_dir, shorter):
+            models.release(model)
+
+
+def test_release_drops_the_last_reference():
+    model = models.get("g2p", max_output_len=8)
+    assert models.refcount(model) == 1
+    models.release(model)
+    assert models.refcount(model) == 0
+    with pytest.raises(ValueError):
+        models.release(model)
+    fresh = models.get("g2p", max_output_len=8)
+    try:
+        assert fresh is not model
+    finally:
+        models.release(fresh)
+
+
+def test_pronunciation_helpers_use_the_shared_model():
+    from hama.pronunciation import _get_default_g2p_model
+
+    model = models.get("g2p")
+    try:
+        assert _get_default_g2p_model() is model
+    finally:
+        models.release(model)
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        models.get("tts")
@@ -10,6 +10,7 @@ from pathlib import Path
 import pytest
 
 from hama import P2GModel
+from hama.p2g import MAX_INPUT_LEN, _chunk_spans, _load_vocab, korean_output_tokens, normalize_phoneme_tokens
 
 REPO = Path(__file__).resolve().parents[2]
 FIX = REPO / "tests" / "fixtures"
@@ -26,3 +27,100 @@ def test_p2g_golden(model: P2GModel, case: dict) -> None:
     result = model.predict(case["phoneme"])
     assert result.tokens == case["gen_tokens"]
     assert result.text == case["hyp_text"]
+
+
+def test_p2g_predict_batch_matches_predict_in_order(model: P2GModel) -> None:
+    phonemes = [case["phoneme"] for case in _cases]
+    expected = [model.predict(p) for p in phonemes]
+    assert model.predict_batch(phonemes, batch_size=3) == expected
+    assert model.predict_batch([]) == []
+
+
+def test_p2g_predict_batch_of_nothing_does_not_load_the_model() -> None:
+    model = P2GModel()
+    assert model.predict_batch([]) == []
+    assert model._session is None
+
+
+def test_korean_output_tokens_keep_jamo_digits_and_punctuation() -> None:
+    tokens = korean_output_tokens(_load_vocab(None))
+    assert "\u1100" in tokens and "\u1161" in tokens  # leading ㄱ, vowel ㅏ
+    assert "'" in tokens
+    assert "a" not in tokens and "<eos>" not in tokens
+
+
+def test_p2g_shortlist_limits_the_output_vocabulary(model: P2GModel) -> None:
+    allowed = set(korean_output_tokens(model.tokens))
+    restricted = P2GModel(shortlist="korean")
+    assert {model.eos_id, model.pad_id} <= set(restricted.shortlist.tolist())
+    for result in restricted.predict_batch([case["phoneme"] for case in _cases[:4]]):
+        assert set(result.tokens) <= allowed
+
+    # A shortlist of the whole vocabulary decodes exactly like no shortlist.
+    everything = P2GModel(shortlist=range(len(model.tokens)))
+    for case in _cases[:4]:
+        assert everything.predict(case["phoneme"]) == model.predict(case["phoneme"])
+    with pytest.raises(ValueError):
+        P2GModel(shortlist=["not-a-token"])
+
+
+def test_p2g_stream_rolls_over_past_max_input_len(model: P2GModel) -> None:
+    phonemes = [t for case in _cases for t in [*case["phoneme"], "|"]]
+    source = normalize_phoneme_tokens(phonemes)
+    assert len(source) > 2 * MAX_INPUT_LEN
+    stream = model.stream()
+    lengths = []
+    for start in range(0, len(phonemes), 7):
+        result = stream.push(phonemes[start : start + 7])
+        lengths.append(len(result.tokens))
+    assert len(result.alignments) == len(result.tokens)
+    for a in result.alignments:
+        assert a.phoneme_index == -1 or source[a.phoneme_index] == a.phoneme
+    # Phonemes past the first chunk still reach the output.
+    assert max(a.phoneme_index for a in result.alignments) > 2 * MAX_INPUT_LEN
+    assert lengths[-1] > lengths[len(lengths) // 4]
+
+
+def _through_word(tokens: list[str], n: int) -> list[str]:
+    """`tokens` up to the space after the n-th word (or the last space)."""
+    spaces = [i for i, t in enumerate(tokens) if t == " "][:n]
+    return tokens[: spaces[-1] + 1] if n and spaces else []
+
+
+def test_p2g_stream_keeps_completed_words(model: P2GModel) -> None:
+    words = [w.split() for case in _cases[:3] for w in " ".join(case["phoneme"]).split("|") if w.strip()]
+    # Until a word is complete nothing is cached: the stream decodes like predict.
+    assert model.stream().push(words[0]) == model.predict(words[0])
+
+    stream = model.stream()
+    previous: list[str] = []
+    for idx, word in enumerate(words):
+        result = stream.push(word + ["|"])
+        assert result == stream.result and result.tokens
+        # Words complete before the previous push keep their output.
+        kept = _through_word(previous, idx - 1)
+        assert result.tokens[: len(kept)] == kept
+        previous = result.tokens
+
+
+def test_chunk_spans_split_at_word_boundaries() -> None:
+    source = "a b | c | d e f | g".split()
+    assert _chunk_spans(source, 4) == [(0, 4), (5, 8), (9, 10)]
+    assert _chunk_spans(source, 16) == [(0, 10)]
+    # A word longer than a chunk is cut; the rest packs with the next word.
+    assert _chunk_spans("a b c d | e".split(), 3) == [(0, 3), (3, 6)]
+    assert _chunk_spans([], 4) == []
+
+
+def test_p2g_predict_long_offsets_alignments(model: P2GModel) -> None:
+    phonemes = [t for case in _cases for t in [*case["phoneme"], "|"]]
+    source = normalize_phoneme_tokens(phonemes)
+    assert len(source) > MAX_INPUT_LEN
+    result = model.predict_long(phonemes, chunk_size=48)
+    assert len(result.alignments) == len(result.tokens)
+    for a in result.alignments:
+        assert a.phoneme_index == -1 or source[a.phoneme_index] == a.phoneme
+    assert max(a.phoneme_index for a in result.alignments) > MAX_INPUT_LEN
+
+    short = _cases[0]["phoneme"]
+    assert model.predict_long(short, chunk_size=MAX_INPUT_LEN) == model.predict(short)
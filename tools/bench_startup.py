@@ -0,0 +1,129 @@
+"""Import-time and first-call latency benchmark for the Python package.
+
+Each scenario runs in a fresh interpreter, so nothing is warm from a previous
+run, and each stage is timed by wall clock from the end of the previous one.
+The median of each stage is checked against `BUDGETS_MS`, the budget
+documented in README.md ("Startup latency"); the script exits non-zero if any
+stage is over. Scenarios whose assets are missing are reported and skipped.
+
+Run:
+  uv --project python run python tools/bench_startup.py [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+SRC = REPO / "python" / "src"
+
+# Per-stage budgets (ms, median over --repeat runs). Keep in sync with README.md.
+BUDGETS_MS: dict[str, dict[str, float]] = {
+    "import": {"import": 25},
+    "g2p": {"import": 250, "construct": 25, "load": 100, "first call": 150},
+    "asr": {"import": 250, "construct": 25, "load": 100, "first call": 150},
+    "p2g": {"import": 250, "construct": 25, "load": 100, "first call": 150},
+}
+
+# Each snippet prints a JSON dict of {stage: milliseconds}; `lap()` returns the
+# time since the previous stage ended.
+_PRELUDE = f"""
+import json, sys, time
+sys.path.insert(0, {str(SRC)!r})
+t0 = time.perf_counter()
+def lap():
+    global t0
+    now = time.perf_counter()
+    elapsed, t0 = round((now - t0) * 1000, 2), now
+    return elapsed
+out = {{}}
+"""
+
+SCENARIOS = {
+    "import": """
+import hama
+out["import"] = lap()
+""",
+    "g2p": """
+from hama import G2PModel
+out["import"] = lap()
+model = G2PModel()
+out["construct"] = lap()
+model.load()
+out["load"] = lap()
+model.predict("안녕하세요")
+out["first call"] = lap()
+model.predict("학교에 갑니다")
+out["warm call"] = lap()
+""",
+    "asr": """
+import numpy as np
+from hama import ASRModel
+out["import"] = lap()
+model = ASRModel()
+out["construct"] = lap()
+model.load()
+out["load"] = lap()
+model.transcribe_waveform(np.zeros(16000, dtype=np.float32), 16000)
+out["first call"] = lap()
+model.transcribe_waveform(np.zeros(16000, dtype=np.float32), 16000)
+out["warm call"] = lap()
+""",
+    "p2g": """
+from hama import P2GModel
+out["import"] = lap()
+model = P2GModel()
+out["construct"] = lap()
+model.load()
+out["load"] = lap()
+model.predict("a n n j ʌ ŋ")
+out["first call"] = lap()
+model.predict("h a k k j o")
+out["warm call"] = lap()
+""",
+}
+
+
+def run(name: str) -> dict[str, float] | str:
+    code = _PRELUDE + SCENARIOS[name] + "\nprint(json.dumps(out))\n"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return proc.stderr.strip().splitlines()[-1]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="hama import / first-call latency")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per scenario (median reported)")
+    ap.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    args = ap.parse_args()
+
+    over: list[str] = []
+    for name in args.scenarios:
+        runs = [run(name) for _ in range(args.repeat)]
+        failed = [r for r in runs if isinstance(r, str)]
+        if failed:
+            print(f"{name}: skipped ({failed[0]})")
+            continue
+        print(f"{name}:")
+        for stage in runs[0]:
+            values = [r[stage] for r in runs]
+            median = statistics.median(values)
+            budget = BUDGETS_MS[name].get(stage)
+            verdict = "" if budget is None else f"  budget {budget:6.0f} ms  {'OVER' if median > budget else 'ok'}"
+            print(f"  {stage:<12} {median:8.1f} ms  (min {min(values):.1f}){verdict}")
+            if budget is not None and median > budget:
+                over.append(f"{name}/{stage}")
+    if over:
+        print(f"over budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Pre-build a persistent G2P cache (`hama.G2PDiskCache`) from a word list.
+
+Workers that open the same cache file start warm: every listed word is served
+from disk instead of running the model. The input is a word-frequency list, one
+entry per line: `word` or `word<whitespace>count`. With counts, the most
+frequent words are predicted first (and `--top` keeps only those).
+
+Run:
+  uv --project python run python tools/build_g2p_cache.py \
+    --words ko_word_freq.tsv --cache /var/cache/hama --top 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "python" / "src"))
+from hama import G2PDiskCache, G2PModel
+
+
+def read_words(path: Path) -> list[str]:
+    entries: list[tuple[str, float]] = []
+    seen: set[str] = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        parts = line.split()
+        if not parts or parts[0] in seen:
+            continue
+        count = 0.0
+        if len(parts) > 1:
+            try:
+                count = float(parts[-1])
+            except ValueError:
+                count = 0.0
+        seen.add(parts[0])
+        entries.append((parts[0], count))
+    entries.sort(key=lambda entry: -entry[1])  # stable: unranked lists keep file order
+    return [word for word, _ in entries]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="word-frequency list -> persistent G2P cache")
+    ap.add_argument("--words", type=Path, required=True, help="one `word [count]` per line")
+    ap.add_argument("--cache", type=Path, default=None, help="cache file or directory (default: $HAMA_CACHE_DIR or ~/.cache/hama)")
+    ap.add_argument("--top", type=int, default=None, help="only the N most frequent words")
+    ap.add_argument("--preserve-literals", choices=["none", "punct"], nargs="+", default=["none"])
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--chunk", type=int, default=4096, help="words per predict_batch call / transaction")
+    args = ap.parse_args()
+
+    words = read_words(args.words)[: args.top]
+    cache = G2PDiskCache(args.cache)
+    model = G2PModel(disk_cache=cache)
+    started = time.perf_counter()
+    for mode in args.preserve_literals:
+        for start in range(0, len(words), args.chunk):
+            model.predict_batch(words[start : start + args.chunk], preserve_literals=mode, batch_size=args.batch_size)
+            print(f"[{mode}] {min(start + args.chunk, len(words))}/{len(words)}", end="\r", flush=True)
+        print()
+    stats = cache.stats()
+    print(
+        f"{len(words)} words in {time.perf_counter() - started:.1f}s -> {cache.path}"
+        f"  ({stats.entries} entries, {stats.nbytes / 1e6:.1f} MB; {stats.hits} already cached)"
+    )
+
+
+if __name__ == "__main__":
+    main()
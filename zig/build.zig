@@ -9,6 +9,9 @@ pub fn build(b: *std.Build) void {
         .root_source_file = b.path("src/main_native.zig"),
         .target = target,
         .optimize = optimize,
+        // The worker pool's threads run inside the host's process (Python), so
+        // create them through the host's libc rather than raw clone().
+        .link_libc = true,
     });
     const lib = b.addLibrary(.{
         .name = "hama",
@@ -2,9 +2,10 @@
 //! apply f16 rounding at the graph's cast boundaries.
 
 const std = @import("std");
+const libm = @import("libm.zig");
 
 pub inline fn sigmoid(x: f32) f32 {
-    return 1.0 / (1.0 + @exp(-x));
+    return 1.0 / (1.0 + libm.expf(-x));
 }
 
 pub inline fn tanh(x: f32) f32 {
@@ -22,7 +23,7 @@ pub fn erf(x: f32) f32 {
     const sign: f64 = if (xd < 0) -1.0 else 1.0;
     const ax = @abs(xd);
     const tt = 1.0 / (1.0 + 0.3275911 * ax);
-    const y = 1.0 - (((((1.061405429 * tt - 1.453152027) * tt) + 1.421413741) * tt - 0.284496736) * tt + 0.254829592) * tt * @exp(-ax * ax);
+    const y = 1.0 - (((((1.061405429 * tt - 1.453152027) * tt) + 1.421413741) * tt - 0.284496736) * tt + 0.254829592) * tt * libm.exp(-ax * ax);
     return @floatCast(sign * y);
 }
 
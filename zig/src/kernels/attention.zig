@@ -0,0 +1,241 @@
+//! Multi-head scaled dot-product attention, blocked ("flash"-style).
+//!
+//! Each head's Q, K^T and V are first copied out of the row-packed projection
+//! buffers into contiguous per-head panels. Tiles of BQ queries then sweep the
+//! keys BK at a time with an online softmax (a running max and normalizer per
+//! query), so only a BQ x BK tile of scores ever exists rather than a full
+//! row per query. Scores are vector multiply-adds along rows of K^T and the
+//! context accumulates as vectors along head_dim. (head, query tile) tasks
+//! are split across the engine's worker pool.
+//!
+//! Query i sees keys [0, max(prefix, i+1)): the PrefixLM mask for a prefix of
+//! length P, and full attention for prefix >= T.
+
+const std = @import("std");
+const libm = @import("libm.zig");
+const threads = @import("../threads.zig");
+
+/// Queries per tile.
+const BQ = 8;
+/// Keys per tile; K^T and V panels are zero-padded to a multiple of it.
+const BK = 64;
+/// Vector widths along keys (scores) and along head_dim (context).
+const KW = 16;
+const DW = 8;
+
+/// ctx[i, h*head_dim ..] = softmax(scale * q_i . k_j | visible j) @ v for every
+/// head h and query i < t. Rows of q, k/v and ctx are `q_stride`, `kv_stride`
+/// and `ctx_stride` apart, with head h at column h*head_dim of each row.
+pub fn attention(
+    comptime head_dim: usize,
+    alloc: std.mem.Allocator,
+    ctx: []f32,
+    ctx_stride: usize,
+    q: []const f32,
+    q_stride: usize,
+    k: []const f32,
+    v: []const f32,
+    kv_stride: usize,
+    t: usize,
+    heads: usize,
+    scale: f32,
+    prefix: usize,
+) !void {
+    comptime std.debug.assert(head_dim % DW == 0);
+    if (t == 0) return;
+    const t_pad = (t + BK - 1) / BK * BK;
+    const panels = try alloc.alloc(f32, heads * head_dim * (t + 2 * t_pad));
+    defer alloc.free(panels);
+    const Job = AttentionJob(head_dim);
+    const job: Job = .{
+        .ctx = ctx,
+        .ctx_stride = ctx_stride,
+        .q = q,
+        .q_stride = q_stride,
+        .k = k,
+        .v = v,
+        .kv_stride = kv_stride,
+        .qh = panels[0 .. heads * t * head_dim],
+        .kt = panels[heads * t * head_dim ..][0 .. heads * head_dim * t_pad],
+        .vh = panels[heads * (t + t_pad) * head_dim ..][0 .. heads * t_pad * head_dim],
+        .t = t,
+        .t_pad = t_pad,
+        .scale = scale,
+        .prefix = prefix,
+        .q_tiles = (t + BQ - 1) / BQ,
+    };
+    threads.parallelFor(heads, threads.grain(3 * t * head_dim), job, Job.pack);
+    threads.parallelFor(heads * job.q_tiles, threads.grain(2 * BQ * t * head_dim), job, Job.run);
+}
+
+fn AttentionJob(comptime hd: usize) type {
+    return struct {
+        ctx: []f32,
+        ctx_stride: usize,
+        q: []const f32,
+        q_stride: usize,
+        k: []const f32,
+        v: []const f32,
+        kv_stride: usize,
+        qh: []f32, // [heads, t, hd]
+        kt: []f32, // [heads, hd, t_pad]
+        vh: []f32, // [heads, t_pad, hd]
+        t: usize,
+        t_pad: usize,
+        scale: f32,
+        prefix: usize,
+        q_tiles: usize,
+
+        const Self = @This();
+        const VecK = @Vector(KW, f32);
+        const VecD = @Vector(DW, f32);
+
+        /// Keys visible to query i: [0, limit(i)).
+        fn limit(job: Self, i: usize) usize {
+            return @min(job.t, @max(job.prefix, i + 1));
+        }
+
+        fn pack(job: Self, h_begin: usize, h_end: usize) void {
+            const t = job.t;
+            const t_pad = job.t_pad;
+            for (h_begin..h_end) |h| {
+                const qh = job.qh[h * t * hd ..][0 .. t * hd];
+                const kt = job.kt[h * hd * t_pad ..][0 .. hd * t_pad];
+                const vh = job.vh[h * t_pad * hd ..][0 .. t_pad * hd];
+                for (0..t) |j| {
+                    @memcpy(qh[j * hd ..][0..hd], job.q[j * job.q_stride + h * hd ..][0..hd]);
+                    @memcpy(vh[j * hd ..][0..hd], job.v[j * job.kv_stride + h * hd ..][0..hd]);
+                    const krow = job.k[j * job.kv_stride + h * hd ..][0..hd];
+                    for (krow, 0..) |kv, d| kt[d * t_pad + j] = kv;
+                }
+                @memset(vh[t * hd ..], 0);
+                for (0..hd) |d| @memset(kt[d * t_pad + t .. (d + 1) * t_pad], 0);
+            }
+        }
+
+        fn run(job: Self, begin: usize, end: usize) void {
+            const t_pad = job.t_pad;
+            for (begin..end) |idx| {
+                const h = idx / job.q_tiles;
+                const q0 = (idx % job.q_tiles) * BQ;
+                const rows = @min(BQ, job.t - q0);
+                const qh = job.qh[h * job.t * hd ..][0 .. job.t * hd];
+                const kt = job.kt[h * hd * t_pad ..][0 .. hd * t_pad];
+                const vh = job.vh[h * t_pad * hd ..][0 .. t_pad * hd];
+
+                var acc: [BQ][hd / DW]VecD = undefined;
+                var m: [BQ]f32 = undefined;
+                var l: [BQ]f32 = undefined;
+                for (0..rows) |r| {
+                    acc[r] = @splat(@splat(0));
+                    m[r] = -std.math.inf(f32);
+                    l[r] = 0;
+                }
+                // limit() is non-decreasing in i, so the tile's last row sees the most keys.
+                const keys = job.limit(q0 + rows - 1);
+                var kb: usize = 0;
+                while (kb < keys) : (kb += BK) {
+                    var s: [BQ][BK / KW]VecK = undefined;
+                    for (0..rows) |r| s[r] = @splat(@splat(0));
+                    for (0..hd) |d| {
+                        const krow = kt[d * t_pad + kb ..][0..BK];
+                        for (0..rows) |r| {
+                            const qd: VecK = @splat(qh[(q0 + r) * hd + d]);
+                            inline for (0..BK / KW) |u| s[r][u] += qd * @as(VecK, krow[u * KW ..][0..KW].*);
+                        }
+                    }
+                    for (0..rows) |r| {
+                        const n_valid = @min(BK, job.limit(q0 + r) -| kb);
+                        if (n_valid == 0) continue;
+                        var p: [BK]f32 = @bitCast(s[r]);
+                        var mx = -std.math.inf(f32);
+                        for (p[0..n_valid]) |*x| {
+                            x.* *= job.scale;
+                            mx = @max(mx, x.*);
+                        }
+                        const m_new = @max(m[r], mx);
+                        const corr = libm.expf(m[r] - m_new);
+                        var sum: f32 = 0;
+                        for (p[0..n_valid]) |*x| {
+                            x.* = libm.expf(x.* - m_new);
+                            sum += x.*;
+                        }
+                        l[r] = l[r] * corr + sum;
+                        m[r] = m_new;
+                        const cv: VecD = @splat(corr);
+                        inline for (0..hd / DW) |u| acc[r][u] *= cv;
+                        for (0..n_valid) |j| {
+                            const pj: VecD = @splat(p[j]);
+                            const vrow = vh[(kb + j) * hd ..][0..hd];
+                            inline for (0..hd / DW) |u| acc[r][u] += pj * @as(VecD, vrow[u * DW ..][0..DW].*);
+                        }
+                    }
+                }
+                for (0..rows) |r| {
+                    const inv: VecD = @splat(1.0 / l[r]);
+                    const out = job.ctx[(q0 + r) * job.ctx_stride + h * hd ..][0..hd];
+                    inline for (0..hd / DW) |u| out[u * DW ..][0..DW].* = acc[r][u] * inv;
+                }
+            }
+        }
+    };
+}
+
+const t_ = std.testing;
+
+// One full scores row per query, masked softmax, then the weighted sum of V.
+fn attentionRef(ctx: []f32, qkv: []const f32, t: usize, heads: usize, hd: usize, scale: f32, prefix: usize) !void {
+    const stride = 3 * heads * hd;
+    const scores = try t_.allocator.alloc(f32, t);
+    defer t_.allocator.free(scores);
+    for (0..heads) |h| {
+        for (0..t) |i| {
+            const lim = @min(t, @max(prefix, i + 1));
+            var mx = -std.math.inf(f32);
+            for (0..lim) |j| {
+                var s: f32 = 0;
+                for (0..hd) |d| s += qkv[i * stride + h * hd + d] * qkv[j * stride + heads * hd + h * hd + d];
+                scores[j] = s * scale;
+                mx = @max(mx, scores[j]);
+            }
+            var sum: f32 = 0;
+            for (scores[0..lim]) |*x| {
+                x.* = @exp(x.* - mx);
+                sum += x.*;
+            }
+            for (0..hd) |d| {
+                var acc: f32 = 0;
+                for (0..lim) |j| acc += scores[j] * qkv[j * stride + 2 * heads * hd + h * hd + d];
+                ctx[i * heads * hd + h * hd + d] = acc / sum;
+            }
+        }
+    }
+}
+
+fn checkAttention(comptime hd: usize, t: usize, prefix: usize) !void {
+    const heads = 3;
+    const dm = heads * hd;
+    var prng = std.Random.DefaultPrng.init(t * 7 + prefix);
+    const rng = prng.random();
+    const qkv = try t_.allocator.alloc(f32, t * 3 * dm);
+    defer t_.allocator.free(qkv);
+    for (qkv) |*x| x.* = rng.float(f32) * 4 - 2;
+    const got = try t_.allocator.alloc(f32, t * dm);
+    defer t_.allocator.free(got);
+    const want = try t_.allocator.alloc(f32, t * dm);
+    defer t_.allocator.free(want);
+    const scale = 1.0 / @sqrt(@as(f32, hd));
+    try attention(hd, t_.allocator, got, dm, qkv, 3 * dm, qkv[dm..], qkv[2 * dm ..], 3 * dm, t, heads, scale, prefix);
+    try attentionRef(want, qkv, t, heads, hd, scale, prefix);
+    for (want, got) |w, g| try t_.expectApproxEqAbs(w, g, 1e-5);
+}
+
+test "blocked attention matches the per-row softmax" {
+    // Tiles with remainders on both axes, full attention and PrefixLM masks.
+    for ([_]usize{ 1, 5, 63, 64, 65, 150 }) |t| {
+        try checkAttention(64, t, t);
+        try checkAttention(56, t, t);
+        try checkAttention(56, t, t / 3);
+        try checkAttention(64, t, 0);
+    }
+}
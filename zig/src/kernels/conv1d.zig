@@ -5,8 +5,13 @@
 //! Covers every conv in the models: separable frontend (depthwise+pointwise),
 //! ASR STFT (kernel=400, stride=160), stride-2 subsample, dilated depthwise
 //! (k=9, group=256, dil 1/2/4), pointwise, and the decoder's location conv.
+//! Output channels are split across the engine's worker pool.
+//!
+//! `depthwise1d` is a specialized path for the ASR backbone's "same"-padded
+//! depthwise convs (the backbone's pointwise convs run as GEMMs).
 
 const std = @import("std");
+const threads = @import("../threads.zig");
 
 pub fn outLen(t_in: usize, k: usize, stride: usize, pad_begin: usize, pad_end: usize, dilation: usize) usize {
     const eff = dilation * (k - 1) + 1; // effective kernel size
@@ -36,31 +41,152 @@ pub fn conv1d(
     std.debug.assert(w.len == c_out * c_in_g * k);
     std.debug.assert(out.len == c_out * t_out);
 
-    var oc: usize = 0;
-    while (oc < c_out) : (oc += 1) {
-        const g = oc / c_out_g;
-        const in_base = g * c_in_g;
-        const b: f32 = if (bias) |bb| bb[oc] else 0;
-        const wbase = oc * c_in_g * k;
-        var ot: usize = 0;
-        while (ot < t_out) : (ot += 1) {
-            const t0: isize = @as(isize, @intCast(ot * stride)) - @as(isize, @intCast(pad_begin));
-            var acc: f32 = b;
-            var icg: usize = 0;
-            while (icg < c_in_g) : (icg += 1) {
-                const xrow = x[(in_base + icg) * t_in ..][0..t_in];
-                const wrow = w[wbase + icg * k ..][0..k];
-                var kk: usize = 0;
-                while (kk < k) : (kk += 1) {
-                    const ti = t0 + @as(isize, @intCast(kk * dilation));
-                    if (ti >= 0 and ti < @as(isize, @intCast(t_in))) {
-                        acc += xrow[@intCast(ti)] * wrow[kk];
+    const job: ConvJob = .{
+        .out = out,
+        .x = x,
+        .w = w,
+        .bias = bias,
+        .t_in = t_in,
+        .t_out = t_out,
+        .c_in_g = c_in_g,
+        .c_out_g = c_out_g,
+        .k = k,
+        .stride = stride,
+        .pad_begin = pad_begin,
+        .dilation = dilation,
+    };
+    threads.parallelFor(c_out, threads.grain(t_out * c_in_g * k), job, ConvJob.run);
+}
+
+/// Output positions of one channel accumulated together (fits L1 alongside
+/// the input span it reads).
+const OT_BLOCK = 64;
+
+// Output channels are independent, so they are split across the worker pool.
+const ConvJob = struct {
+    out: []f32,
+    x: []const f32,
+    w: []const f32,
+    bias: ?[]const f32,
+    t_in: usize,
+    t_out: usize,
+    c_in_g: usize,
+    c_out_g: usize,
+    k: usize,
+    stride: usize,
+    pad_begin: usize,
+    dilation: usize,
+
+    // Taps are the outer loops and output positions the inner one, over the
+    // range where the tap lands inside the input, so the inner loop is a plain
+    // strided multiply-add. Every output still starts from its bias and adds
+    // its in-bounds (input channel, tap) products in the same order.
+    fn run(job: ConvJob, oc_begin: usize, oc_end: usize) void {
+        const t_in: isize = @intCast(job.t_in);
+        const t_out = job.t_out;
+        const stride: isize = @intCast(job.stride);
+        const k = job.k;
+        for (oc_begin..oc_end) |oc| {
+            const g = oc / job.c_out_g;
+            const in_base = g * job.c_in_g;
+            const b: f32 = if (job.bias) |bb| bb[oc] else 0;
+            const wbase = oc * job.c_in_g * k;
+            const orow = job.out[oc * t_out ..][0..t_out];
+            var ob: usize = 0;
+            while (ob < t_out) : (ob += OT_BLOCK) {
+                const oe = @min(ob + OT_BLOCK, t_out);
+                @memset(orow[ob..oe], b);
+                for (0..job.c_in_g) |icg| {
+                    const xrow = job.x[(in_base + icg) * job.t_in ..][0..job.t_in];
+                    const wrow = job.w[wbase + icg * k ..][0..k];
+                    for (wrow, 0..) |wv, kk| {
+                        // Input index of output ot is ot*stride + off.
+                        const off = @as(isize, @intCast(kk * job.dilation)) - @as(isize, @intCast(job.pad_begin));
+                        const first: usize = if (off >= 0) 0 else @intCast(@divFloor(-off + stride - 1, stride));
+                        const end: usize = if (t_in <= off) 0 else @intCast(@divFloor(t_in - off + stride - 1, stride));
+                        const lo = @max(first, ob);
+                        const hi = @min(end, oe);
+                        if (lo >= hi) continue;
+                        const t_lo: usize = @intCast(@as(isize, @intCast(lo)) * stride + off);
+                        if (stride == 1) {
+                            for (orow[lo..hi], xrow[t_lo..][0 .. hi - lo]) |*o, xv| o.* += xv * wv;
+                        } else {
+                            for (orow[lo..hi], 0..) |*o, i| o.* += xrow[t_lo + i * job.stride] * wv;
+                        }
                     }
                 }
             }
-            out[oc * t_out + ot] = acc;
         }
     }
+};
+
+/// Time steps per vector in `depthwise1d`.
+const DW_W = 16;
+
+/// Depthwise conv with "same" padding (dilation*(k-1)/2 on each side), stride
+/// 1 and groups == c: out[c,t] = bias[c] + sum_kk w[c,kk] * x[c, t + kk*dil - pad].
+/// Bit-identical to the equivalent `conv1d` call. Interior outputs, where every
+/// tap is in bounds, accumulate all k taps in vector registers in one pass;
+/// only the `pad` outputs at each edge check bounds.
+pub fn depthwise1d(comptime k: usize, out: []f32, x: []const f32, w: []const f32, bias: ?[]const f32, c: usize, time: usize, dilation: usize) void {
+    std.debug.assert(k % 2 == 1);
+    std.debug.assert(x.len == c * time and out.len == c * time and w.len == c * k);
+    const job: DepthwiseJob(k) = .{ .out = out, .x = x, .w = w, .bias = bias, .time = time, .dilation = dilation };
+    threads.parallelFor(c, threads.grain(time * k), job, DepthwiseJob(k).run);
+}
+
+fn DepthwiseJob(comptime k: usize) type {
+    return struct {
+        out: []f32,
+        x: []const f32,
+        w: []const f32,
+        bias: ?[]const f32,
+        time: usize,
+        dilation: usize,
+
+        const Self = @This();
+
+        fn run(job: Self, c_begin: usize, c_end: usize) void {
+            const Vec = @Vector(DW_W, f32);
+            const time = job.time;
+            const dil = job.dilation;
+            const pad = dil * (k - 1) / 2;
+            // [lo, hi): outputs whose taps all land inside the input
+            const lo = @min(pad, time);
+            const hi = @max(lo, time -| pad);
+            for (c_begin..c_end) |ch| {
+                const b: f32 = if (job.bias) |bb| bb[ch] else 0;
+                const wr = job.w[ch * k ..][0..k];
+                const xr = job.x[ch * time ..][0..time];
+                const orow = job.out[ch * time ..][0..time];
+                for (0..lo) |ot| orow[ot] = edge(xr, wr, b, ot, dil, pad);
+                var ot = lo;
+                while (ot + DW_W <= hi) : (ot += DW_W) {
+                    var acc: Vec = @splat(b);
+                    inline for (0..k) |kk| {
+                        const xv: Vec = xr[ot - pad + kk * dil ..][0..DW_W].*;
+                        acc += xv * @as(Vec, @splat(wr[kk]));
+                    }
+                    orow[ot..][0..DW_W].* = acc;
+                }
+                while (ot < hi) : (ot += 1) {
+                    var acc = b;
+                    inline for (0..k) |kk| acc += xr[ot - pad + kk * dil] * wr[kk];
+                    orow[ot] = acc;
+                }
+                for (hi..time) |o| orow[o] = edge(xr, wr, b, o, dil, pad);
+            }
+        }
+
+        fn edge(xr: []const f32, wr: *const [k]f32, b: f32, ot: usize, dil: usize, pad: usize) f32 {
+            var acc = b;
+            inline for (0..k) |kk| {
+                const i = ot + kk * dil;
+                if (i >= pad and i - pad < xr.len) acc += xr[i - pad] * wr[kk];
+            }
+            return acc;
+        }
+    };
 }
 
 const t = std.testing;
@@ -106,3 +232,83 @@ test "conv1d dilation 2" {
     // ot3: 1(2),3(4),5(0)=6 ; ot4: 2(3),4(5),6(0)=8
     try t.expectEqualSlices(f32, &[_]f32{ 4, 6, 9, 6, 8 }, &out);
 }
+
+// The straightforward per-output loop the kernel must reproduce exactly.
+fn conv1dRef(out: []f32, x: []const f32, w: []const f32, bias: ?[]const f32, c_in: usize, t_in: usize, c_out: usize, k: usize, stride: usize, pad_begin: usize, pad_end: usize, dilation: usize, groups: usize) void {
+    const t_out = outLen(t_in, k, stride, pad_begin, pad_end, dilation);
+    const c_in_g = c_in / groups;
+    const c_out_g = c_out / groups;
+    for (0..c_out) |oc| {
+        const in_base = (oc / c_out_g) * c_in_g;
+        for (0..t_out) |ot| {
+            const t0: isize = @as(isize, @intCast(ot * stride)) - @as(isize, @intCast(pad_begin));
+            var acc: f32 = if (bias) |bb| bb[oc] else 0;
+            for (0..c_in_g) |icg| {
+                for (0..k) |kk| {
+                    const ti = t0 + @as(isize, @intCast(kk * dilation));
+                    if (ti >= 0 and ti < @as(isize, @intCast(t_in))) {
+                        acc += x[(in_base + icg) * t_in + @as(usize, @intCast(ti))] * w[(oc * c_in_g + icg) * k + kk];
+                    }
+                }
+            }
+            out[oc * t_out + ot] = acc;
+        }
+    }
+}
+
+test "conv1d is bit-identical to the per-output loop" {
+    var prng = std.Random.DefaultPrng.init(5);
+    const rng = prng.random();
+    // c_in, t_in, c_out, k, stride, pad_begin, pad_end, dilation, groups
+    const shapes = [_][9]usize{
+        .{ 1, 2000, 9, 40, 16, 0, 0, 1, 1 }, // STFT-like
+        .{ 8, 150, 12, 3, 2, 1, 1, 1, 1 }, // strided stem
+        .{ 6, 130, 6, 9, 1, 8, 8, 2, 6 }, // dilated depthwise
+        .{ 16, 70, 8, 1, 1, 0, 0, 1, 1 }, // pointwise
+        .{ 1, 5, 3, 11, 1, 5, 5, 1, 1 }, // kernel wider than the input
+    };
+    for (shapes) |s| {
+        const c_in, const t_in, const c_out, const k, const stride, const pb, const pe, const dil, const groups = s;
+        const t_out = outLen(t_in, k, stride, pb, pe, dil);
+        const x = try t.allocator.alloc(f32, c_in * t_in);
+        defer t.allocator.free(x);
+        const w = try t.allocator.alloc(f32, c_out * (c_in / groups) * k);
+        defer t.allocator.free(w);
+        var bias: [16]f32 = undefined;
+        const want = try t.allocator.alloc(f32, c_out * t_out);
+        defer t.allocator.free(want);
+        const got = try t.allocator.alloc(f32, c_out * t_out);
+        defer t.allocator.free(got);
+        for (x) |*v| v.* = rng.float(f32) * 2 - 1;
+        for (w) |*v| v.* = rng.float(f32) * 2 - 1;
+        for (&bias) |*v| v.* = rng.float(f32) * 2 - 1;
+        conv1dRef(want, x, w, bias[0..c_out], c_in, t_in, c_out, k, stride, pb, pe, dil, groups);
+        conv1d(got, x, w, bias[0..c_out], c_in, t_in, c_out, k, stride, pb, pe, dil, groups);
+        try t.expectEqualSlices(f32, want, got);
+    }
+}
+
+test "depthwise1d is bit-identical to the grouped conv1d" {
+    var prng = std.Random.DefaultPrng.init(5);
+    const rng = prng.random();
+    const c = 6;
+    // Lengths shorter than, equal to and well past both edges, with a tail.
+    for ([_]usize{ 1, 3, 16, 17, 40, 131 }) |time| {
+        for ([_]usize{ 1, 2, 4 }) |dil| {
+            const x = try t.allocator.alloc(f32, c * time);
+            defer t.allocator.free(x);
+            const got = try t.allocator.alloc(f32, c * time);
+            defer t.allocator.free(got);
+            const want = try t.allocator.alloc(f32, c * time);
+            defer t.allocator.free(want);
+            var w: [c * 9]f32 = undefined;
+            var b: [c]f32 = undefined;
+            for (x) |*v| v.* = rng.float(f32) * 2 - 1;
+            for (&w) |*v| v.* = rng.float(f32) * 2 - 1;
+            for (&b) |*v| v.* = rng.float(f32) * 2 - 1;
+            depthwise1d(9, got, x, &w, &b, c, time, dil);
+            conv1d(want, x, &w, &b, c, time, c, 9, 1, 4 * dil, 4 * dil, dil, c);
+            try t.expectEqualSlices(f32, want, got);
+        }
+    }
+}
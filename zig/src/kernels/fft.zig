@@ -0,0 +1,236 @@
+//! Real-input FFT for the ASR frontend's STFT.
+//!
+//! `Rfft(n)` computes the n/2+1 non-negative-frequency bins of length-n real
+//! signals through an n/2-point complex mixed-radix (4, 2, 3, 5) Stockham FFT
+//! and the usual even/odd split. `forward` transforms `lanes` signals at once,
+//! one per vector lane: STFT frames are independent, so batching them across
+//! lanes vectorizes every butterfly without any shuffles.
+//!
+//! Twiddles are evaluated in f64 by `root` (a short Taylor series) instead of
+//! `@sin`/`@cos`, which bind to the host libm when libc is linked; see libm.zig.
+
+const std = @import("std");
+
+/// {cos θ, -sin θ} = exp(-iθ) for θ = 2π·j/n, accurate to a few f64 ulps.
+pub fn root(j: usize, n: usize) [2]f64 {
+    const half_pi = std.math.pi / 2.0;
+    const theta = 2.0 * std.math.pi * @as(f64, @floatFromInt(j % n)) / @as(f64, @floatFromInt(n));
+    const q = @round(theta / half_pi);
+    const x = theta - q * half_pi; // |x| <= π/4
+    const x2 = x * x;
+    var s: f64 = 0;
+    var c: f64 = 0;
+    // Horner over the Taylor terms up to x^17 (truncation < 1e-17 on |x| <= π/4).
+    var k: usize = 17;
+    while (k >= 3) : (k -= 2) {
+        const kf: f64 = @floatFromInt(k);
+        s = (s + 1.0) * -x2 / (kf * (kf - 1.0));
+        c = (c + 1.0) * -x2 / ((kf - 1.0) * (kf - 2.0));
+    }
+    s = x * (1.0 + s);
+    c = 1.0 + c;
+    return switch (@as(u2, @intCast(@as(u64, @intFromFloat(q)) % 4))) {
+        0 => .{ c, -s },
+        1 => .{ -s, -c },
+        2 => .{ -c, s },
+        3 => .{ s, c },
+    };
+}
+
+fn factor(comptime m: usize) []const usize {
+    comptime {
+        var out: []const usize = &.{};
+        var r = m;
+        for ([_]usize{ 4, 2, 3, 5 }) |p| {
+            while (r % p == 0) : (r /= p) out = out ++ [_]usize{p};
+        }
+        if (r != 1) @compileError(std.fmt.comptimePrint("Rfft: n/2 = {d} has a prime factor above 5", .{m}));
+        return out;
+    }
+}
+
+pub fn Rfft(comptime n: usize) type {
+    if (n < 4 or n % 2 != 0) @compileError("Rfft: n must be even and >= 4");
+    const m = n / 2;
+    const plan = comptime factor(m);
+
+    return struct {
+        const Self = @This();
+        pub const bins = m + 1;
+
+        /// exp(-2πi·j/n) for j in [0, n).
+        wr: [n]f32,
+        wi: [n]f32,
+
+        pub fn init() Self {
+            var self: Self = undefined;
+            for (0..n) |j| {
+                const w = root(j, n);
+                self.wr[j] = @floatCast(w[0]);
+                self.wi[j] = @floatCast(w[1]);
+            }
+            return self;
+        }
+
+        /// Bins 0..n/2 of the DFT of each lane of `x` (x[i] holds sample i of
+        /// every signal): re[k] = Σ x·cos(2πki/n), im[k] = -Σ x·sin(2πki/n).
+        pub fn forward(
+            self: *const Self,
+            comptime lanes: usize,
+            x: *const [n]@Vector(lanes, f32),
+            re: *[bins]@Vector(lanes, f32),
+            im: *[bins]@Vector(lanes, f32),
+        ) void {
+            const V = @Vector(lanes, f32);
+            var buf: [2][2][m]V = undefined;
+            // Pack even samples as the real part and odd as the imaginary one.
+            for (0..m) |j| {
+                buf[0][0][j] = x[2 * j];
+                buf[0][1][j] = x[2 * j + 1];
+            }
+            var src: usize = 0;
+            var s: usize = 1;
+            inline for (plan) |p| {
+                self.stage(p, V, s, &buf[src], &buf[1 - src]);
+                src = 1 - src;
+                s *= p;
+            }
+            const zr = &buf[src][0];
+            const zi = &buf[src][1];
+            // Split Z = FFT(even + i·odd) into the n-point spectrum:
+            // X[k] = (Z[k] + Z*[m-k]) / 2 - i·W^k (Z[k] - Z*[m-k]) / 2.
+            const half: V = @splat(0.5);
+            for (0..bins) |k| {
+                const k1 = k % m;
+                const k2 = (m - k) % m;
+                const er = (zr[k1] + zr[k2]) * half;
+                const ei = (zi[k1] - zi[k2]) * half;
+                const or_ = (zi[k1] + zi[k2]) * half;
+                const oi = (zr[k2] - zr[k1]) * half;
+                const wr: V = @splat(self.wr[k]);
+                const wi: V = @splat(self.wi[k]);
+                re[k] = er + wr * or_ - wi * oi;
+                im[k] = ei + wr * oi + wi * or_;
+            }
+        }
+
+        // One radix-p Stockham pass: s = product of the radices already applied,
+        // l = m / s the remaining sub-transform length. Output is in natural
+        // order after the last pass.
+        fn stage(self: *const Self, comptime p: usize, comptime V: type, s: usize, x: *const [2][m]V, y: *[2][m]V) void {
+            const l = m / s;
+            const q = l / p;
+            // exp(-2πi·e/p) for the p-point butterfly.
+            var cr: [p]V = undefined;
+            var ci: [p]V = undefined;
+            inline for (0..p) |e| {
+                cr[e] = @splat(self.wr[2 * e * (m / p)]);
+                ci[e] = @splat(self.wi[2 * e * (m / p)]);
+            }
+            for (0..q) |j| {
+                // Output twiddles exp(-2πi·j·u/l) = exp(-2πi·2·j·u·s/n).
+                var tr: [p]V = undefined;
+                var ti: [p]V = undefined;
+                inline for (0..p) |u| {
+                    tr[u] = @splat(self.wr[(2 * j * u * s) % n]);
+                    ti[u] = @splat(self.wi[(2 * j * u * s) % n]);
+                }
+                for (0..s) |k| {
+                    var ar: [p]V = undefined;
+                    var ai: [p]V = undefined;
+                    inline for (0..p) |r| {
+                        ar[r] = x[0][k + s * (j + r * q)];
+                        ai[r] = x[1][k + s * (j + r * q)];
+                    }
+                    var br: [p]V = undefined;
+                    var bi: [p]V = undefined;
+                    switch (p) {
+                        2 => {
+                            br = .{ ar[0] + ar[1], ar[0] - ar[1] };
+                            bi = .{ ai[0] + ai[1], ai[0] - ai[1] };
+                        },
+                        4 => {
+                            const s02r = ar[0] + ar[2];
+                            const s02i = ai[0] + ai[2];
+                            const d02r = ar[0] - ar[2];
+                            const d02i = ai[0] - ai[2];
+                            const s13r = ar[1] + ar[3];
+                            const s13i = ai[1] + ai[3];
+                            const d13r = ar[1] - ar[3];
+                            const d13i = ai[1] - ai[3];
+                            br = .{ s02r + s13r, d02r + d13i, s02r - s13r, d02r - d13i };
+                            bi = .{ s02i + s13i, d02i - d13r, s02i - s13i, d02i + d13r };
+                        },
+                        else => inline for (0..p) |u| {
+                            br[u] = ar[0];
+                            bi[u] = ai[0];
+                            inline for (1..p) |r| {
+                                const e = (r * u) % p;
+                                br[u] += ar[r] * cr[e] - ai[r] * ci[e];
+                                bi[u] += ar[r] * ci[e] + ai[r] * cr[e];
+                            }
+                        },
+                    }
+                    inline for (0..p) |u| {
+                        y[0][k + s * (p * j + u)] = br[u] * tr[u] - bi[u] * ti[u];
+                        y[1][k + s * (p * j + u)] = br[u] * ti[u] + bi[u] * tr[u];
+                    }
+                }
+            }
+        }
+    };
+}
+
+const t = std.testing;
+
+fn checkAgainstDft(comptime n: usize, comptime lanes: usize) !void {
+    const V = @Vector(lanes, f32);
+    const F = Rfft(n);
+    const fft = F.init();
+    var prng = std.Random.DefaultPrng.init(n * 31 + lanes);
+    const rnd = prng.random();
+    var x: [n]V = undefined;
+    for (&x) |*v| {
+        var a: [lanes]f32 = undefined;
+        for (&a) |*e| e.* = rnd.float(f32) * 2 - 1;
+        v.* = a;
+    }
+    var re: [F.bins]V = undefined;
+    var im: [F.bins]V = undefined;
+    fft.forward(lanes, &x, &re, &im);
+    for (0..lanes) |l| {
+        for (0..F.bins) |k| {
+            var sr: f64 = 0;
+            var si: f64 = 0;
+            for (0..n) |i| {
+                const xi: [lanes]f32 = x[i];
+                const w = root(k * i, n);
+                sr += xi[l] * w[0];
+                si += xi[l] * w[1];
+            }
+            const rk: [lanes]f32 = re[k];
+            const ik: [lanes]f32 = im[k];
+            try t.expectApproxEqAbs(sr, rk[l], 1e-5 * @as(f64, n));
+            try t.expectApproxEqAbs(si, ik[l], 1e-5 * @as(f64, n));
+        }
+    }
+}
+
+test "root matches exp(-2πij/n)" {
+    for ([_]usize{ 1, 3, 8, 400 }) |n| {
+        for (0..2 * n) |j| {
+            const th = 2.0 * std.math.pi * @as(f64, @floatFromInt(j)) / @as(f64, @floatFromInt(n));
+            const w = root(j, n);
+            try t.expectApproxEqAbs(@cos(th), w[0], 1e-14);
+            try t.expectApproxEqAbs(-@sin(th), w[1], 1e-14);
+        }
+    }
+}
+
+test "rfft matches a direct DFT" {
+    try checkAgainstDft(400, 8);
+    try checkAgainstDft(400, 1);
+    try checkAgainstDft(64, 4);
+    try checkAgainstDft(60, 2);
+    try checkAgainstDft(4, 1);
+}
@@ -11,9 +11,12 @@
 //! Layouts (batch=1):
 //!   x [seq, input], W [num_dir, 3H, input], R [num_dir, 3H, H], B [num_dir, 6H],
 //!   initial_h [num_dir, H], y [seq, num_dir, H], y_h [num_dir, H].
+//!
+//! A bidirectional `gru` runs its two directions on separate pool workers.
 
 const std = @import("std");
 const act = @import("activations.zig");
+const threads = @import("../threads.zig");
 
 inline fn dot(a: []const f32, b: []const f32) f32 {
     var s: f32 = 0;
@@ -22,7 +25,8 @@ inline fn dot(a: []const f32, b: []const f32) f32 {
 }
 
 fn runDirection(
-    alloc: std.mem.Allocator,
+    hprev: []f32, // [H] scratch
+    hnew: []f32, // [H] scratch
     y: []f32,
     y_h: []f32,
     x: []const f32,
@@ -37,11 +41,7 @@ fn runDirection(
     dir: usize,
     reverse: bool,
     seq_len: usize,
-) !void {
-    const hprev = try alloc.alloc(f32, h);
-    defer alloc.free(hprev);
-    const hnew = try alloc.alloc(f32, h);
-    defer alloc.free(hnew);
+) void {
     @memcpy(hprev, h0);
 
     const wb = b[0 .. 3 * h]; // input biases (z,r,h)
@@ -97,28 +97,107 @@ pub fn gru(
 ) !void {
     std.debug.assert(num_dir == 1 or num_dir == 2);
     std.debug.assert(seq_len <= seq);
-    const wsz = 3 * h * input;
-    const rsz = 3 * h * h;
-    const bsz = 6 * h;
-    var d: usize = 0;
-    while (d < num_dir) : (d += 1) {
-        try runDirection(
-            alloc,
-            y,
-            y_h[d * h ..][0..h],
-            x,
-            w[d * wsz ..][0..wsz],
-            r[d * rsz ..][0..rsz],
-            b[d * bsz ..][0..bsz],
-            initial_h[d * h ..][0..h],
-            seq,
-            input,
-            h,
-            num_dir,
-            d,
-            d == 1, // direction 1 is backward
-            seq_len,
-        );
+    const state = try alloc.alloc(f32, 2 * num_dir * h);
+    defer alloc.free(state);
+    const job: GruJob = .{
+        .state = state,
+        .y = y,
+        .y_h = y_h,
+        .x = x,
+        .w = w,
+        .r = r,
+        .b = b,
+        .initial_h = initial_h,
+        .seq = seq,
+        .input = input,
+        .h = h,
+        .num_dir = num_dir,
+        .seq_len = seq_len,
+    };
+    // The two directions share nothing but x, so each gets its own worker.
+    threads.parallelFor(num_dir, threads.grain(seq_len * 3 * h * (input + h)), job, GruJob.run);
+}
+
+const GruJob = struct {
+    state: []f32, // [num_dir, 2, H] hprev/hnew per direction
+    y: []f32,
+    y_h: []f32,
+    x: []const f32,
+    w: []const f32,
+    r: []const f32,
+    b: []const f32,
+    initial_h: []const f32,
+    seq: usize,
+    input: usize,
+    h: usize,
+    num_dir: usize,
+    seq_len: usize,
+
+    fn run(job: GruJob, d_begin: usize, d_end: usize) void {
+        const h = job.h;
+        const wsz = 3 * h * job.input;
+        const rsz = 3 * h * h;
+        const bsz = 6 * h;
+        for (d_begin..d_end) |d| {
+            runDirection(
+                job.state[2 * d * h ..][0..h],
+                job.state[(2 * d + 1) * h ..][0..h],
+                job.y,
+                job.y_h[d * h ..][0..h],
+                job.x,
+                job.w[d * wsz ..][0..wsz],
+                job.r[d * rsz ..][0..rsz],
+                job.b[d * bsz ..][0..bsz],
+                job.initial_h[d * h ..][0..h],
+                job.seq,
+                job.input,
+                h,
+                job.num_dir,
+                d,
+                d == 1, // direction 1 is backward
+                job.seq_len,
+            );
+        }
+    }
+};
+
+/// One forward GRU step (single direction, linear_before_reset=1) for `n`
+/// independent rows: h_out[r] = cell(x[r], h_prev[r]). Per-element arithmetic
+/// is identical to `gru(.., seq=1, num_dir=1, seq_len=1)`; gate rows are the
+/// outer loop so each weight row is reused across the whole batch while hot.
+///   x [n, input], h_prev [n, H], W [3H, input], R [3H, H], B [6H], h_out [n, H]
+pub fn cellBatch(
+    h_out: []f32,
+    x: []const f32,
+    h_prev: []const f32,
+    w: []const f32,
+    r: []const f32,
+    b: []const f32,
+    n: usize,
+    input: usize,
+    h: usize,
+) void {
+    std.debug.assert(x.len == n * input and h_prev.len == n * h and h_out.len == n * h);
+    const wb = b[0 .. 3 * h];
+    const rb = b[3 * h .. 6 * h];
+    var i: usize = 0;
+    while (i < h) : (i += 1) {
+        const wz = w[(0 * h + i) * input ..][0..input];
+        const wr = w[(1 * h + i) * input ..][0..input];
+        const wh = w[(2 * h + i) * input ..][0..input];
+        const rz = r[(0 * h + i) * h ..][0..h];
+        const rr = r[(1 * h + i) * h ..][0..h];
+        const rh = r[(2 * h + i) * h ..][0..h];
+        var row: usize = 0;
+        while (row < n) : (row += 1) {
+            const xt = x[row * input ..][0..input];
+            const hp = h_prev[row * h ..][0..h];
+            const zt = act.sigmoid(dot(wz, xt) + dot(rz, hp) + wb[0 * h + i] + rb[0 * h + i]);
+            const rt = act.sigmoid(dot(wr, xt) + dot(rr, hp) + wb[1 * h + i] + rb[1 * h + i]);
+            const rh_term = dot(rh, hp) + rb[2 * h + i];
+            const ht = act.tanh(dot(wh, xt) + rt * rh_term + wb[2 * h + i]);
+            h_out[row * h + i] = (1.0 - zt) * ht + zt * hp[i];
+        }
     }
 }
 
@@ -179,3 +258,22 @@ test "gru sequence_lens zeroes outputs past valid length" {
     try t.expectEqual(@as(f32, 0.0), y[2]); // padded step zeroed
     try t.expectApproxEqAbs(y[1], yh[0], 1e-6); // Y_h is state at last valid step
 }
+
+test "gru cellBatch matches per-row single-step gru" {
+    const alloc = t.allocator;
+    const H = 2;
+    const I = 3;
+    const w = [_]f32{ 0.1, -0.2, 0.3, 0.05, 0.4, -0.1, 0.2, 0.2, -0.3, -0.15, 0.1, 0.25, 0.3, -0.05, 0.1, 0.2, 0.1, -0.2 };
+    const r = [_]f32{ 0.05, -0.1, 0.2, 0.1, -0.05, 0.15, 0.1, 0.1, -0.2, 0.05, 0.3, -0.1 };
+    const b = [_]f32{ 0.01, -0.02, 0.03, 0.0, 0.05, -0.01, 0.02, 0.01, -0.03, 0.04, 0.0, 0.02 };
+    const x = [_]f32{ 1.0, -0.5, 2.0, 0.3, 0.7, -1.2 };
+    const h0 = [_]f32{ 0.2, -0.4, -0.1, 0.6 };
+    var got: [2 * H]f32 = undefined;
+    cellBatch(&got, &x, &h0, &w, &r, &b, 2, I, H);
+    for (0..2) |row| {
+        var y: [H]f32 = undefined;
+        var yh: [H]f32 = undefined;
+        try gru(alloc, &y, &yh, x[row * I ..][0..I], &w, &r, &b, h0[row * H ..][0..H], 1, I, H, 1, 1);
+        try t.expectEqualSlices(f32, &y, got[row * H ..][0..H]);
+    }
+}
@@ -0,0 +1,183 @@
+//! exp/log for the kernels, ported from musl (the same code Zig's compiler_rt
+//! ships): https://git.musl-libc.org/cgit/musl/tree/COPYRIGHT (MIT).
+//!
+//! The native library links libc for its worker threads, and with libc linked
+//! `@exp`/`@log` bind to the host's libm, whose last-ulp results differ between
+//! glibc versions, macOS and the libc-free wasm build. Calling these instead
+//! keeps every build computing bit-identical outputs.
+
+const std = @import("std");
+const math = std.math;
+
+pub fn expf(x_: f32) f32 {
+    const half = [_]f32{ 0.5, -0.5 };
+    const ln2hi = 6.9314575195e-1;
+    const ln2lo = 1.4286067653e-6;
+    const invln2 = 1.4426950216e+0;
+    const P1 = 1.6666625440e-1;
+    const P2 = -2.7667332906e-3;
+
+    var x = x_;
+    var hx: u32 = @bitCast(x);
+    const sign: i32 = @intCast(hx >> 31);
+    hx &= 0x7FFFFFFF;
+
+    if (math.isNan(x)) return x;
+
+    // |x| >= -87.33655 or nan
+    if (hx >= 0x42AEAC50) {
+        if (hx > 0x7F800000) return x; // nan
+        // x >= 88.722839
+        if (hx >= 0x42b17218 and sign == 0) return x * 0x1.0p127;
+        // x <= -103.972084
+        if (sign != 0 and hx >= 0x42CFF1B5) return 0;
+    }
+
+    var k: i32 = undefined;
+    var hi: f32 = undefined;
+    var lo: f32 = undefined;
+
+    // |x| > 0.5 * ln2
+    if (hx > 0x3EB17218) {
+        // |x| > 1.5 * ln2
+        if (hx > 0x3F851592) {
+            k = @intFromFloat(invln2 * x + half[@intCast(sign)]);
+        } else {
+            k = 1 - sign - sign;
+        }
+        const fk: f32 = @floatFromInt(k);
+        hi = x - fk * ln2hi;
+        lo = fk * ln2lo;
+        x = hi - lo;
+    }
+    // |x| > 2^(-14)
+    else if (hx > 0x39000000) {
+        k = 0;
+        hi = x;
+        lo = 0;
+    } else {
+        return 1 + x;
+    }
+
+    const xx = x * x;
+    const c = x - xx * (P1 + xx * P2);
+    const y = 1 + (x * c / (2 - c) - lo + hi);
+    return if (k == 0) y else math.scalbn(y, k);
+}
+
+pub fn exp(x_: f64) f64 {
+    const half = [_]f64{ 0.5, -0.5 };
+    const ln2hi: f64 = 6.93147180369123816490e-01;
+    const ln2lo: f64 = 1.90821492927058770002e-10;
+    const invln2: f64 = 1.44269504088896338700e+00;
+    const P1: f64 = 1.66666666666666019037e-01;
+    const P2: f64 = -2.77777777770155933842e-03;
+    const P3: f64 = 6.61375632143793436117e-05;
+    const P4: f64 = -1.65339022054652515390e-06;
+    const P5: f64 = 4.13813679705723846039e-08;
+
+    var x = x_;
+    const ux: u64 = @bitCast(x);
+    var hx = ux >> 32;
+    const sign: i32 = @intCast(hx >> 31);
+    hx &= 0x7FFFFFFF;
+
+    if (math.isNan(x)) return x;
+
+    // |x| >= 708.39 or nan
+    if (hx >= 0x4086232B) {
+        if (hx > 0x7FF00000) return x; // nan
+        if (x > 709.782712893383973096) return math.inf(f64);
+        if (x < -745.13321910194110842) return 0;
+    }
+
+    var k: i32 = undefined;
+    var hi: f64 = undefined;
+    var lo: f64 = undefined;
+
+    // |x| > 0.5 * ln2
+    if (hx > 0x3FD62E42) {
+        // |x| >= 1.5 * ln2
+        if (hx > 0x3FF0A2B2) {
+            k = @intFromFloat(invln2 * x + half[@intCast(sign)]);
+        } else {
+            k = 1 - sign - sign;
+        }
+        const dk: f64 = @floatFromInt(k);
+        hi = x - dk * ln2hi;
+        lo = dk * ln2lo;
+        x = hi - lo;
+    }
+    // |x| > 2^(-28)
+    else if (hx > 0x3E300000) {
+        k = 0;
+        hi = x;
+        lo = 0;
+    } else {
+        return 1 + x;
+    }
+
+    const xx = x * x;
+    const c = x - xx * (P1 + xx * (P2 + xx * (P3 + xx * (P4 + xx * P5))));
+    const y = 1 + (x * c / (2 - c) - lo + hi);
+    return if (k == 0) y else math.scalbn(y, k);
+}
+
+pub fn logf(x_: f32) f32 {
+    const ln2_hi: f32 = 6.9313812256e-01;
+    const ln2_lo: f32 = 9.0580006145e-06;
+    const Lg1: f32 = 0xaaaaaa.0p-24;
+    const Lg2: f32 = 0xccce13.0p-25;
+    const Lg3: f32 = 0x91e9ee.0p-25;
+    const Lg4: f32 = 0xf89e26.0p-26;
+
+    var x = x_;
+    var ix: u32 = @bitCast(x);
+    var k: i32 = 0;
+
+    // x < 2^(-126)
+    if (ix < 0x00800000 or ix >> 31 != 0) {
+        if (ix << 1 == 0) return -math.inf(f32); // log(+-0)
+        if (ix >> 31 != 0) return math.nan(f32); // log(-x)
+        // subnormal, scale x
+        k -= 25;
+        x *= 0x1.0p25;
+        ix = @bitCast(x);
+    } else if (ix >= 0x7F800000) {
+        return x;
+    } else if (ix == 0x3F800000) {
+        return 0;
+    }
+
+    // x into [sqrt(2) / 2, sqrt(2)]
+    ix += 0x3F800000 - 0x3F3504F3;
+    k += @as(i32, @intCast(ix >> 23)) - 0x7F;
+    ix = (ix & 0x007FFFFF) + 0x3F3504F3;
+    x = @bitCast(ix);
+
+    const f = x - 1.0;
+    const s = f / (2.0 + f);
+    const z = s * s;
+    const w = z * z;
+    const t1 = w * (Lg2 + w * Lg4);
+    const t2 = z * (Lg1 + w * Lg3);
+    const R = t2 + t1;
+    const hfsq = 0.5 * f * f;
+    const dk: f32 = @floatFromInt(k);
+    return s * (hfsq + R) + dk * ln2_lo - hfsq + f + dk * ln2_hi;
+}
+
+const t = std.testing;
+
+test "libm exp/log reference values" {
+    try t.expectEqual(@as(f32, 1), expf(0));
+    try t.expectApproxEqRel(@as(f32, 2.7182817), expf(1), 1e-7);
+    try t.expectApproxEqRel(@as(f32, 0.36787945), expf(-1), 1e-7);
+    try t.expectEqual(@as(f32, 0), expf(-200));
+    try t.expect(math.isInf(expf(100)));
+    try t.expectApproxEqRel(@as(f64, 7.38905609893065), exp(2), 1e-15);
+    try t.expectEqual(@as(f32, 0), logf(1));
+    try t.expectApproxEqRel(@as(f32, 1), logf(2.7182817), 1e-7);
+    try t.expectApproxEqRel(@as(f32, -23.02585), logf(1e-10), 1e-7);
+    try t.expect(math.isNegativeInf(logf(0)));
+}
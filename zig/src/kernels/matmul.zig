@@ -1,14 +1,27 @@
 //! Dense matmul / linear kernels. All accumulation is in f32 (matching ORT CPU
 //! MLAS). Callers round activations to f16 at the graph's cast boundaries before
 //! invoking these, so products of f16-valued operands are exact in f32.
+//!
+//! `matmul` and `linear` are cache-blocked and register-tiled: each micro-kernel
+//! keeps an MR x NR tile of outputs in vector registers, so every loaded A/x
+//! element and B/W vector feeds several multiply-adds. Tiling never changes the
+//! order in which an output accumulates its k products (sequential k for
+//! `matmul`, `dot`'s lane-strided order for `linear`), so results are
+//! bit-identical to the plain loops for any m, n, blocking or padding.
+//!
+//! Large products are split across the engine's worker pool (`threads.zig`)
+//! by output blocks, so the thread count never changes a result either.
 
 const std = @import("std");
+const threads = @import("../threads.zig");
+
+const DOT_W = 16;
 
 /// Vectorized dot product of two contiguous f32 slices (length n). Uses explicit
 /// SIMD so it stays fast even under ReleaseSmall and wasm `simd128`; the dominant
 /// cost in the projection/logits matmuls.
 pub inline fn dot(a: []const f32, b: []const f32, n: usize) f32 {
-    const W = 16;
+    const W = DOT_W;
     const Vec = @Vector(W, f32);
     var acc: Vec = @splat(0);
     var p: usize = 0;
@@ -22,40 +35,329 @@ pub inline fn dot(a: []const f32, b: []const f32, n: usize) f32 {
     return s;
 }
 
+/// Register-tile shape of the `matmul` micro-kernel: MM_R rows of C by one
+/// MM_N-wide vector of columns, accumulated over a KC-deep slice of k.
+const MM_R = 4;
+const MM_N = 16;
+const KC = 256;
+/// Below this many rows the B panel is read in place rather than packed.
+const PACK_MIN_ROWS = 8;
+const VecN = @Vector(MM_N, f32);
+
+/// Rows of C per parallel `matmul` task.
+const MM_RB = 64;
+
 /// C[m,n] = A[m,k] @ B[k,n]  (all row-major). out.len == m*n.
+/// Each C element accumulates its k products in sequential order. Large
+/// products are split into (row block, column panel) tasks on the worker pool.
 pub fn matmul(out: []f32, a: []const f32, b: []const f32, m: usize, k: usize, n: usize) void {
     std.debug.assert(a.len == m * k and b.len == k * n and out.len == m * n);
-    var i: usize = 0;
-    while (i < m) : (i += 1) {
+    if (k == 0) {
+        @memset(out, 0);
+        return;
+    }
+    const job: MatmulJob = .{ .out = out, .a = a, .b = b, .m = m, .k = k, .n = n, .row_blocks = (m + MM_RB - 1) / MM_RB };
+    const panels = (n + MM_N - 1) / MM_N;
+    threads.parallelFor(panels * job.row_blocks, threads.grain(@min(m, MM_RB) * k * MM_N), job, MatmulJob.run);
+}
+
+const MatmulJob = struct {
+    out: []f32,
+    a: []const f32,
+    b: []const f32,
+    m: usize,
+    k: usize,
+    n: usize,
+    row_blocks: usize,
+
+    // Tasks are numbered panel-major, so a contiguous range sweeps the row
+    // blocks of one B panel before moving to the next, as the serial loop does.
+    fn run(job: MatmulJob, begin: usize, end: usize) void {
+        for (begin..end) |idx| {
+            const r0 = (idx % job.row_blocks) * MM_RB;
+            const r1 = @min(r0 + MM_RB, job.m);
+            const j0 = (idx / job.row_blocks) * MM_N;
+            if (j0 + MM_N <= job.n) {
+                mmPanel(job.out, job.a, job.b, r0, r1, j0, job.k, job.n, false);
+            } else {
+                mmRemainder(job.out, job.a, job.b, r0, r1, j0, job.k, job.n, false);
+            }
+        }
+    }
+};
+
+/// Rows [r0, r1) of C = A @ B, or of C += A @ B when `accumulate` (each sum then
+/// starts from C's current value, e.g. a pre-filled bias), computed serially
+/// over every column panel. For callers that split rows across the pool
+/// themselves and post-process each block of rows while it is still in cache.
+pub fn matmulRows(out: []f32, a: []const f32, b: []const f32, r0: usize, r1: usize, k: usize, n: usize, accumulate: bool) void {
+    std.debug.assert(r1 * k <= a.len and b.len == k * n and r1 * n <= out.len);
+    if (k == 0) {
+        if (!accumulate) @memset(out[r0 * n .. r1 * n], 0);
+        return;
+    }
+    var j0: usize = 0;
+    while (j0 + MM_N <= n) : (j0 += MM_N) mmPanel(out, a, b, r0, r1, j0, k, n, accumulate);
+    if (j0 < n) mmRemainder(out, a, b, r0, r1, j0, k, n, accumulate);
+}
+
+/// C[r0..r1, j0..j0+MM_N] for one full-width column panel of B.
+fn mmPanel(out: []f32, a: []const f32, b: []const f32, r0: usize, r1: usize, j0: usize, k: usize, n: usize, accumulate: bool) void {
+    // B panels of KC x MM_N are packed contiguously so the micro-kernel streams
+    // them from L1 while sweeping every row block of A.
+    var panel: [KC * MM_N]f32 = undefined;
+    const pack = r1 - r0 >= PACK_MIN_ROWS;
+    var p0: usize = 0;
+    while (p0 < k) : (p0 += KC) {
+        const kc = @min(KC, k - p0);
+        var bp: []const f32 = b[p0 * n + j0 ..];
+        var stride = n;
+        if (pack) {
+            for (0..kc) |p| panel[p * MM_N ..][0..MM_N].* = b[(p0 + p) * n + j0 ..][0..MM_N].*;
+            bp = &panel;
+            stride = MM_N;
+        }
+        var i = r0;
+        const resume_c = p0 > 0 or accumulate;
+        while (i + MM_R <= r1) : (i += MM_R) mmTile(MM_R, out, a, bp, stride, i, j0, resume_c, p0, kc, k, n);
+        while (i < r1) : (i += 1) mmTile(1, out, a, bp, stride, i, j0, resume_c, p0, kc, k, n);
+    }
+}
+
+/// Leftover columns (n % MM_N), e.g. the single-column energy projection.
+fn mmRemainder(out: []f32, a: []const f32, b: []const f32, r0: usize, r1: usize, j0: usize, k: usize, n: usize, accumulate: bool) void {
+    for (r0..r1) |i| {
         const arow = a[i * k ..][0..k];
-        const crow = out[i * n ..][0..n];
-        @memset(crow, 0);
+        const crow = out[i * n + j0 .. (i + 1) * n];
+        if (!accumulate) @memset(crow, 0);
         var p: usize = 0;
         while (p < k) : (p += 1) {
             const av = arow[p];
-            const brow = b[p * n ..][0..n];
-            var j: usize = 0;
-            while (j < n) : (j += 1) crow[j] += av * brow[j];
+            const brow = b[p * n + j0 ..][0..crow.len];
+            for (crow, brow) |*c, bv| c.* += av * bv;
         }
     }
 }
 
+/// C[row0..row0+R, j0..j0+MM_N] (+)= A[row0.., p0..p0+kc] @ Bpanel. Without
+/// `resume_c` the sums start from zero; otherwise (later k slices, or an
+/// accumulating call) they resume from the values in C, which round exactly as
+/// the register accumulators would.
+inline fn mmTile(
+    comptime R: usize,
+    out: []f32,
+    a: []const f32,
+    bp: []const f32,
+    stride: usize,
+    row0: usize,
+    j0: usize,
+    resume_c: bool,
+    p0: usize,
+    kc: usize,
+    k: usize,
+    n: usize,
+) void {
+    var acc: [R]VecN = undefined;
+    inline for (0..R) |r| acc[r] = if (resume_c) out[(row0 + r) * n + j0 ..][0..MM_N].* else @splat(0);
+    for (0..kc) |p| {
+        const bv: VecN = bp[p * stride ..][0..MM_N].*;
+        inline for (0..R) |r| {
+            const av: VecN = @splat(a[(row0 + r) * k + p0 + p]);
+            acc[r] += av * bv;
+        }
+    }
+    inline for (0..R) |r| out[(row0 + r) * n + j0 ..][0..MM_N].* = acc[r];
+}
+
+/// Register-tile shape of the `linear` micro-kernel (rows of x by rows of W),
+/// and how many W rows stay cache-resident while all x rows sweep over them.
+const LIN_R = 4;
+const LIN_C = 2;
+const LIN_NB = 64;
+
+/// Rows of y per parallel `linear` task.
+const LIN_RB = 16;
+
 /// y[m,n] = x[m,k] @ W[n,k]^T + bias[n]   (PyTorch/ONNX Linear; W row-major [n,k]).
-/// bias may be null. Accumulated in f32 with sequential k order.
+/// bias may be null. Each output is accumulated exactly as `dot` would. Large
+/// products are split into (row block, W block) tasks on the worker pool.
 pub fn linear(out: []f32, x: []const f32, w: []const f32, bias: ?[]const f32, m: usize, k: usize, n: usize) void {
     std.debug.assert(x.len == m * k and w.len == n * k and out.len == m * n);
-    var i: usize = 0;
-    while (i < m) : (i += 1) {
-        const xrow = x[i * k ..][0..k];
-        const orow = out[i * n ..][0..n];
-        var j: usize = 0;
-        while (j < n) : (j += 1) {
-            const acc = dot(xrow, w[j * k ..][0..k], k);
-            orow[j] = if (bias) |bb| acc + bb[j] else acc;
+    const job: LinearJob = .{ .out = out, .x = x, .w = w, .bias = bias, .m = m, .k = k, .n = n, .row_blocks = (m + LIN_RB - 1) / LIN_RB };
+    const col_blocks = (n + LIN_NB - 1) / LIN_NB;
+    threads.parallelFor(col_blocks * job.row_blocks, threads.grain(@min(m, LIN_RB) * k * LIN_NB), job, LinearJob.run);
+}
+
+const LinearJob = struct {
+    out: []f32,
+    x: []const f32,
+    w: []const f32,
+    bias: ?[]const f32,
+    m: usize,
+    k: usize,
+    n: usize,
+    row_blocks: usize,
+
+    // Numbered W-block-major: each block of W rows stays cache-resident while
+    // the x rows of a contiguous task range sweep over it.
+    fn run(job: LinearJob, begin: usize, end: usize) void {
+        for (begin..end) |idx| {
+            const r0 = (idx % job.row_blocks) * LIN_RB;
+            const r1 = @min(r0 + LIN_RB, job.m);
+            const jb = (idx / job.row_blocks) * LIN_NB;
+            const je = @min(jb + LIN_NB, job.n);
+            var i = r0;
+            while (i + LIN_R <= r1) : (i += LIN_R) linRows(LIN_R, job.out, job.x, job.w, job.bias, i, jb, je, job.k, job.n);
+            while (i < r1) : (i += 1) linRows(1, job.out, job.x, job.w, job.bias, i, jb, je, job.k, job.n);
+        }
+    }
+};
+
+inline fn linRows(
+    comptime R: usize,
+    out: []f32,
+    x: []const f32,
+    w: []const f32,
+    bias: ?[]const f32,
+    row0: usize,
+    jb: usize,
+    je: usize,
+    k: usize,
+    n: usize,
+) void {
+    var j = jb;
+    while (j + LIN_C <= je) : (j += LIN_C) linTile(R, LIN_C, out, x, w, bias, row0, j, k, n);
+    while (j < je) : (j += 1) linTile(R, 1, out, x, w, bias, row0, j, k, n);
+}
+
+/// R x C outputs, each a `dot` of an x row and a W row with the same 16-lane
+/// accumulation, lane reduction and scalar tail.
+inline fn linTile(
+    comptime R: usize,
+    comptime C: usize,
+    out: []f32,
+    x: []const f32,
+    w: []const f32,
+    bias: ?[]const f32,
+    row0: usize,
+    j0: usize,
+    k: usize,
+    n: usize,
+) void {
+    const W = DOT_W;
+    const Vec = @Vector(W, f32);
+    var acc: [R][C]Vec = undefined;
+    inline for (0..R) |r| inline for (0..C) |c| {
+        acc[r][c] = @splat(0);
+    };
+    var p: usize = 0;
+    while (p + W <= k) : (p += W) {
+        var xv: [R]Vec = undefined;
+        inline for (0..R) |r| xv[r] = x[(row0 + r) * k + p ..][0..W].*;
+        inline for (0..C) |c| {
+            const wv: Vec = w[(j0 + c) * k + p ..][0..W].*;
+            inline for (0..R) |r| acc[r][c] += xv[r] * wv;
         }
     }
+    inline for (0..R) |r| inline for (0..C) |c| {
+        var s: f32 = @reduce(.Add, acc[r][c]);
+        var q = p;
+        while (q < k) : (q += 1) s += x[(row0 + r) * k + q] * w[(j0 + c) * k + q];
+        out[(row0 + r) * n + j0 + c] = if (bias) |bb| s + bb[j0 + c] else s;
+    };
 }
 
+/// Best score and its W row within one block of W rows.
+const ArgBest = struct { v: f32, j: u32 };
+
+/// ids[i] = argmax_j x[i,:] . W[j,:] for each of the m rows of x (W row-major
+/// [n,k]): the index `reduce.argmax` picks from the row `linear` would write,
+/// first max winning, without materializing the m x n products. Blocks of
+/// LIN_NB W rows are scored with `linear`'s micro-kernel, so every score is
+/// bit-identical to its `linear` output, and are split across the worker
+/// pool; each block's winner per row is then combined in block order.
+/// `candidates`, when given, is an ascending list of W rows to restrict j to.
+pub fn linearArgmax(
+    alloc: std.mem.Allocator,
+    ids: []usize,
+    x: []const f32,
+    w: []const f32,
+    m: usize,
+    k: usize,
+    n: usize,
+    candidates: ?[]const u32,
+) !void {
+    std.debug.assert(ids.len == m and x.len == m * k and w.len == n * k);
+    const count = if (candidates) |c| c.len else n;
+    std.debug.assert(count > 0);
+    const blocks = (count + LIN_NB - 1) / LIN_NB;
+    const best = try alloc.alloc(ArgBest, blocks * m);
+    defer alloc.free(best);
+    const job: ArgmaxJob = .{ .best = best, .x = x, .w = w, .m = m, .k = k, .n = n, .candidates = candidates };
+    threads.parallelFor(blocks, threads.grain(m * k * LIN_NB), job, ArgmaxJob.run);
+    for (0..m) |i| {
+        var b = best[i];
+        for (1..blocks) |blk| {
+            const c = best[blk * m + i];
+            if (c.v > b.v) b = c;
+        }
+        ids[i] = b.j;
+    }
+}
+
+const ArgmaxJob = struct {
+    best: []ArgBest, // [blocks, m]
+    x: []const f32,
+    w: []const f32,
+    m: usize,
+    k: usize,
+    n: usize,
+    candidates: ?[]const u32,
+
+    fn run(job: ArgmaxJob, begin: usize, end: usize) void {
+        const k = job.k;
+        for (begin..end) |blk| {
+            const best = job.best[blk * job.m ..][0..job.m];
+            const jb = blk * LIN_NB;
+            if (job.candidates) |cand| {
+                // Scattered W rows: one `dot` each, which `linear` matches.
+                const ids = cand[jb..@min(jb + LIN_NB, cand.len)];
+                for (best, 0..) |*b, i| {
+                    const xr = job.x[i * k ..][0..k];
+                    b.* = .{ .v = dot(xr, job.w[ids[0] * k ..][0..k], k), .j = ids[0] };
+                    for (ids[1..]) |j| {
+                        const v = dot(xr, job.w[j * k ..][0..k], k);
+                        if (v > b.v) b.* = .{ .v = v, .j = j };
+                    }
+                }
+                continue;
+            }
+            const cols = @min(LIN_NB, job.n - jb);
+            const wb = job.w[jb * k ..][0 .. cols * k];
+            var scores: [LIN_R * LIN_NB]f32 = undefined;
+            var i: usize = 0;
+            while (i < job.m) {
+                const rows = @min(LIN_R, job.m - i);
+                const xb = job.x[i * k ..][0 .. rows * k];
+                if (rows == LIN_R) {
+                    linRows(LIN_R, &scores, xb, wb, null, 0, 0, cols, k, LIN_NB);
+                } else {
+                    for (0..rows) |r| linRows(1, &scores, xb, wb, null, r, 0, cols, k, LIN_NB);
+                }
+                for (0..rows) |r| {
+                    const row = scores[r * LIN_NB ..][0..cols];
+                    var b: ArgBest = .{ .v = row[0], .j = @intCast(jb) };
+                    for (row[1..], 1..) |v, c| {
+                        if (v > b.v) b = .{ .v = v, .j = @intCast(jb + c) };
+                    }
+                    best[i + r] = b;
+                }
+                i += rows;
+            }
+        }
+    }
+};
+
 /// General matmul with optional transpose of B: if trans_b, B is [n,k] and
 /// C[m,n] = A[m,k] @ B^T; else B is [k,n] and C = A @ B. alpha/beta + optional
 /// C add (broadcast row vector of length n) cover ONNX Gemm.
@@ -121,3 +423,176 @@ test "gemm trans_b matches linear" {
     linear(&l, &x, &w, null, 2, 3, 2);
     try t.expectEqualSlices(f32, &l, &g);
 }
+
+fn matmulRef(out: []f32, a: []const f32, b: []const f32, m: usize, k: usize, n: usize) void {
+    for (0..m) |i| {
+        const crow = out[i * n ..][0..n];
+        @memset(crow, 0);
+        for (0..k) |p| {
+            for (0..n) |j| crow[j] += a[i * k + p] * b[p * n + j];
+        }
+    }
+}
+
+fn fillRandom(rng: std.Random, buf: []f32) void {
+    for (buf) |*v| v.* = rng.float(f32) * 2 - 1;
+}
+
+test "blocked matmul is bit-identical to the plain loop" {
+    var prng = std.Random.DefaultPrng.init(7);
+    const rng = prng.random();
+    // Cover row/column remainders, packed and unpacked panels, and k > KC.
+    const shapes = [_][3]usize{ .{ 1, 5, 1 }, .{ 3, 17, 33 }, .{ 9, 64, 48 }, .{ 13, 300, 35 }, .{ 8, 513, 16 }, .{ 4, 0, 16 } };
+    for (shapes) |s| {
+        const m, const k, const n = s;
+        const a = try t.allocator.alloc(f32, m * k);
+        defer t.allocator.free(a);
+        const b = try t.allocator.alloc(f32, k * n);
+        defer t.allocator.free(b);
+        const got = try t.allocator.alloc(f32, m * n);
+        defer t.allocator.free(got);
+        const want = try t.allocator.alloc(f32, m * n);
+        defer t.allocator.free(want);
+        fillRandom(rng, a);
+        fillRandom(rng, b);
+        matmul(got, a, b, m, k, n);
+        matmulRef(want, a, b, m, k, n);
+        try t.expectEqualSlices(f32, want, got);
+    }
+}
+
+test "accumulating matmulRows resumes each sum from C" {
+    var prng = std.Random.DefaultPrng.init(11);
+    const rng = prng.random();
+    const m, const k, const n = .{ 21, 300, 37 };
+    const a = try t.allocator.alloc(f32, m * k);
+    defer t.allocator.free(a);
+    const b = try t.allocator.alloc(f32, k * n);
+    defer t.allocator.free(b);
+    const bias = try t.allocator.alloc(f32, m);
+    defer t.allocator.free(bias);
+    const got = try t.allocator.alloc(f32, m * n);
+    defer t.allocator.free(got);
+    const want = try t.allocator.alloc(f32, m * n);
+    defer t.allocator.free(want);
+    fillRandom(rng, a);
+    fillRandom(rng, b);
+    fillRandom(rng, bias);
+    // want: a bias-first loop, the order a pointwise conv1d accumulates in
+    for (0..m) |i| {
+        @memset(want[i * n ..][0..n], bias[i]);
+        for (0..k) |p| {
+            for (0..n) |j| want[i * n + j] += a[i * k + p] * b[p * n + j];
+        }
+    }
+    for (0..m) |i| @memset(got[i * n ..][0..n], bias[i]);
+    matmulRows(got, a, b, 0, 8, k, n, true);
+    matmulRows(got, a, b, 8, m, k, n, true);
+    try t.expectEqualSlices(f32, want, got);
+    // Without accumulate the rows are overwritten, as in `matmul`.
+    matmulRows(got, a, b, 0, m, k, n, false);
+    matmulRef(want, a, b, m, k, n);
+    try t.expectEqualSlices(f32, want, got);
+}
+
+test "tiled linear is bit-identical to one dot per output" {
+    var prng = std.Random.DefaultPrng.init(11);
+    const rng = prng.random();
+    const shapes = [_][3]usize{ .{ 1, 7, 3 }, .{ 3, 40, 70 }, .{ 5, 256, 131 }, .{ 2, 15, 4 } };
+    for (shapes) |s| {
+        const m, const k, const n = s;
+        const x = try t.allocator.alloc(f32, m * k);
+        defer t.allocator.free(x);
+        const w = try t.allocator.alloc(f32, n * k);
+        defer t.allocator.free(w);
+        const bias = try t.allocator.alloc(f32, n);
+        defer t.allocator.free(bias);
+        const got = try t.allocator.alloc(f32, m * n);
+        defer t.allocator.free(got);
+        fillRandom(rng, x);
+        fillRandom(rng, w);
+        fillRandom(rng, bias);
+        linear(got, x, w, bias, m, k, n);
+        for (0..m) |i| for (0..n) |j| {
+            try t.expectEqual(dot(x[i * k ..][0..k], w[j * k ..][0..k], k) + bias[j], got[i * n + j]);
+        };
+    }
+}
+
+test "matmul and linear are bit-identical across pool sizes" {
+    defer threads.setNumThreads(0);
+    var prng = std.Random.DefaultPrng.init(13);
+    const rng = prng.random();
+    const m = 150;
+    const k = 256;
+    const n = 200;
+    const a = try t.allocator.alloc(f32, m * k);
+    defer t.allocator.free(a);
+    const b = try t.allocator.alloc(f32, k * n);
+    defer t.allocator.free(b);
+    const want = try t.allocator.alloc(f32, m * n);
+    defer t.allocator.free(want);
+    const got = try t.allocator.alloc(f32, m * n);
+    defer t.allocator.free(got);
+    fillRandom(rng, a);
+    fillRandom(rng, b);
+
+    threads.setNumThreads(1);
+    matmul(want, a, b, m, k, n);
+    threads.setNumThreads(4);
+    matmul(got, a, b, m, k, n);
+    try t.expectEqualSlices(f32, want, got);
+
+    // b doubles as a [n, k] weight for linear.
+    threads.setNumThreads(1);
+    linear(want, a, b, null, m, k, n);
+    threads.setNumThreads(4);
+    linear(got, a, b, null, m, k, n);
+    try t.expectEqualSlices(f32, want, got);
+}
+
+test "linearArgmax picks linear's argmax, first max winning, with and without candidates" {
+    defer threads.setNumThreads(0);
+    const argmax = @import("reduce.zig").argmax;
+    var prng = std.Random.DefaultPrng.init(17);
+    const rng = prng.random();
+    const shapes = [_][3]usize{ .{ 1, 7, 3 }, .{ 6, 40, 200 }, .{ 9, 224, 1000 } };
+    for (shapes) |s| {
+        const m, const k, const n = s;
+        const x = try t.allocator.alloc(f32, m * k);
+        defer t.allocator.free(x);
+        const w = try t.allocator.alloc(f32, n * k);
+        defer t.allocator.free(w);
+        const logits = try t.allocator.alloc(f32, m * n);
+        defer t.allocator.free(logits);
+        const ids = try t.allocator.alloc(usize, m);
+        defer t.allocator.free(ids);
+        fillRandom(rng, x);
+        fillRandom(rng, w);
+        // Duplicate rows tie on every x; the first copy must win.
+        if (n > 150) {
+            @memcpy(w[130 * k ..][0..k], w[10 * k ..][0..k]);
+            @memcpy(w[(n - 1) * k ..][0..k], w[10 * k ..][0..k]);
+            @memcpy(x[0..k], w[10 * k ..][0..k]);
+        }
+        linear(logits, x, w, null, m, k, n);
+        for ([_]usize{ 1, 4 }) |nt| {
+            threads.setNumThreads(nt);
+            try linearArgmax(t.allocator, ids, x, w, m, k, n, null);
+            for (0..m) |i| try t.expectEqual(argmax(logits[i * n ..][0..n]), ids[i]);
+        }
+
+        var cand: std.ArrayList(u32) = .empty;
+        defer cand.deinit(t.allocator);
+        var j: u32 = 0;
+        while (j < n) : (j += 3) try cand.append(t.allocator, j);
+        try linearArgmax(t.allocator, ids, x, w, m, k, n, cand.items);
+        for (0..m) |i| {
+            var want: u32 = cand.items[0];
+            for (cand.items) |c| {
+                if (logits[i * n + c] > logits[i * n + want]) want = c;
+            }
+            try t.expectEqual(@as(usize, want), ids[i]);
+        }
+    }
+}
@@ -2,6 +2,7 @@
 //! with max-subtraction for numerical stability (matching ORT).
 
 const std = @import("std");
+const libm = @import("libm.zig");
 
 /// In-place softmax over each row of length n. Optional boolean mask (len n,
 /// shared across rows): masked-out (false) positions get probability 0 by
@@ -16,7 +17,7 @@ pub fn softmaxRow(row: []f32, mask: ?[]const bool) void {
     for (row, 0..) |*v, i| {
         const keep = if (mask) |mm| mm[i] else true;
         if (keep) {
-            const e = @exp(v.* - m);
+            const e = libm.expf(v.* - m);
             v.* = e;
             sum += e;
         } else {
@@ -41,8 +42,8 @@ pub fn logSoftmaxRow(row: []f32) void {
         if (v > m) m = v;
     }
     var sum: f32 = 0;
-    for (row) |v| sum += @exp(v - m);
-    const lse = m + @log(sum);
+    for (row) |v| sum += libm.expf(v - m);
+    const lse = m + libm.logf(sum);
     for (row) |*v| v.* = v.* - lse;
 }
 
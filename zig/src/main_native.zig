@@ -1,35 +1,85 @@
 //! Native C-ABI surface consumed by the Python ctypes shim (python/src/hama/_engine.py).
 //!
-//! The host drives the autoregressive G2P loop (matching the current runtime);
-//! the engine exposes the encoder, a single decoder step, and the ASR forward.
+//! The engine exposes the encoder, a single decoder step, the fused G2P greedy
+//! loop (encoder + every decoder step in one call), and the ASR forward.
 //! All output buffers are caller-allocated to known sizes (the host computes T):
 //!   encoder: eo[T*192] pk[T*96] hidden[2*96] mask[T] prev[T]
 //!   decoder: *next *attn_argmax hidden_out[2*96] prev_out[T]
+//!   g2p:     tokens[max_steps] attns[max_steps]
+//!   g2p batch: tokens[B*max_steps] attns[B*max_steps] counts[B]
 //!   asr:     log_probs[T*191] *out_length   (T = hama_asr_num_frames(N))
+//!   asr batch: log_probs[sum(T_i)*191] out_lengths[B]
+//!   asr greedy: frame_ids[T] tokens[T] token_frames[T] *n_tokens [log_probs[T*191]]
+//!   p2g:     out[max_new] [out_align[max_new]]
+//!   p2g batch: out[B*stride] [out_align[B*stride]] counts[B]
+//!   p2g incremental: kc[4*416*224] vc[4*416*224] (caller-owned, kept across calls)
+//!
+//! Every `hama_*_load(data, len)` has a `hama_*_load_path(path)` twin that
+//! memory-maps the `.hama` file instead of taking a host-side copy. ASR and P2G
+//! handles keep the mapping and borrow f32 weights from it in place, so forked
+//! workers share one page-cache copy; G2P handles unmap once loaded. f16
+//! weights, which is every tensor of the shipped assets, are still upcast into
+//! private memory at load.
+//!
+//! Thread safety: a handle is read-only once loaded. Every run/step/greedy
+//! entry point takes it by `*const` and borrows its scratch arena from the
+//! handle's pool for the duration of the call, so any number of threads may
+//! call into the same handle concurrently. Only `hama_*_free` must not overlap
+//! other calls on the handle.
+//!
+//! Scratch arenas are reset with their capacity retained between calls (the
+//! fused G2P entry points use the decoder handle's pool), so steady-state
+//! calls make no allocator syscalls. P2G arenas start pre-sized and
+//! pre-faulted for a full-length decode (`P2g.SCRATCH_BYTES`), so each
+//! concurrent caller's first request is already allocation-free too.
+//! `hama_*_scratch_peak` reports the largest arena a call has needed and
+//! `hama_*_scratch_trim` frees the idle ones.
+//!
+//! Large kernels inside a call (conv channels, matmul/linear blocks, attention
+//! heads, GRU directions) are split across one process-wide worker pool sized
+//! with `hama_set_num_threads` (0 = one thread per CPU, the default). Results
+//! are bit-identical for every pool size.
 
 const std = @import("std");
 const pkg = @import("pkg.zig");
+const scratch = @import("scratch.zig");
+const threads = @import("threads.zig");
 const Enc = @import("models/g2p_encoder.zig");
 const Dec = @import("models/g2p_decoder.zig");
+const G2p = @import("models/g2p.zig");
 const Asr = @import("models/asr.zig");
 const P2g = @import("models/p2g.zig");
 
 const galloc = std.heap.page_allocator;
 
-const EncoderHandle = struct { model: Enc.Encoder };
-const DecoderHandle = struct { model: Dec.Decoder };
-const AsrHandle = struct { model: Asr.Asr };
-const P2gHandle = struct { model: P2g.P2G };
+// `scratch` sits behind a pointer so the handles stay `*const` on the run path.
+const EncoderHandle = struct { model: Enc.Encoder, scratch: *scratch.Pool };
+const DecoderHandle = struct { model: Dec.Decoder, scratch: *scratch.Pool };
+const AsrHandle = struct { model: Asr.Asr, scratch: *scratch.Pool, mapped: ?pkg.MappedFile = null };
+const P2gHandle = struct { model: P2g.P2G, scratch: *scratch.Pool, mapped: ?pkg.MappedFile = null };
 
 export fn hama_version() u32 {
     return 1;
 }
 
+/// Size the intra-op worker pool (threads per call, including the caller).
+/// 0 restores the default of one per CPU; 1 runs every kernel inline.
+export fn hama_set_num_threads(n: i64) void {
+    threads.setNumThreads(@intCast(@max(n, 0)));
+}
+
+export fn hama_get_num_threads() i64 {
+    return @intCast(threads.numThreads());
+}
+
 fn loadEncoder(data: [*]const u8, len: usize) !*EncoderHandle {
     var p = try pkg.parse(galloc, data[0..len]);
     defer p.deinit();
     const h = try galloc.create(EncoderHandle);
-    h.model = try Enc.Encoder.init(galloc, &p);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    h.* = .{ .model = try Enc.Encoder.init(galloc, &p), .scratch = pool };
     return h;
 }
 
@@ -37,15 +87,37 @@ export fn hama_encoder_load(data: [*]const u8, len: usize) ?*EncoderHandle {
     return loadEncoder(data, len) catch null;
 }
 
+fn loadEncoderPath(path: [*:0]const u8) !*EncoderHandle {
+    var mapped = try pkg.MappedFile.open(std.mem.span(path));
+    defer mapped.close();
+    const bytes = mapped.bytes();
+    return loadEncoder(bytes.ptr, bytes.len);
+}
+
+export fn hama_encoder_load_path(path: [*:0]const u8) ?*EncoderHandle {
+    return loadEncoderPath(path) catch null;
+}
+
 export fn hama_encoder_free(h: ?*EncoderHandle) void {
     if (h) |hh| {
         hh.model.deinit();
+        hh.scratch.destroy();
         galloc.destroy(hh);
     }
 }
 
+/// Largest scratch arena (bytes) a single call on this handle has needed.
+export fn hama_encoder_scratch_peak(h: *const EncoderHandle) u64 {
+    return h.scratch.peakBytes();
+}
+
+/// Return the handle's idle scratch arenas to the OS.
+export fn hama_encoder_scratch_trim(h: *const EncoderHandle) void {
+    h.scratch.trim();
+}
+
 export fn hama_encoder_run(
-    h: *EncoderHandle,
+    h: *const EncoderHandle,
     ids: [*]const i64,
     t: i64,
     length: i64,
@@ -56,8 +128,8 @@ export fn hama_encoder_run(
     prev: [*]f32,
 ) i32 {
     const T: usize = @intCast(t);
-    var arena = std.heap.ArenaAllocator.init(galloc);
-    defer arena.deinit();
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
     const out: Enc.EncOut = .{
         .encoder_outputs = eo[0 .. T * Enc.D2],
         .projected_keys = pk[0 .. T * Enc.H],
@@ -65,7 +137,7 @@ export fn hama_encoder_run(
         .encoder_mask = mask[0..T],
         .prev_attn = prev[0..T],
     };
-    h.model.forward(arena.allocator(), ids[0..T], @intCast(length), out) catch return -1;
+    h.model.forward(slot.allocator(), ids[0..T], @intCast(length), out) catch return -1;
     return 0;
 }
 
@@ -73,7 +145,10 @@ fn loadDecoder(data: [*]const u8, len: usize) !*DecoderHandle {
     var p = try pkg.parse(galloc, data[0..len]);
     defer p.deinit();
     const h = try galloc.create(DecoderHandle);
-    h.model = try Dec.Decoder.init(galloc, &p);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    h.* = .{ .model = try Dec.Decoder.init(galloc, &p), .scratch = pool };
     return h;
 }
 
@@ -81,15 +156,37 @@ export fn hama_decoder_load(data: [*]const u8, len: usize) ?*DecoderHandle {
     return loadDecoder(data, len) catch null;
 }
 
+fn loadDecoderPath(path: [*:0]const u8) !*DecoderHandle {
+    var mapped = try pkg.MappedFile.open(std.mem.span(path));
+    defer mapped.close();
+    const bytes = mapped.bytes();
+    return loadDecoder(bytes.ptr, bytes.len);
+}
+
+export fn hama_decoder_load_path(path: [*:0]const u8) ?*DecoderHandle {
+    return loadDecoderPath(path) catch null;
+}
+
 export fn hama_decoder_free(h: ?*DecoderHandle) void {
     if (h) |hh| {
         hh.model.deinit();
+        hh.scratch.destroy();
         galloc.destroy(hh);
     }
 }
 
+/// Largest scratch arena (bytes) a single call on this handle has needed.
+export fn hama_decoder_scratch_peak(h: *const DecoderHandle) u64 {
+    return h.scratch.peakBytes();
+}
+
+/// Return the handle's idle scratch arenas to the OS.
+export fn hama_decoder_scratch_trim(h: *const DecoderHandle) void {
+    h.scratch.trim();
+}
+
 export fn hama_decoder_step(
-    h: *DecoderHandle,
+    h: *const DecoderHandle,
     token: i64,
     eo: [*]const f32,
     pk: [*]const f32,
@@ -104,8 +201,8 @@ export fn hama_decoder_step(
     prev_out: [*]f32,
 ) i32 {
     const T: usize = @intCast(t);
-    var arena = std.heap.ArenaAllocator.init(galloc);
-    defer arena.deinit();
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
     const out: Dec.DecOut = .{
         .next_token_id = next_token,
         .attn_argmax = attn_argmax,
@@ -113,7 +210,7 @@ export fn hama_decoder_step(
         .prev_attn_out = prev_out[0..T],
     };
     h.model.step(
-        arena.allocator(),
+        slot.allocator(),
         token,
         eo[0 .. T * Dec.CTX],
         pk[0 .. T * Dec.H],
@@ -126,11 +223,68 @@ export fn hama_decoder_step(
     return 0;
 }
 
+/// Fused G2P greedy decode over an encoder + decoder handle pair: encodes
+/// ids[0..t] (`length` valid) and runs the decoder loop from `sos` until `eos`
+/// or `max_steps`. Fills tokens/attns[0..n] (EOS included when reached) and
+/// returns n, or -1 on failure.
+export fn hama_g2p_greedy(
+    enc: *const EncoderHandle,
+    dec: *const DecoderHandle,
+    ids: [*]const i64,
+    t: i64,
+    length: i64,
+    sos: i64,
+    eos: i64,
+    max_steps: i64,
+    tokens: [*]i64,
+    attns: [*]i64,
+) i64 {
+    const T: usize = @intCast(t);
+    const ms: usize = @intCast(max_steps);
+    const slot = dec.scratch.acquire() catch return -1;
+    defer dec.scratch.release(slot);
+    const n = G2p.greedy(&enc.model, &dec.model, slot.allocator(), ids[0..T], @intCast(length), sos, eos, tokens[0..ms], attns[0..ms]) catch return -1;
+    return @intCast(n);
+}
+
+/// Batched fused greedy: `ids` is [B, T] padded, `lengths` [B]. Row b's steps
+/// land in tokens/attns[b*max_steps ..][0..counts[b]]. Returns 0, or -1 on failure.
+export fn hama_g2p_greedy_batch(
+    enc: *const EncoderHandle,
+    dec: *const DecoderHandle,
+    ids: [*]const i64,
+    b: i64,
+    t: i64,
+    lengths: [*]const i64,
+    sos: i64,
+    eos: i64,
+    max_steps: i64,
+    tokens: [*]i64,
+    attns: [*]i64,
+    counts: [*]i64,
+) i32 {
+    const B: usize = @intCast(b);
+    const T: usize = @intCast(t);
+    const ms: usize = @intCast(max_steps);
+    const slot = dec.scratch.acquire() catch return -1;
+    defer dec.scratch.release(slot);
+    const a = slot.allocator();
+    const lens = a.alloc(usize, B) catch return -1;
+    for (0..B) |i| lens[i] = @intCast(lengths[i]);
+    const ns = a.alloc(usize, B) catch return -1;
+    G2p.greedyBatch(&enc.model, &dec.model, a, ids[0 .. B * T], lens, sos, eos, ms, tokens[0 .. B * ms], attns[0 .. B * ms], ns) catch return -1;
+    for (0..B) |i| counts[i] = @intCast(ns[i]);
+    return 0;
+}
+
 fn loadAsr(data: [*]const u8, len: usize) !*AsrHandle {
     var p = try pkg.parse(galloc, data[0..len]);
     defer p.deinit();
     const h = try galloc.create(AsrHandle);
-    h.model = try Asr.Asr.init(galloc, &p);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    h.* = .{ .model = try Asr.Asr.init(galloc, &p), .scratch = pool };
     return h;
 }
 
@@ -138,33 +292,247 @@ export fn hama_asr_load(data: [*]const u8, len: usize) ?*AsrHandle {
     return loadAsr(data, len) catch null;
 }
 
+fn loadAsrPath(path: [*:0]const u8) !*AsrHandle {
+    var mapped = try pkg.MappedFile.open(std.mem.span(path));
+    errdefer mapped.close();
+    var p = try pkg.parse(galloc, mapped.bytes());
+    defer p.deinit();
+    p.pinned = true; // the handle owns the mapping
+    const h = try galloc.create(AsrHandle);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    h.* = .{ .model = try Asr.Asr.init(galloc, &p), .scratch = pool, .mapped = mapped };
+    return h;
+}
+
+export fn hama_asr_load_path(path: [*:0]const u8) ?*AsrHandle {
+    return loadAsrPath(path) catch null;
+}
+
 export fn hama_asr_free(h: ?*AsrHandle) void {
     if (h) |hh| {
         hh.model.deinit();
+        hh.scratch.destroy();
+        if (hh.mapped) |*m| m.close();
         galloc.destroy(hh);
     }
 }
 
+/// Largest scratch arena (bytes) a single call on this handle has needed.
+export fn hama_asr_scratch_peak(h: *const AsrHandle) u64 {
+    return h.scratch.peakBytes();
+}
+
+/// Return the handle's idle scratch arenas to the OS.
+export fn hama_asr_scratch_trim(h: *const AsrHandle) void {
+    h.scratch.trim();
+}
+
 export fn hama_asr_num_frames(n: i64) i64 {
     const stft = @min(@as(usize, @intCast(n)) / Asr.HOP + 1, Asr.MAX_FRAMES);
     return @intCast((stft - 1) / 2 + 1);
 }
 
-export fn hama_asr_run(h: *AsrHandle, wav: [*]const f32, n: i64, log_probs: [*]f32, out_length: *i64) i64 {
+export fn hama_asr_run(h: *const AsrHandle, wav: [*]const f32, n: i64, log_probs: [*]f32, out_length: *i64) i64 {
     const N: usize = @intCast(n);
-    var arena = std.heap.ArenaAllocator.init(galloc);
-    defer arena.deinit();
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
     const T = h.model.numFrames(N);
-    const got = h.model.forward(arena.allocator(), wav[0..N], log_probs[0 .. T * Asr.VOCAB]) catch return -1;
+    const got = h.model.forward(slot.allocator(), wav[0..N], log_probs[0 .. T * Asr.VOCAB]) catch return -1;
     out_length.* = @intCast(got);
     return @intCast(got);
 }
 
+/// ASR forward plus greedy CTC decoding in one call. frame_ids[T] gets each
+/// frame's argmax after temperature and biases (unk_id < 0: no unk bias),
+/// tokens[T]/token_frames[T] the collapsed ids and the frame each is emitted
+/// at, *n_tokens their count. `log_probs` [T*191] is filled only when given.
+/// Returns T (= hama_asr_num_frames(n)), or -1.
+export fn hama_asr_greedy(
+    h: *const AsrHandle,
+    wav: [*]const f32,
+    n: i64,
+    temperature: f32,
+    blank_id: i64,
+    blank_bias: f32,
+    unk_id: i64,
+    unk_bias: f32,
+    collapse_repeats: i32,
+    frame_ids: [*]i64,
+    tokens: [*]i64,
+    token_frames: [*]i64,
+    n_tokens: *i64,
+    log_probs: ?[*]f32,
+) i64 {
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const g = greedyOptions(temperature, blank_id, blank_bias, unk_id, unk_bias, collapse_repeats);
+    return asrGreedy(h, slot.allocator(), wav[0..@intCast(n)], g, frame_ids, tokens, token_frames, n_tokens, log_probs) catch -1;
+}
+
+/// `hama_asr_greedy` on `frames` interleaved 16-bit PCM frames of `channels`
+/// samples, converted to mono f32 in the engine (sample / 32768, averaged over
+/// channels) so the host never materializes a float copy. Only the first
+/// `Asr.MAX_SAMPLES` frames are converted, so scratch stays bounded however
+/// long the clip.
+export fn hama_asr_greedy_pcm16(
+    h: *const AsrHandle,
+    pcm: [*]const i16,
+    frames: i64,
+    channels: i64,
+    temperature: f32,
+    blank_id: i64,
+    blank_bias: f32,
+    unk_id: i64,
+    unk_bias: f32,
+    collapse_repeats: i32,
+    frame_ids: [*]i64,
+    tokens: [*]i64,
+    token_frames: [*]i64,
+    n_tokens: *i64,
+    log_probs: ?[*]f32,
+) i64 {
+    const N: usize = @intCast(frames);
+    const C: usize = @intCast(channels);
+    if (C == 0) return -1;
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const a = slot.allocator();
+    const wav = a.alloc(f32, @min(N, Asr.MAX_SAMPLES)) catch return -1;
+    Asr.pcm16ToMono(wav, pcm[0 .. wav.len * C], C);
+    const g = greedyOptions(temperature, blank_id, blank_bias, unk_id, unk_bias, collapse_repeats);
+    return asrGreedy(h, a, wav, g, frame_ids, tokens, token_frames, n_tokens, log_probs) catch -1;
+}
+
+fn greedyOptions(temperature: f32, blank_id: i64, blank_bias: f32, unk_id: i64, unk_bias: f32, collapse_repeats: i32) Asr.Greedy {
+    return .{
+        .temperature = temperature,
+        .blank = @intCast(blank_id),
+        .blank_bias = blank_bias,
+        .unk = if (unk_id >= 0) @intCast(unk_id) else null,
+        .unk_bias = unk_bias,
+        .collapse_repeats = collapse_repeats != 0,
+    };
+}
+
+fn asrGreedy(
+    h: *const AsrHandle,
+    a: std.mem.Allocator,
+    wav: []const f32,
+    g: Asr.Greedy,
+    frame_ids: [*]i64,
+    tokens: [*]i64,
+    token_frames: [*]i64,
+    n_tokens: *i64,
+    log_probs: ?[*]f32,
+) !i64 {
+    const T = h.model.numFrames(wav.len);
+    const lp = if (log_probs) |p| p[0 .. T * Asr.VOCAB] else try a.alloc(f32, T * Asr.VOCAB);
+    _ = try h.model.forward(a, wav, lp);
+    const ids = try a.alloc(usize, 3 * T);
+    const count = Asr.greedyCtc(lp, T, g, ids[0..T], ids[T .. 2 * T], ids[2 * T ..]);
+    for (0..T) |t| frame_ids[t] = @intCast(ids[t]);
+    for (0..count) |i| {
+        tokens[i] = @intCast(ids[T + i]);
+        token_frames[i] = @intCast(ids[2 * T + i]);
+    }
+    n_tokens.* = @intCast(count);
+    return @intCast(T);
+}
+
+/// Run `b` clips stored back to back in `wav` (clip i has lengths[i]
+/// samples) in one batched forward. Clip i's log-probs fill rows [off_i,
+/// off_i + out_lengths[i]) of `log_probs`, where out_lengths[i] =
+/// hama_asr_num_frames(lengths[i]) and off_i sums the earlier ones. Returns
+/// the total row count, or -1.
+export fn hama_asr_run_batch(h: *const AsrHandle, wav: [*]const f32, lengths: [*]const i64, b: i64, log_probs: [*]f32, out_lengths: [*]i64) i64 {
+    const B: usize = @intCast(b);
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const a = slot.allocator();
+    const lens = a.alloc(usize, B) catch return -1;
+    const frames = a.alloc(usize, B) catch return -1;
+    var samples: usize = 0;
+    var rows: usize = 0;
+    for (0..B) |i| {
+        lens[i] = @intCast(lengths[i]);
+        samples += lens[i];
+        rows += h.model.numFrames(lens[i]);
+    }
+    const got = h.model.forwardBatch(a, wav[0..samples], lens, log_probs[0 .. rows * Asr.VOCAB], frames) catch return -1;
+    for (0..B) |i| out_lengths[i] = @intCast(frames[i]);
+    return @intCast(got);
+}
+
+/// Batched forward + greedy CTC decode: hama_asr_run_batch's packed input, with
+/// hama_asr_greedy's decoding applied to each clip in the engine. Clip b's
+/// results start at row offset off_b = sum of hama_asr_num_frames(lengths[j])
+/// for j < b: frame_counts[b] frame ids at frame_ids[off_b..], token_counts[b]
+/// tokens and their frames at tokens[off_b..] / token_frames[off_b..] (each
+/// buffer holds the batch's total frames). Returns that total, or -1.
+export fn hama_asr_greedy_batch(
+    h: *const AsrHandle,
+    wav: [*]const f32,
+    lengths: [*]const i64,
+    b: i64,
+    temperature: f32,
+    blank_id: i64,
+    blank_bias: f32,
+    unk_id: i64,
+    unk_bias: f32,
+    collapse_repeats: i32,
+    frame_ids: [*]i64,
+    tokens: [*]i64,
+    token_frames: [*]i64,
+    frame_counts: [*]i64,
+    token_counts: [*]i64,
+) i64 {
+    const B: usize = @intCast(b);
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const a = slot.allocator();
+    const lens = a.alloc(usize, B) catch return -1;
+    const frames = a.alloc(usize, B) catch return -1;
+    var samples: usize = 0;
+    var rows: usize = 0;
+    var longest: usize = 0;
+    for (0..B) |i| {
+        lens[i] = @intCast(lengths[i]);
+        samples += lens[i];
+        const T = h.model.numFrames(lens[i]);
+        rows += T;
+        longest = @max(longest, T);
+    }
+    const lp = a.alloc(f32, rows * Asr.VOCAB) catch return -1;
+    _ = h.model.forwardBatch(a, wav[0..samples], lens, lp, frames) catch return -1;
+    const g = greedyOptions(temperature, blank_id, blank_bias, unk_id, unk_bias, collapse_repeats);
+    const ids = a.alloc(usize, 3 * longest) catch return -1;
+    var off: usize = 0;
+    for (0..B) |i| {
+        const T = frames[i];
+        const count = Asr.greedyCtc(lp[off * Asr.VOCAB ..], T, g, ids[0..T], ids[longest..][0..T], ids[2 * longest ..][0..T]);
+        for (0..T) |t| frame_ids[off + t] = @intCast(ids[t]);
+        for (0..count) |k| {
+            tokens[off + k] = @intCast(ids[longest + k]);
+            token_frames[off + k] = @intCast(ids[2 * longest + k]);
+        }
+        frame_counts[i] = @intCast(T);
+        token_counts[i] = @intCast(count);
+        off += T;
+    }
+    return @intCast(rows);
+}
+
 fn loadP2g(data: [*]const u8, len: usize) !*P2gHandle {
     var p = try pkg.parse(galloc, data[0..len]);
     defer p.deinit();
     const h = try galloc.create(P2gHandle);
-    h.model = try P2g.P2G.init(galloc, &p);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    pool.reserve = P2g.SCRATCH_BYTES;
+    h.* = .{ .model = try P2g.P2G.init(galloc, &p), .scratch = pool };
     return h;
 }
 
@@ -172,17 +540,48 @@ export fn hama_p2g_load(data: [*]const u8, len: usize) ?*P2gHandle {
     return loadP2g(data, len) catch null;
 }
 
+fn loadP2gPath(path: [*:0]const u8) !*P2gHandle {
+    var mapped = try pkg.MappedFile.open(std.mem.span(path));
+    errdefer mapped.close();
+    var p = try pkg.parse(galloc, mapped.bytes());
+    defer p.deinit();
+    p.pinned = true; // the handle owns the mapping
+    const h = try galloc.create(P2gHandle);
+    errdefer galloc.destroy(h);
+    const pool = try scratch.Pool.create(galloc);
+    errdefer pool.destroy();
+    pool.reserve = P2g.SCRATCH_BYTES;
+    h.* = .{ .model = try P2g.P2G.init(galloc, &p), .scratch = pool, .mapped = mapped };
+    return h;
+}
+
+export fn hama_p2g_load_path(path: [*:0]const u8) ?*P2gHandle {
+    return loadP2gPath(path) catch null;
+}
+
 export fn hama_p2g_free(h: ?*P2gHandle) void {
     if (h) |hh| {
         hh.model.deinit();
+        hh.scratch.destroy();
+        if (hh.mapped) |*m| m.close();
         galloc.destroy(hh);
     }
 }
 
+/// Largest scratch arena (bytes) a single call on this handle has needed.
+export fn hama_p2g_scratch_peak(h: *const P2gHandle) u64 {
+    return h.scratch.peakBytes();
+}
+
+/// Return the handle's idle scratch arenas to the OS.
+export fn hama_p2g_scratch_trim(h: *const P2gHandle) void {
+    h.scratch.trim();
+}
+
 /// Greedy decode. prefix_ids is [bos, src, phones..., tgt]; out receives up to
 /// max_new generated token ids (excluding eos/pad). Returns the count, or -1.
 export fn hama_p2g_greedy(
-    h: *P2gHandle,
+    h: *const P2gHandle,
     prefix_ids: [*]const i64,
     prefix_len: i64,
     max_new: i64,
@@ -192,9 +591,9 @@ export fn hama_p2g_greedy(
 ) i64 {
     const P: usize = @intCast(prefix_len);
     const mn: usize = @intCast(max_new);
-    var arena = std.heap.ArenaAllocator.init(galloc);
-    defer arena.deinit();
-    const n = h.model.greedyCached(arena.allocator(), prefix_ids[0..P], mn, eos, pad, out[0..mn], null) catch return -1;
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const n = h.model.greedyCached(slot.allocator(), prefix_ids[0..P], mn, eos, pad, out[0..mn], null) catch return -1;
     return @intCast(n);
 }
 
@@ -202,7 +601,7 @@ export fn hama_p2g_greedy(
 /// out_align[0..n] with the source-phoneme index each generated token most attends
 /// to (-1 if unaligned). out_align must hold max_new i64s.
 export fn hama_p2g_greedy_align(
-    h: *P2gHandle,
+    h: *const P2gHandle,
     prefix_ids: [*]const i64,
     prefix_len: i64,
     max_new: i64,
@@ -213,8 +612,125 @@ export fn hama_p2g_greedy_align(
 ) i64 {
     const P: usize = @intCast(prefix_len);
     const mn: usize = @intCast(max_new);
-    var arena = std.heap.ArenaAllocator.init(galloc);
-    defer arena.deinit();
-    const n = h.model.greedyCached(arena.allocator(), prefix_ids[0..P], mn, eos, pad, out[0..mn], out_align[0..mn]) catch return -1;
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const n = h.model.greedyCached(slot.allocator(), prefix_ids[0..P], mn, eos, pad, out[0..mn], out_align[0..mn]) catch return -1;
+    return @intCast(n);
+}
+
+/// A C shortlist (strictly ascending ids < VOCAB) as candidate ids, or null.
+fn p2gShortlist(a: std.mem.Allocator, shortlist: ?[*]const i64, n_shortlist: i64) !?[]u32 {
+    const ids = shortlist orelse return null;
+    const L: usize = @intCast(n_shortlist);
+    if (L == 0) return error.InvalidShortlist;
+    const c = try a.alloc(u32, L);
+    for (0..L) |i| {
+        if (ids[i] < 0 or ids[i] >= P2g.VOCAB or (i > 0 and ids[i] <= ids[i - 1])) return error.InvalidShortlist;
+        c[i] = @intCast(ids[i]);
+    }
+    return c;
+}
+
+/// Batched greedy decode + alignment. `b` prefixes are stored back to back in
+/// prefix_ids (lengths[b] ids each); row b decodes at most max_new[b] (<= stride)
+/// tokens into out[b*stride ..] and, when given, out_align[b*stride ..], and
+/// counts[b] receives how many. Each row equals hama_p2g_greedy_align on it
+/// alone. A non-null `shortlist` (n_shortlist strictly ascending ids, which
+/// should include eos) restricts every step's argmax to those tokens.
+/// Returns 0, or -1 on failure, including a prefix of 416 (MAXPOS) ids or more.
+export fn hama_p2g_greedy_batch(
+    h: *const P2gHandle,
+    prefix_ids: [*]const i64,
+    lengths: [*]const i64,
+    max_new: [*]const i64,
+    b: i64,
+    stride: i64,
+    eos: i64,
+    pad: i64,
+    shortlist: ?[*]const i64,
+    n_shortlist: i64,
+    out: [*]i64,
+    out_align: ?[*]i64,
+    counts: [*]i64,
+) i32 {
+    const B: usize = @intCast(b);
+    const S: usize = @intCast(stride);
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const a = slot.allocator();
+    const lens = a.alloc(usize, 3 * B) catch return -1;
+    var total: usize = 0;
+    for (0..B) |i| {
+        lens[i] = @intCast(lengths[i]);
+        lens[B + i] = @intCast(max_new[i]);
+        if (lens[i] == 0 or lens[i] >= P2g.MAXPOS or lens[B + i] > S) return -1;
+        total += lens[i];
+    }
+    const ns = lens[2 * B ..];
+    const aln: ?[]i64 = if (out_align) |p| p[0 .. B * S] else null;
+    const cand = p2gShortlist(a, shortlist, n_shortlist) catch return -1;
+    h.model.greedyBatch(a, prefix_ids[0..total], lens[0..B], lens[B .. 2 * B], S, eos, pad, cand, out[0 .. B * S], aln, ns) catch return -1;
+    for (0..B) |i| counts[i] = @intCast(ns[i]);
+    return 0;
+}
+
+/// Incremental prefill: appends `n` prefix ids at positions [cached, cached+n)
+/// to the caller-owned K/V cache kc/vc ([4, 416, 224] f32 each). They attend
+/// to the cached positions and to each other; cached positions are unchanged.
+/// Returns cached + n, or -1.
+export fn hama_p2g_extend(h: *const P2gHandle, kc: [*]f32, vc: [*]f32, cached: i64, ids: [*]const i64, n: i64) i64 {
+    const C: usize = @intCast(cached);
+    const N: usize = @intCast(n);
+    const len = P2g.NLAYERS * P2g.MAXPOS * P2g.D;
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    h.model.extend(slot.allocator(), kc[0..len], vc[0..len], C, ids[0..N]) catch return -1;
+    return @intCast(C + N);
+}
+
+/// Greedy decode + alignment after hama_p2g_extend: `tail` (ending in tgt)
+/// completes the prefix after the `cached` positions, and the `n_forced`
+/// tokens in `forced` are kept as the start of the output. Decoding continues
+/// after them up to max_new tokens in all, over `shortlist` as in
+/// hama_p2g_greedy_batch when given; out/out_align (max_new each) receive
+/// every token. Cached positions of kc/vc are unchanged. Returns the count,
+/// or -1.
+export fn hama_p2g_greedy_from(
+    h: *const P2gHandle,
+    kc: [*]f32,
+    vc: [*]f32,
+    cached: i64,
+    tail: [*]const i64,
+    n_tail: i64,
+    forced: [*]const i64,
+    n_forced: i64,
+    max_new: i64,
+    eos: i64,
+    pad: i64,
+    shortlist: ?[*]const i64,
+    n_shortlist: i64,
+    out: [*]i64,
+    out_align: ?[*]i64,
+) i64 {
+    const mn: usize = @intCast(max_new);
+    const len = P2g.NLAYERS * P2g.MAXPOS * P2g.D;
+    const slot = h.scratch.acquire() catch return -1;
+    defer h.scratch.release(slot);
+    const aln: ?[]i64 = if (out_align) |p| p[0..mn] else null;
+    const cand = p2gShortlist(slot.allocator(), shortlist, n_shortlist) catch return -1;
+    const n = h.model.greedyFrom(
+        slot.allocator(),
+        kc[0..len],
+        vc[0..len],
+        @intCast(cached),
+        tail[0..@intCast(n_tail)],
+        forced[0..@intCast(n_forced)],
+        mn,
+        eos,
+        pad,
+        cand,
+        out[0..mn],
+        aln,
+    ) catch return -1;
     return @intCast(n);
 }
@@ -3,9 +3,11 @@
 //! Pipeline:
 //!   reflect-pad(200) -> STFT (conv, n_fft=400, hop=160) -> power -> mel_fb ->
 //!   clip(1e-10)+log   [all f32]
+//!   (the STFT conv is evaluated as a real FFT of the windowed frames, `FftStft`)
 //!   -> cast f16 -> stem conv(80->256, k3 s2 p1)+GELU
 //!   -> 11 backbone blocks: depthwise(k9, dil 1,1,2,2,4,1,1,2,2,4,1) -> pointwise
 //!      -> SiLU -> squeeze-excite -> +residual   [all f16]
+//!      (pointwise runs as a GEMM with SiLU + the squeeze fused into its epilogue)
 //!   -> 2 pre-norm transformer blocks (MHA 4 heads d=256, erf-GELU FF 256->512->256)
 //!   -> proj(256->191) -> LogSoftmax -> cast f32 = log_probs[T,191]
 //!   out_lengths = (clip(N//160 + 1, 1, 3000) + 1) // 2
@@ -18,10 +20,14 @@ const pkg = @import("../pkg.zig");
 const f16u = @import("../f16.zig");
 const k_mm = @import("../kernels/matmul.zig");
 const k_conv = @import("../kernels/conv1d.zig");
+const k_attn = @import("../kernels/attention.zig");
+const k_fft = @import("../kernels/fft.zig");
 const k_ln = @import("../kernels/layernorm.zig");
 const k_soft = @import("../kernels/softmax.zig");
 const act = @import("../kernels/activations.zig");
+const libm = @import("../kernels/libm.zig");
 const k_reduce = @import("../kernels/reduce.zig");
+const threads = @import("../threads.zig");
 
 pub const N_FFT: usize = 400;
 pub const HOP: usize = 160;
@@ -35,6 +41,10 @@ pub const SCALE: f32 = 0.125; // head_dim^-0.5
 pub const FF: usize = 512;
 pub const VOCAB: usize = 191;
 pub const MAX_FRAMES: usize = 3000;
+/// Samples past this never reach the encoder: they lie beyond the last kept
+/// STFT frame, and a clip this long keeps MAX_FRAMES without reflecting its
+/// right edge, so truncating to it leaves the output unchanged.
+pub const MAX_SAMPLES: usize = MAX_FRAMES * HOP + N_FFT;
 pub const EPS: f32 = 9.999999747378752e-06;
 pub const SQRT2: f32 = 1.4140625; // f16-rounded sqrt(2), as in the graph
 const DIL = [11]usize{ 1, 1, 2, 2, 4, 1, 1, 2, 2, 4, 1 };
@@ -50,6 +60,63 @@ pub fn outLength(n: usize) usize {
     return (c1 + 1) / 2;
 }
 
+/// Interleaved 16-bit PCM frames (`channels` samples each) to mono f32 in
+/// [-1, 1): each sample / 32768, then the mean over channels, as the host's
+/// WAV reader computes them.
+pub fn pcm16ToMono(dst: []f32, pcm: []const i16, channels: usize) void {
+    const scale: f32 = 1.0 / 32768.0; // a power of two, so * is exactly /
+    const inv_c: f32 = @floatFromInt(channels);
+    for (dst, 0..) |*d, i| {
+        const frame = pcm[i * channels ..][0..channels];
+        var sum: f32 = @as(f32, @floatFromInt(frame[0])) * scale;
+        for (frame[1..]) |x| sum += @as(f32, @floatFromInt(x)) * scale;
+        d.* = if (channels == 1) sum else sum / inv_c;
+    }
+}
+
+/// Greedy CTC decoding options, as in the host's `ASRDecodeConfig`. Frame
+/// scores are log_probs / temperature, then + blank_bias on the blank column
+/// and + unk_bias on the unk one (none when `unk` is null).
+pub const Greedy = struct {
+    temperature: f32 = 1,
+    blank: usize,
+    blank_bias: f32 = 0,
+    unk: ?usize = null,
+    unk_bias: f32 = 0,
+    collapse_repeats: bool = true,
+};
+
+/// Greedy CTC decode of log_probs [T, 191]: frame_ids[t] is the argmax of
+/// frame t's scores; the collapsed ids (repeats merged when collapse_repeats,
+/// blanks dropped) go to `tokens` and the frame each is emitted at to
+/// `token_frames`, both sized for T. Returns the token count.
+pub fn greedyCtc(log_probs: []const f32, T: usize, g: Greedy, frame_ids: []usize, tokens: []usize, token_frames: []usize) usize {
+    var scores: [VOCAB]f32 = undefined;
+    var n: usize = 0;
+    var prev: ?usize = null;
+    for (0..T) |t| {
+        const row = log_probs[t * VOCAB ..][0..VOCAB];
+        if (g.temperature != 1) {
+            for (&scores, row) |*s, v| s.* = v / g.temperature;
+        } else {
+            scores = row.*;
+        }
+        if (g.blank < VOCAB) scores[g.blank] += g.blank_bias;
+        if (g.unk) |u| {
+            if (u < VOCAB) scores[u] += g.unk_bias;
+        }
+        const id = k_reduce.argmax(&scores);
+        frame_ids[t] = id;
+        if (g.collapse_repeats and prev == id) continue;
+        prev = id;
+        if (id == g.blank) continue;
+        tokens[n] = id;
+        token_frames[n] = t;
+        n += 1;
+    }
+    return n;
+}
+
 // Full-f32 erf-GELU (divides by the graph's f16-rounded sqrt2 constant). The
 // ASR backbone/attention compute in f32 with f16-valued weights: empirically
 // ORT CPU executes the "f16" backbone in f32, so full-f32 reproduces ORT's
@@ -62,45 +129,49 @@ fn geluInplace(buf: []f32) void {
 }
 
 const Block = struct {
-    dw: []f32, // [256,1,9]
-    dwb: []f32, // [256]
-    pw: []f32, // [256,256,1]
-    pwb: []f32, // [256]
-    fc1: []f32, // [32,256,1] -> [32,256]
-    fc1b: []f32, // [32]
-    fc2: []f32, // [256,32,1] -> [256,32]
-    fc2b: []f32, // [256]
+    dw: []const f32, // [256,1,9]
+    dwb: []const f32, // [256]
+    pw: []const f32, // [256,256,1]
+    pwb: []const f32, // [256]
+    fc1: []const f32, // [32,256,1] -> [32,256]
+    fc1b: []const f32, // [32]
+    fc2: []const f32, // [256,32,1] -> [256,32]
+    fc2b: []const f32, // [256]
 };
 
 const Attn = struct {
-    n1w: []f32,
-    n1b: []f32,
-    inw: []f32, // [256,768]
-    inb: []f32, // [768]
-    outw: []f32, // [256,256]
-    outb: []f32, // [256]
-    n2w: []f32,
-    n2b: []f32,
-    ff0w: []f32, // [256,512]
-    ff0b: []f32,
-    ff3w: []f32, // [512,256]
-    ff3b: []f32,
+    n1w: []const f32,
+    n1b: []const f32,
+    inw: []const f32, // [256,768]
+    inb: []const f32, // [768]
+    outw: []const f32, // [256,256]
+    outb: []const f32, // [256]
+    n2w: []const f32,
+    n2b: []const f32,
+    ff0w: []const f32, // [256,512]
+    ff0b: []const f32,
+    ff3w: []const f32, // [512,256]
+    ff3b: []const f32,
 };
 
 pub const Asr = struct {
     alloc: std.mem.Allocator,
-    stft_re: []f32, // [201,1,400]
-    stft_im: []f32,
-    mel: []f32, // [201,80]
-    stem_w: []f32, // [256,80,3]
-    stem_b: []f32, // [256]
+    stft_re: []const f32, // [201,1,400]
+    stft_im: []const f32,
+    stft_fft: ?FftStft, // null if the kernels aren't a windowed DFT basis
+    mel: []const f32, // [201,80]
+    stem_w: []const f32, // [256,80,3]
+    stem_b: []const f32, // [256]
     blocks: [11]Block,
     attn: [2]Attn,
-    proj_w: []f32, // [191,256]
-    proj_b: []f32, // [191]
+    proj_w: []const f32, // [191,256]
+    proj_b: []const f32, // [191]
     owned: std.ArrayList([]f32),
 
-    fn take(self: *Asr, p: *const pkg.Package, name: []const u8) ![]f32 {
+    /// Weight tensor `name`: borrowed in place from a pinned (mapped) package
+    /// when possible, else an owned f32 copy freed by `deinit`.
+    fn take(self: *Asr, p: *const pkg.Package, name: []const u8) ![]const f32 {
+        if (try p.viewF32(name)) |view| return view;
         const t = try p.getF32(self.alloc, name);
         try self.owned.append(self.alloc, t);
         return t;
@@ -112,6 +183,7 @@ pub const Asr = struct {
         self.owned = .empty;
         self.stft_re = try self.take(p, "stft_real_kernel");
         self.stft_im = try self.take(p, "stft_imag_kernel");
+        self.stft_fft = FftStft.fromKernels(self.stft_re, self.stft_im);
         self.mel = try self.take(p, "mel_fb");
         self.stem_w = try self.take(p, "onnx::Conv_663");
         self.stem_b = try self.take(p, "onnx::Conv_664");
@@ -185,35 +257,67 @@ pub const Asr = struct {
     }
 
     pub fn forwardDbg(self: *const Asr, sc: std.mem.Allocator, waveform: []const f32, log_probs: []f32, dbg: Dbg) !usize {
+        const T = self.numFrames(waveform.len);
+        const h = try sc.alloc(f32, T * D);
+        try self.encode(sc, waveform, h, dbg);
+        const segs = [_]usize{ 0, T };
+        for (0..2) |L| try self.attnLayer(sc, h, &segs, self.attn[L]);
+        if (dbg.attn1) |d| @memcpy(d, h);
+        self.head(h, T, log_probs);
+        return T;
+    }
+
+    /// Run ASR over a batch of clips stored back to back in `waveforms`, clip
+    /// i holding `lengths[i]` samples. Its log-probs fill rows [off_i, off_i +
+    /// frames[i]) of `log_probs`, off_i being the earlier clips' frame total;
+    /// returns the total. The transformer's projections and FF and the output
+    /// head run once over every clip's rows, with attention confined to each
+    /// clip's own frames, so a clip's output is bit-identical to `forward`.
+    pub fn forwardBatch(self: *const Asr, sc: std.mem.Allocator, waveforms: []const f32, lengths: []const usize, log_probs: []f32, frames: []usize) !usize {
+        const B = lengths.len;
+        const segs = try sc.alloc(usize, B + 1); // row offsets
+        const starts = try sc.alloc(usize, B + 1); // sample offsets
+        segs[0] = 0;
+        starts[0] = 0;
+        for (lengths, 0..) |n, i| {
+            frames[i] = self.numFrames(n);
+            segs[i + 1] = segs[i] + frames[i];
+            starts[i + 1] = starts[i] + n;
+        }
+        const rows = segs[B];
+        const h = try sc.alloc(f32, rows * D);
+        var failed: std.atomic.Value(bool) = .init(false);
+        const job: EncodeClips = .{ .model = self, .sc = sc, .waveforms = waveforms, .starts = starts, .segs = segs, .h = h, .failed = &failed };
+        // With at least a clip per thread, whole clips go to the pool (their
+        // kernels then run inline); otherwise each clip's kernels split instead.
+        if (B >= threads.numThreads()) {
+            threads.parallelFor(B, 1, job, EncodeClips.run);
+        } else {
+            EncodeClips.run(job, 0, B);
+        }
+        if (failed.load(.monotonic)) return error.OutOfMemory;
+        for (0..2) |L| try self.attnLayer(sc, h, segs, self.attn[L]);
+        self.head(h, rows, log_probs[0 .. rows * VOCAB]);
+        return rows;
+    }
+
+    /// Frontend and conv backbone of one clip: h [numFrames(n), 256], time-major.
+    fn encode(self: *const Asr, sc: std.mem.Allocator, waveform: []const f32, h: []f32, dbg: Dbg) !void {
         const n = waveform.len;
-        const t_stft_full = n / HOP + 1;
-        const t_stft = @min(t_stft_full, MAX_FRAMES);
+        const t_stft = @min(n / HOP + 1, MAX_FRAMES);
 
         // ---- frontend (f32) ----
-        const padded = try sc.alloc(f32, n + 2 * PAD);
+        // Only the samples the kept frames read; past MAX_FRAMES that is a
+        // prefix of the waveform, however long the input.
+        const padded = try sc.alloc(f32, (t_stft - 1) * HOP + N_FFT);
         reflectPad(padded, waveform, PAD);
-        const re = try sc.alloc(f32, N_FREQ * t_stft_full);
-        const im = try sc.alloc(f32, N_FREQ * t_stft_full);
-        k_conv.conv1d(re, padded, self.stft_re, null, 1, n + 2 * PAD, N_FREQ, N_FFT, HOP, 0, 0, 1, 1);
-        k_conv.conv1d(im, padded, self.stft_im, null, 1, n + 2 * PAD, N_FREQ, N_FFT, HOP, 0, 0, 1, 1);
-        if (dbg.stft_real) |d| {
-            for (0..N_FREQ) |f| for (0..t_stft) |t| {
-                d[f * t_stft + t] = re[f * t_stft_full + t];
-            };
-        }
-        // power [t_stft, 201] (time-major) capped to t_stft
+        // power [t_stft, 201] (time-major); frames past MAX_FRAMES are never computed
         const power = try sc.alloc(f32, t_stft * N_FREQ);
-        for (0..t_stft) |t| {
-            for (0..N_FREQ) |f| {
-                const r = re[f * t_stft_full + t];
-                const i = im[f * t_stft_full + t];
-                power[t * N_FREQ + f] = r * r + i * i;
-            }
-        }
+        try stftPower(sc, if (self.stft_fft) |*f| f else null, self.stft_re, self.stft_im, padded, t_stft, power, dbg.stft_real);
         // mel: [t_stft,201] @ mel_fb[201,80] -> [t_stft,80] ; clip+log
         const logmel = try sc.alloc(f32, t_stft * N_MEL);
         k_mm.matmul(logmel, power, self.mel, t_stft, N_FREQ, N_MEL);
-        for (logmel) |*v| v.* = @log(@max(v.*, 1e-10));
+        for (logmel) |*v| v.* = libm.logf(@max(v.*, 1e-10));
         if (dbg.logmel) |d| @memcpy(d, logmel);
         r16(logmel); // cast to f16 boundary
 
@@ -237,12 +341,11 @@ pub const Asr = struct {
         const se_f1 = try sc.alloc(f32, 32);
         for (0..11) |bi| {
             const blk = self.blocks[bi];
-            const pad = DIL[bi] * 4;
-            k_conv.conv1d(dw, x, blk.dw, blk.dwb, D, T, D, 9, 1, pad, pad, DIL[bi], D);
-            k_conv.conv1d(pw, dw, blk.pw, blk.pwb, D, T, D, 1, 1, 0, 0, 1, 1);
-            for (pw) |*v| v.* = act.silu(v.*);
-            // squeeze-excite
-            k_reduce.globalAvgPoolCT(se_a, pw, D, T);
+            k_conv.depthwise1d(9, dw, x, blk.dw, blk.dwb, D, T, DIL[bi]);
+            // pointwise + SiLU + squeeze (global average pool), fused
+            const pw_job: PointwiseSilu = .{ .out = pw, .w = blk.pw, .bias = blk.pwb, .x = dw, .mean = se_a, .T = T };
+            threads.parallelFor(D / PW_RB, threads.grain(PW_RB * D * T), pw_job, PointwiseSilu.run);
+            // excite
             k_mm.linear(se_f1, se_a, blk.fc1, blk.fc1b, 1, D, 32);
             for (se_f1) |*v| v.* = act.silu(v.*);
             const se_scale = try sc.alloc(f32, D);
@@ -262,21 +365,22 @@ pub const Asr = struct {
         }
 
         // ---- to time-major [T,256] for attention ----
-        var h = try sc.alloc(f32, T * D);
         for (0..D) |c| {
             for (0..T) |t| h[t * D + c] = x[c * T + t];
         }
-        for (0..2) |L| try self.attnLayer(sc, h, T, self.attn[L]);
-        if (dbg.attn1) |d| @memcpy(d, h);
+    }
 
-        // ---- proj (256->191) + log_softmax ----
-        k_mm.linear(log_probs, h, self.proj_w, self.proj_b, T, D, VOCAB);
-        k_soft.logSoftmax(log_probs, T, VOCAB);
-        return T;
+    /// proj (256->191) + log_softmax over `rows` frames.
+    fn head(self: *const Asr, h: []const f32, rows: usize, log_probs: []f32) void {
+        k_mm.linear(log_probs, h, self.proj_w, self.proj_b, rows, D, VOCAB);
+        k_soft.logSoftmax(log_probs, rows, VOCAB);
     }
 
-    fn attnLayer(self: *const Asr, sc: std.mem.Allocator, h: []f32, T: usize, a: Attn) !void {
+    /// One transformer block over the rows of `h`, which hold the clips whose
+    /// frames are [segs[i], segs[i+1]); each clip attends only to itself.
+    fn attnLayer(self: *const Asr, sc: std.mem.Allocator, h: []f32, segs: []const usize, a: Attn) !void {
         _ = self;
+        const T = segs[segs.len - 1];
         // pre-norm 1
         const ln = try sc.alloc(f32, T * D);
         @memcpy(ln, h);
@@ -288,24 +392,11 @@ pub const Asr = struct {
             for (0..3 * D) |j| qkv[t * 3 * D + j] += a.inb[j];
         }
         const ctx = try sc.alloc(f32, T * D);
-        const scores = try sc.alloc(f32, T); // one row at a time
-        for (0..NHEADS) |hd| {
-            const qoff = hd * HEAD;
-            const koff = D + hd * HEAD;
-            const voff = 2 * D + hd * HEAD;
-            for (0..T) |i| {
-                for (0..T) |j| {
-                    var s: f32 = 0;
-                    for (0..HEAD) |d| s += qkv[i * 3 * D + qoff + d] * qkv[j * 3 * D + koff + d];
-                    scores[j] = s * SCALE;
-                }
-                k_soft.softmaxRow(scores, null);
-                for (0..HEAD) |d| {
-                    var acc: f32 = 0;
-                    for (0..T) |j| acc += scores[j] * qkv[j * 3 * D + voff + d];
-                    ctx[i * D + hd * HEAD + d] = acc;
-                }
-            }
+        for (0..segs.len - 1) |s| {
+            const r0 = segs[s];
+            const t = segs[s + 1] - r0;
+            const q = qkv[r0 * 3 * D ..];
+            try k_attn.attention(HEAD, sc, ctx[r0 * D ..], D, q, 3 * D, q[D..], q[2 * D ..], 3 * D, t, NHEADS, SCALE, t);
         }
         // out_proj + residual
         const op = try sc.alloc(f32, T * D);
@@ -331,11 +422,176 @@ pub const Asr = struct {
     }
 };
 
+// Clips [begin, end) of a `forwardBatch`, each through `encode` into its rows
+// of h. Scratch comes from the call's arena, which is thread-safe.
+const EncodeClips = struct {
+    model: *const Asr,
+    sc: std.mem.Allocator,
+    waveforms: []const f32,
+    starts: []const usize,
+    segs: []const usize,
+    h: []f32,
+    failed: *std.atomic.Value(bool),
+
+    fn run(job: EncodeClips, begin: usize, end: usize) void {
+        for (begin..end) |i| {
+            const wav = job.waveforms[job.starts[i]..job.starts[i + 1]];
+            const rows = job.h[job.segs[i] * D .. job.segs[i + 1] * D];
+            job.model.encode(job.sc, wav, rows, .{}) catch job.failed.store(true, .monotonic);
+        }
+    }
+};
+
+/// Output channels per `PointwiseSilu` block.
+const PW_RB = 16;
+
+// Pointwise conv of a backbone block as a GEMM, pw = W[D,D] @ dw[D,T] with
+// each row pre-filled with its bias (the conv's accumulation order), followed
+// by SiLU and the squeeze-excite channel means while the block of rows is
+// still in cache. Blocks write disjoint rows.
+const PointwiseSilu = struct {
+    out: []f32, // [D, T]
+    w: []const f32, // [D, D, 1]
+    bias: []const f32,
+    x: []const f32, // [D, T]
+    mean: []f32, // [D]
+    T: usize,
+
+    fn run(job: PointwiseSilu, blk_begin: usize, blk_end: usize) void {
+        const T = job.T;
+        // as k_reduce.globalAvgPoolCT
+        const inv: f32 = 1.0 / @as(f32, @floatFromInt(T));
+        for (blk_begin..blk_end) |blk| {
+            const r0 = blk * PW_RB;
+            const r1 = r0 + PW_RB;
+            for (r0..r1) |c| @memset(job.out[c * T ..][0..T], job.bias[c]);
+            k_mm.matmulRows(job.out, job.w, job.x, r0, r1, D, T, true);
+            for (r0..r1) |c| {
+                var s: f32 = 0;
+                for (job.out[c * T ..][0..T]) |*v| {
+                    v.* = act.silu(v.*);
+                    s += v.*;
+                }
+                job.mean[c] = s * inv;
+            }
+        }
+    }
+};
+
+const Rfft = k_fft.Rfft(N_FFT);
+/// STFT frames transformed together, one per vector lane.
+const STFT_LANES = 8;
+
+/// The STFT conv in FFT form. The graph's kernels are a window times the
+/// n_fft-point DFT basis, so a frame's spectrum is one real FFT of the windowed
+/// frame: ~n log n work instead of the conv's 2 * 201 * 400 multiply-adds.
+const FftStft = struct {
+    window: [N_FFT]f32,
+    fft: Rfft,
+
+    /// The FFT form of kernels `re_k`/`im_k` [201,1,400], or null if they are
+    /// not a windowed DFT basis (the conv then stays in use).
+    fn fromKernels(re_k: []const f32, im_k: []const f32) ?FftStft {
+        const self: FftStft = .{ .window = re_k[0..N_FFT].*, .fft = .init() }; // row 0: w[n] * cos(0)
+        for (0..N_FREQ) |f| {
+            for (0..N_FFT) |i| {
+                const e = (f * i) % N_FFT;
+                const w = self.window[i];
+                if (@abs(re_k[f * N_FFT + i] - w * self.fft.wr[e]) > 1e-5) return null;
+                if (@abs(im_k[f * N_FFT + i] - w * self.fft.wi[e]) > 1e-5) return null;
+            }
+        }
+        return self;
+    }
+};
+
+/// |STFT|^2 of the first `t_stft` frames of `padded` into `power` [t_stft, 201]
+/// (time-major), through the FFT when `fft` is given and the conv kernels
+/// otherwise. `dbg_re` receives the real part channel-major [201, t_stft].
+fn stftPower(
+    sc: std.mem.Allocator,
+    fft: ?*const FftStft,
+    re_k: []const f32,
+    im_k: []const f32,
+    padded: []const f32,
+    t_stft: usize,
+    power: []f32,
+    dbg_re: ?[]f32,
+) !void {
+    if (fft) |f| {
+        const job: StftFrames = .{ .stft = f, .padded = padded, .power = power, .dbg_re = dbg_re, .t_stft = t_stft };
+        const groups = (t_stft + STFT_LANES - 1) / STFT_LANES;
+        // ~5 n log2 n flops per frame
+        threads.parallelFor(groups, threads.grain(STFT_LANES * 5 * N_FFT * 9), job, StftFrames.run);
+        return;
+    }
+    const len = (t_stft - 1) * HOP + N_FFT;
+    const re = try sc.alloc(f32, N_FREQ * t_stft);
+    const im = try sc.alloc(f32, N_FREQ * t_stft);
+    k_conv.conv1d(re, padded[0..len], re_k, null, 1, len, N_FREQ, N_FFT, HOP, 0, 0, 1, 1);
+    k_conv.conv1d(im, padded[0..len], im_k, null, 1, len, N_FREQ, N_FFT, HOP, 0, 0, 1, 1);
+    if (dbg_re) |d| @memcpy(d, re);
+    for (0..t_stft) |t| {
+        for (0..N_FREQ) |f| {
+            const r = re[f * t_stft + t];
+            const i = im[f * t_stft + t];
+            power[t * N_FREQ + f] = r * r + i * i;
+        }
+    }
+}
+
+// Groups of STFT_LANES frames per FFT; groups write disjoint frames of power.
+const StftFrames = struct {
+    stft: *const FftStft,
+    padded: []const f32,
+    power: []f32, // [t_stft, 201]
+    dbg_re: ?[]f32, // [201, t_stft]
+    t_stft: usize,
+
+    fn run(job: StftFrames, g_begin: usize, g_end: usize) void {
+        const V = @Vector(STFT_LANES, f32);
+        var x: [N_FFT]V = undefined;
+        var re: [Rfft.bins]V = undefined;
+        var im: [Rfft.bins]V = undefined;
+        for (g_begin..g_end) |g| {
+            const t0 = g * STFT_LANES;
+            const nl = @min(STFT_LANES, job.t_stft - t0);
+            for (0..N_FFT) |i| {
+                var lanes: [STFT_LANES]f32 = @splat(0);
+                for (0..nl) |l| lanes[l] = job.padded[(t0 + l) * HOP + i];
+                x[i] = @as(V, lanes) * @as(V, @splat(job.stft.window[i]));
+            }
+            job.stft.fft.forward(STFT_LANES, &x, &re, &im);
+            for (0..N_FREQ) |f| {
+                const pw: [STFT_LANES]f32 = re[f] * re[f] + im[f] * im[f];
+                for (0..nl) |l| job.power[(t0 + l) * N_FREQ + f] = pw[l];
+                if (job.dbg_re) |d| {
+                    const rf: [STFT_LANES]f32 = re[f];
+                    for (0..nl) |l| d[f * job.t_stft + t0 + l] = rf[l];
+                }
+            }
+        }
+    }
+};
+
+/// dst[i] = src[i - pad] under numpy/ONNX "reflect" padding, folding again
+/// where the pad is longer than src (so clips of <= PAD samples still run).
+/// dst may end before src.len + 2*pad.
 fn reflectPad(dst: []f32, src: []const f32, pad: usize) void {
     const n = src.len;
-    for (0..pad) |i| dst[i] = src[pad - i];
-    @memcpy(dst[pad .. pad + n], src);
-    for (0..pad) |j| dst[pad + n + j] = src[n - 2 - j];
+    if (n <= 1) {
+        @memset(dst, if (n == 1) src[0] else 0);
+        return;
+    }
+    const period = 2 * (n - 1);
+    const mid_end = @min(dst.len, pad + n);
+    if (mid_end > pad) @memcpy(dst[pad..mid_end], src[0 .. mid_end - pad]);
+    for (0..dst.len) |i| {
+        if (i >= pad and i < mid_end) continue;
+        var j: usize = @intCast(@mod(@as(isize, @intCast(i)) - @as(isize, @intCast(pad)), @as(isize, @intCast(period))));
+        if (j >= n) j = period - j;
+        dst[i] = src[j];
+    }
 }
 
 // --------------------------------------------------------------------------- //
@@ -367,9 +623,18 @@ test "asr matches ORT oracle (short clip)" {
     const T = model.numFrames(wav.len);
     const log_probs = try alloc.alloc(f32, T * VOCAB);
     defer alloc.free(log_probs);
-    const got_T = try model.forward(arena_inst.allocator(), wav, log_probs);
+    const t_stft = wav.len / HOP + 1;
+    const logmel = try alloc.alloc(f32, t_stft * N_MEL);
+    defer alloc.free(logmel);
+    const got_T = try model.forwardDbg(arena_inst.allocator(), wav, log_probs, .{ .logmel = logmel });
     try t_.expectEqual(exp_len, got_T);
 
+    // frontend: the FFT STFT reproduces ORT's conv STFT + mel + log
+    try t_.expect(model.stft_fft != null);
+    const lm_ref = try fx.getF32(alloc, "logmel");
+    defer alloc.free(lm_ref);
+    try t_.expect(maxAbsDiff(logmel, lm_ref) < 1e-2);
+
     const lp_ref = try fx.getF32(alloc, "log_probs");
     defer alloc.free(lp_ref);
     // discrete: per-frame argmax must match ORT exactly (the CTC contract)
@@ -381,3 +646,136 @@ test "asr matches ORT oracle (short clip)" {
     // float: log_probs within f32-backbone tolerance vs ORT
     try t_.expect(maxAbsDiff(log_probs, lp_ref) < 2e-1);
 }
+
+test "greedyCtc applies temperature and biases, then collapses" {
+    const blank = 4;
+    // Frame argmaxes before biasing: 0 0 blank 2 2 1; blank_bias promotes
+    // frame 1's near-tie to blank (splitting the repeat), unk_bias demotes 1.
+    var lp: [6 * VOCAB]f32 = @splat(-20);
+    const best = [_]usize{ 0, 0, blank, 2, 2, 1 };
+    for (best, 0..) |id, t| lp[t * VOCAB + id] = -1;
+    lp[1 * VOCAB + blank] = -1.5;
+    lp[5 * VOCAB + 3] = -2;
+    var frame_ids: [6]usize = undefined;
+    var tokens: [6]usize = undefined;
+    var token_frames: [6]usize = undefined;
+
+    var n = greedyCtc(&lp, 6, .{ .blank = blank }, &frame_ids, &tokens, &token_frames);
+    try t_.expectEqualSlices(usize, &best, &frame_ids);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 2, 1 }, tokens[0..n]);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 3, 5 }, token_frames[0..n]);
+
+    n = greedyCtc(&lp, 6, .{ .temperature = 0.5, .blank = blank, .blank_bias = 1.2, .unk = 1, .unk_bias = -3 }, &frame_ids, &tokens, &token_frames);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, blank, blank, 2, 2, 3 }, &frame_ids);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 2, 3 }, tokens[0..n]);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 3, 5 }, token_frames[0..n]);
+
+    n = greedyCtc(&lp, 6, .{ .blank = blank, .collapse_repeats = false }, &frame_ids, &tokens, &token_frames);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 0, 2, 2, 1 }, tokens[0..n]);
+    try t_.expectEqualSlices(usize, &[_]usize{ 0, 1, 3, 4, 5 }, token_frames[0..n]);
+}
+
+test "pcm16ToMono scales and averages channels" {
+    var mono: [3]f32 = undefined;
+    pcm16ToMono(&mono, &[_]i16{ -32768, 16384, 32767 }, 1);
+    try t_.expectEqualSlices(f32, &[_]f32{ -1, 0.5, 32767.0 / 32768.0 }, &mono);
+    var stereo: [2]f32 = undefined;
+    pcm16ToMono(&stereo, &[_]i16{ -32768, 16384, 100, 300 }, 2);
+    try t_.expectEqualSlices(f32, &[_]f32{ -0.25, 200.0 / 32768.0 }, &stereo);
+}
+
+test "forwardBatch is bit-identical to forward on each clip" {
+    const alloc = t_.allocator;
+    var wpkg = try pkg.parse(alloc, @embedFile("hama_asr"));
+    defer wpkg.deinit();
+    var model = try Asr.init(alloc, &wpkg);
+    defer model.deinit();
+
+    // Mixed lengths, including clips shorter than the reflect pad and one empty.
+    const lengths = [_]usize{ 16000, 1, 3200, 0, 70, 8000 };
+    var total: usize = 0;
+    for (lengths) |n| total += n;
+    const wav = try alloc.alloc(f32, total);
+    defer alloc.free(wav);
+    var prng = std.Random.DefaultPrng.init(18);
+    for (wav) |*x| x.* = prng.random().float(f32) * 0.2 - 0.1;
+
+    var rows: usize = 0;
+    for (lengths) |n| rows += model.numFrames(n);
+    const got = try alloc.alloc(f32, rows * VOCAB);
+    defer alloc.free(got);
+    var frames: [lengths.len]usize = undefined;
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    try t_.expectEqual(rows, try model.forwardBatch(arena_inst.allocator(), wav, &lengths, got, &frames));
+
+    var start: usize = 0;
+    var row: usize = 0;
+    for (lengths, frames) |n, T| {
+        try t_.expectEqual(model.numFrames(n), T);
+        const want = try alloc.alloc(f32, T * VOCAB);
+        defer alloc.free(want);
+        _ = try model.forward(arena_inst.allocator(), wav[start..][0..n], want);
+        try t_.expectEqualSlices(f32, want, got[row * VOCAB ..][0 .. T * VOCAB]);
+        start += n;
+        row += T;
+    }
+}
+
+test "reflectPad matches numpy reflect, including pads longer than the clip" {
+    var dst: [10]f32 = undefined;
+    reflectPad(&dst, &[_]f32{ 1, 2, 3, 4 }, 3);
+    try t_.expectEqualSlices(f32, &[_]f32{ 4, 3, 2, 1, 2, 3, 4, 3, 2, 1 }, &dst);
+    // np.pad([1, 2, 3], 5, mode="reflect")
+    var long: [13]f32 = undefined;
+    reflectPad(&long, &[_]f32{ 1, 2, 3 }, 5);
+    try t_.expectEqualSlices(f32, &[_]f32{ 2, 1, 2, 3, 2, 1, 2, 3, 2, 1, 2, 3, 2 }, &long);
+    // A truncated destination only holds the leading part.
+    var head: [5]f32 = undefined;
+    reflectPad(&head, &[_]f32{ 1, 2, 3, 4 }, 3);
+    try t_.expectEqualSlices(f32, &[_]f32{ 4, 3, 2, 1, 2 }, &head);
+}
+
+test "fft stft matches the ORT stft_real tap and the conv path" {
+    const alloc = t_.allocator;
+    var fx = try pkg.parse(alloc, @embedFile("fixture_asr"));
+    defer fx.deinit();
+    const wav = try fx.getF32(alloc, "waveform");
+    defer alloc.free(wav);
+    const re_ref = try fx.getF32(alloc, "stft_real");
+    defer alloc.free(re_ref);
+
+    // The exported graph's kernels: periodic Hann window x DFT basis.
+    const re_k = try alloc.alloc(f32, N_FREQ * N_FFT);
+    defer alloc.free(re_k);
+    const im_k = try alloc.alloc(f32, N_FREQ * N_FFT);
+    defer alloc.free(im_k);
+    for (0..N_FREQ) |f| for (0..N_FFT) |i| {
+        const w = 0.5 - 0.5 * k_fft.root(i, N_FFT)[0];
+        const b = k_fft.root(f * i, N_FFT);
+        re_k[f * N_FFT + i] = @floatCast(w * b[0]);
+        im_k[f * N_FFT + i] = @floatCast(w * b[1]);
+    };
+    const fft = FftStft.fromKernels(re_k, im_k) orelse return error.TestUnexpectedResult;
+    // Kernels that are not a windowed DFT keep the conv path.
+    im_k[7] += 1e-3;
+    try t_.expect(FftStft.fromKernels(re_k, im_k) == null);
+    im_k[7] -= 1e-3;
+
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    const sc = arena_inst.allocator();
+    const padded = try sc.alloc(f32, wav.len + 2 * PAD);
+    reflectPad(padded, wav, PAD);
+    const t_stft = wav.len / HOP + 1;
+    const p_fft = try sc.alloc(f32, t_stft * N_FREQ);
+    const p_conv = try sc.alloc(f32, t_stft * N_FREQ);
+    const re_fft = try sc.alloc(f32, N_FREQ * t_stft);
+    const re_conv = try sc.alloc(f32, N_FREQ * t_stft);
+    try stftPower(sc, &fft, re_k, im_k, padded, t_stft, p_fft, re_fft);
+    try stftPower(sc, null, re_k, im_k, padded, t_stft, p_conv, re_conv);
+
+    try t_.expect(maxAbsDiff(re_fft, re_ref) < 1e-3);
+    try t_.expect(maxAbsDiff(re_conv, re_ref) < 1e-3);
+    for (p_fft, p_conv) |a, b| try t_.expectApproxEqAbs(b, a, 1e-4 * @max(1, b));
+}
@@ -1,15 +1,175 @@
-//! G2P pipeline glue: encoder + greedy decoder loop. The production FFI exposes
-//! the encoder and decoder-step separately (the host drives the loop, matching
-//! the current runtime), but this end-to-end test validates encoder + decoder +
-//! loop + EOS handling together against the ORT-decoded token sequence.
+//! G2P pipeline glue: encoder + greedy decoder loop. `greedy` runs the encoder
+//! and the whole autoregressive decoder loop (with EOS handling) in the engine,
+//! so the host makes one call per segment; `greedyBatch` does the same for many
+//! padded segments at once. The encoder and decoder-step are still exposed
+//! separately for hosts that drive the loop themselves.
 
 const std = @import("std");
 const pkg = @import("../pkg.zig");
 const Enc = @import("g2p_encoder.zig");
 const Dec = @import("g2p_decoder.zig");
+const f16u = @import("../f16.zig");
 
+/// Encode `ids` (length T, `length` valid) and greedily decode from `sos`.
+/// Writes one decoded token id and attention argmax per step into `tokens` /
+/// `attns` (at most `tokens.len` steps) and returns the step count. The EOS
+/// token, when reached, is included as the last step (mirroring the host loop).
+pub fn greedy(
+    encoder: *const Enc.Encoder,
+    decoder: *const Dec.Decoder,
+    scratch: std.mem.Allocator,
+    ids: []const i64,
+    length: usize,
+    sos: i64,
+    eos: i64,
+    tokens: []i64,
+    attns: []i64,
+) !usize {
+    var counts: [1]usize = undefined;
+    try greedyBatch(encoder, decoder, scratch, ids, &.{length}, sos, eos, tokens.len, tokens, attns, &counts);
+    return counts[0];
+}
+
+/// Batched `greedy` over B padded sequences: `ids` is [B, T] with `lengths[b]`
+/// valid tokens per row. Each row is encoded, then all live rows advance one
+/// decoder step together; a row drops out of the batch once it emits EOS.
+/// Row b's steps land in tokens/attns[b*max_steps ..][0..counts[b]], with the
+/// same per-row results as `greedy`.
+pub fn greedyBatch(
+    encoder: *const Enc.Encoder,
+    decoder: *const Dec.Decoder,
+    scratch: std.mem.Allocator,
+    ids: []const i64,
+    lengths: []const usize,
+    sos: i64,
+    eos: i64,
+    max_steps: usize,
+    tokens: []i64,
+    attns: []i64,
+    counts: []usize,
+) !void {
+    const B = lengths.len;
+    const T = ids.len / B;
+    std.debug.assert(ids.len == B * T and counts.len == B);
+    std.debug.assert(tokens.len >= B * max_steps and attns.len >= B * max_steps);
+
+    const eo = try scratch.alloc(f32, B * T * Enc.D2);
+    const pk = try scratch.alloc(f32, B * T * Enc.H);
+    const mask = try scratch.alloc(u8, B * T);
+    // Ping-pong the recurrent state between two buffers instead of copying.
+    var hidden = try scratch.alloc(f32, B * 2 * Enc.H);
+    var prev = try scratch.alloc(f32, B * T);
+    var hidden_next = try scratch.alloc(f32, B * 2 * Enc.H);
+    var prev_next = try scratch.alloc(f32, B * T);
+
+    // Encoder and per-step temporaries come from one arena reset between
+    // uses, so the loop reuses the same pages instead of growing `scratch`.
+    var step_arena = std.heap.ArenaAllocator.init(scratch);
+    defer step_arena.deinit();
+
+    for (0..B) |b| {
+        _ = step_arena.reset(.retain_capacity);
+        try encoder.forward(step_arena.allocator(), ids[b * T ..][0..T], lengths[b], .{
+            .encoder_outputs = eo[b * T * Enc.D2 ..][0 .. T * Enc.D2],
+            .projected_keys = pk[b * T * Enc.H ..][0 .. T * Enc.H],
+            .hidden = hidden[b * 2 * Enc.H ..][0 .. 2 * Enc.H],
+            .encoder_mask = mask[b * T ..][0..T],
+            .prev_attn = prev[b * T ..][0..T],
+        });
+    }
+    // The encoder memory is constant across steps: round it to f16 once.
+    for (eo) |*v| v.* = f16u.round(v.*);
+    for (pk) |*v| v.* = f16u.round(v.*);
+
+    const positions = try scratch.alloc(f32, T);
+    for (0..T) |i| positions[i] = @floatFromInt(i);
+
+    const rows = try scratch.alloc(usize, B);
+    const tok_in = try scratch.alloc(i64, B);
+    const next = try scratch.alloc(i64, B);
+    const attn = try scratch.alloc(i64, B);
+    for (0..B) |b| {
+        rows[b] = b;
+        tok_in[b] = sos;
+        counts[b] = 0;
+    }
+
+    var live = B;
+    var s: usize = 0;
+    while (s < max_steps and live > 0) : (s += 1) {
+        _ = step_arena.reset(.retain_capacity);
+        try decoder.stepBatch(step_arena.allocator(), rows[0..live], tok_in[0..live], eo, pk, mask, prev, hidden, positions, .{
+            .next_token_ids = next[0..live],
+            .attn_argmax = attn[0..live],
+            .hidden_out = hidden_next,
+            .prev_attn_out = prev_next,
+        });
+        std.mem.swap([]f32, &hidden, &hidden_next);
+        std.mem.swap([]f32, &prev, &prev_next);
+        // record this step, then compact the live set (finished rows drop out)
+        var kept: usize = 0;
+        for (0..live) |i| {
+            const row = rows[i];
+            tokens[row * max_steps + s] = next[i];
+            attns[row * max_steps + s] = attn[i];
+            counts[row] = s + 1;
+            if (next[i] == eos) continue;
+            rows[kept] = row;
+            tok_in[kept] = next[i];
+            kept += 1;
+        }
+        live = kept;
+    }
+}
+
+// --------------------------------------------------------------------------- //
 const t_ = std.testing;
 
+/// The shipped encoder/decoder and the `fixture_g2p` input every decode test
+/// starts from; `fixture` stays parsed for the expected outputs.
+const Fixture = struct {
+    alloc: std.mem.Allocator,
+    encoder: Enc.Encoder,
+    decoder: Dec.Decoder,
+    fixture: pkg.Package,
+    ids: []i64,
+    length: usize,
+    sos: i64,
+    eos: i64,
+
+    fn deinit(self: *Fixture) void {
+        self.alloc.free(self.ids);
+        self.fixture.deinit();
+        self.decoder.deinit();
+        self.encoder.deinit();
+    }
+};
+
+fn loadFixture(alloc: std.mem.Allocator) !Fixture {
+    var enc_pkg = try pkg.parse(alloc, @embedFile("hama_encoder"));
+    defer enc_pkg.deinit();
+    var dec_pkg = try pkg.parse(alloc, @embedFile("hama_decoder"));
+    defer dec_pkg.deinit();
+    var encoder = try Enc.Encoder.init(alloc, &enc_pkg);
+    errdefer encoder.deinit();
+    var decoder = try Dec.Decoder.init(alloc, &dec_pkg);
+    errdefer decoder.deinit();
+    var fx = try pkg.parse(alloc, @embedFile("fixture_g2p"));
+    errdefer fx.deinit();
+    const ids = try fx.getI64(alloc, "input_ids");
+    errdefer alloc.free(ids);
+    return .{
+        .alloc = alloc,
+        .encoder = encoder,
+        .decoder = decoder,
+        .fixture = fx,
+        .ids = ids,
+        .length = @intCast(std.mem.readInt(u64, (try fx.must("length")).bytes[0..8], .little)),
+        .sos = @bitCast(std.mem.readInt(u64, (try fx.must("sos_id")).bytes[0..8], .little)),
+        .eos = @bitCast(std.mem.readInt(u64, (try fx.must("eos_id")).bytes[0..8], .little)),
+    };
+}
+
 test "g2p end-to-end greedy decode matches ORT token sequence" {
     const alloc = t_.allocator;
     var enc_pkg = try pkg.parse(alloc, @embedFile("hama_encoder"));
@@ -90,3 +250,123 @@ test "g2p end-to-end greedy decode matches ORT token sequence" {
     try t_.expectEqualSlices(i64, exp_tokens, got_tokens.items);
     try t_.expectEqualSlices(i64, exp_attns, got_attns.items);
 }
+
+test "g2p fused greedy matches ORT token sequence" {
+    const alloc = t_.allocator;
+    var fx = try loadFixture(alloc);
+    defer fx.deinit();
+    const exp_tokens = try fx.fixture.getI64(alloc, "tokens");
+    defer alloc.free(exp_tokens);
+    const exp_attns = try fx.fixture.getI64(alloc, "attns");
+    defer alloc.free(exp_attns);
+
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    var tokens: [32]i64 = undefined;
+    var attns: [32]i64 = undefined;
+    const n = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), fx.ids, fx.length, fx.sos, fx.eos, &tokens, &attns);
+
+    try t_.expectEqualSlices(i64, exp_tokens, tokens[0..n]);
+    try t_.expectEqualSlices(i64, exp_attns, attns[0..n]);
+}
+
+test "g2p batched greedy matches per-row greedy" {
+    const alloc = t_.allocator;
+    var fx = try loadFixture(alloc);
+    defer fx.deinit();
+    const T = fx.ids.len;
+
+    // Row 0 is the fixture; row 1 is a truncated copy so the rows finish at
+    // different steps and the live set shrinks mid-decode.
+    const short_len = @max(fx.length / 2, 1);
+    const batch_ids = try alloc.alloc(i64, 2 * T);
+    defer alloc.free(batch_ids);
+    @memcpy(batch_ids[0..T], fx.ids);
+    @memcpy(batch_ids[T..], fx.ids);
+    for (short_len..T) |i| batch_ids[T + i] = 0;
+    const lengths = [_]usize{ fx.length, short_len };
+
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    const MS = 32;
+    var tokens: [2 * MS]i64 = undefined;
+    var attns: [2 * MS]i64 = undefined;
+    var counts: [2]usize = undefined;
+    try greedyBatch(&fx.encoder, &fx.decoder, arena_inst.allocator(), batch_ids, &lengths, fx.sos, fx.eos, MS, &tokens, &attns, &counts);
+
+    for (0..2) |b| {
+        var want_tokens: [MS]i64 = undefined;
+        var want_attns: [MS]i64 = undefined;
+        const n = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), batch_ids[b * T ..][0..T], lengths[b], fx.sos, fx.eos, &want_tokens, &want_attns);
+        try t_.expectEqualSlices(i64, want_tokens[0..n], tokens[b * MS ..][0..counts[b]]);
+        try t_.expectEqualSlices(i64, want_attns[0..n], attns[b * MS ..][0..counts[b]]);
+    }
+}
+
+test "g2p greedy is independent of the padded input width" {
+    const alloc = t_.allocator;
+    var fx = try loadFixture(alloc);
+    defer fx.deinit();
+
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    var want_tokens: [32]i64 = undefined;
+    var want_attns: [32]i64 = undefined;
+    const n = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), fx.ids, fx.length, fx.sos, fx.eos, &want_tokens, &want_attns);
+
+    // The pad embedding is zero and padded positions are masked, so encoding at
+    // the exact length (or any bucket above it) decodes identically.
+    for ([_]usize{ fx.length, @min(fx.length + 5, fx.ids.len), fx.ids.len }) |width| {
+        var tokens: [32]i64 = undefined;
+        var attns: [32]i64 = undefined;
+        const m = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), fx.ids[0..width], fx.length, fx.sos, fx.eos, &tokens, &attns);
+        try t_.expectEqualSlices(i64, want_tokens[0..n], tokens[0..m]);
+        try t_.expectEqualSlices(i64, want_attns[0..n], attns[0..m]);
+    }
+}
+
+const ReentrancyCtx = struct {
+    fx: *const Fixture,
+    want: []const i64,
+    ok: bool = false,
+
+    fn run(ctx: *ReentrancyCtx) void {
+        ctx.ok = ctx.check() catch false;
+    }
+
+    fn check(ctx: *ReentrancyCtx) !bool {
+        for (0..8) |_| {
+            var arena_inst = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+            defer arena_inst.deinit();
+            var tokens: [32]i64 = undefined;
+            var attns: [32]i64 = undefined;
+            const fx = ctx.fx;
+            const n = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), fx.ids, fx.length, fx.sos, fx.eos, &tokens, &attns);
+            if (!std.mem.eql(i64, ctx.want, tokens[0..n])) return false;
+        }
+        return true;
+    }
+};
+
+test "g2p greedy is reentrant across threads sharing one model" {
+    const alloc = t_.allocator;
+    var fx = try loadFixture(alloc);
+    defer fx.deinit();
+
+    var arena_inst = std.heap.ArenaAllocator.init(alloc);
+    defer arena_inst.deinit();
+    var want_tokens: [32]i64 = undefined;
+    var want_attns: [32]i64 = undefined;
+    const n = try greedy(&fx.encoder, &fx.decoder, arena_inst.allocator(), fx.ids, fx.length, fx.sos, fx.eos, &want_tokens, &want_attns);
+
+    // Models are read-only after init and every call brings its own scratch,
+    // so concurrent decodes over one model must not disturb each other.
+    var ctxs: [4]ReentrancyCtx = undefined;
+    var threads: [4]std.Thread = undefined;
+    for (&ctxs, &threads) |*ctx, *thread| {
+        ctx.* = .{ .fx = &fx, .want = want_tokens[0..n] };
+        thread.* = try std.Thread.spawn(.{}, ReentrancyCtx.run, .{ctx});
+    }
+    for (threads) |thread| thread.join();
+    for (ctxs) |ctx| try t_.expect(ctx.ok);
+}
@@ -1,4 +1,6 @@
-//! G2P single decoder step (batch=1), reproducing decoder_step.onnx exactly.
+//! G2P decoder step, reproducing decoder_step.onnx exactly. `step` is the
+//! batch=1 graph; `stepBatch` runs the same arithmetic over the live rows of a
+//! padded [B, T] batch.
 //!
 //! Pipeline:
 //!   emb(f16) ; residual_proj = emb@W302 (f32)
@@ -40,6 +42,14 @@ pub const DecOut = struct {
     prev_attn_out: []f32, // [T]
 };
 
+/// Outputs of `stepBatch` for n live rows of a [B, T] batch.
+pub const BatchOut = struct {
+    next_token_ids: []i64, // [n]
+    attn_argmax: []i64, // [n]
+    hidden_out: []f32, // [B,2,96]
+    prev_attn_out: []f32, // [B,T]
+};
+
 fn r16(buf: []f32) void {
     for (buf) |*v| v.* = f16u.round(v.*);
 }
@@ -130,103 +140,151 @@ pub const Decoder = struct {
         positions: []const f32, // [T]
         out: DecOut,
     ) !void {
-        const T = prev_attn.len;
-
-        // round float inputs to f16 (mirrors the graph's entry casts)
+        // round the encoder memory to f16 (mirrors the graph's entry casts)
         const eo = try r16copy(scratch, encoder_outputs);
         const pk = try r16copy(scratch, projected_keys);
-        const pa = try r16copy(scratch, prev_attn);
-        const hid = try r16copy(scratch, hidden);
-        const pos = try r16copy(scratch, positions);
+        const row = [_]usize{0};
+        try self.stepBatch(scratch, &row, &.{token_id}, eo, pk, encoder_mask, prev_attn, hidden, positions, .{
+            .next_token_ids = out.next_token_id[0..1],
+            .attn_argmax = out.attn_argmax[0..1],
+            .hidden_out = out.hidden_out,
+            .prev_attn_out = out.prev_attn_out,
+        });
+    }
 
-        // embedding + residual projection (f32)
-        const emb_v = try scratch.alloc(f32, EMB);
-        k_gather.embed(emb_v, self.emb, &.{token_id}, EMB);
-        const rproj = try scratch.alloc(f32, H);
-        k_mm.matmul(rproj, emb_v, self.res_w, 1, EMB, H);
+    /// One decoder step for the live rows `rows` of a padded [B, T] batch
+    /// (`tokens[i]` is the input token of row `rows[i]`). Per-row arithmetic is
+    /// identical to `step`; the token-level projections and GRU cells run over
+    /// all live rows at once. `encoder_outputs` / `projected_keys` must already
+    /// be f16-valued (they are constant across steps, so callers round once).
+    /// Only live rows of `out.hidden_out` / `out.prev_attn_out` are written.
+    pub fn stepBatch(
+        self: *const Decoder,
+        scratch: std.mem.Allocator,
+        rows: []const usize,
+        tokens: []const i64,
+        encoder_outputs: []const f32, // [B,T,192]
+        projected_keys: []const f32, // [B,T,96]
+        encoder_mask: []const u8, // [B,T] (1 = padding)
+        prev_attn: []const f32, // [B,T]
+        hidden: []const f32, // [B,2,96]
+        positions: []const f32, // [T]
+        out: BatchOut,
+    ) !void {
+        const n = rows.len;
+        const T = positions.len;
+        std.debug.assert(tokens.len == n and out.next_token_ids.len >= n and out.attn_argmax.len >= n);
 
-        // location features: conv(prev_attn) -> [16,T] (f16) -> proj -> [T,96] (f32)
-        const la = try scratch.alloc(f32, LOC * T);
-        k_conv.conv1d(la, pa, self.loc_conv, null, 1, T, LOC, 11, 1, 5, 5, 1, 1);
-        r16(la);
-        const la_t = try scratch.alloc(f32, T * LOC);
-        for (0..LOC) |c| {
-            for (0..T) |i| la_t[i * LOC + c] = la[c * T + i];
+        // round per-step float inputs to f16 (mirrors the graph's entry casts)
+        const pos = try r16copy(scratch, positions);
+        const hid0 = try scratch.alloc(f32, n * H);
+        const hid1 = try scratch.alloc(f32, n * H);
+        for (rows, 0..) |row, i| {
+            for (0..H) |j| {
+                hid0[i * H + j] = f16u.round(hidden[row * 2 * H + j]);
+                hid1[i * H + j] = f16u.round(hidden[row * 2 * H + H + j]);
+            }
         }
-        const locproj = try scratch.alloc(f32, T * H);
-        k_mm.matmul(locproj, la_t, self.loc_w, T, LOC, H);
+
+        // embedding + residual projection (f32)
+        const emb_v = try scratch.alloc(f32, n * EMB);
+        k_gather.embed(emb_v, self.emb, tokens, EMB);
+        const rproj = try scratch.alloc(f32, n * H);
+        k_mm.matmul(rproj, emb_v, self.res_w, n, EMB, H);
 
         // GRU1 then GRU2 (both single-step, forward, f16)
-        const g1 = try scratch.alloc(f32, H);
-        const yh1 = try scratch.alloc(f32, H);
-        try k_gru.gru(scratch, g1, yh1, emb_v, self.g1_w, self.g1_r, self.g1_b, hid[0..H], 1, EMB, H, 1, 1);
+        const g1 = try scratch.alloc(f32, n * H);
+        k_gru.cellBatch(g1, emb_v, hid0, self.g1_w, self.g1_r, self.g1_b, n, EMB, H);
         r16(g1);
-        const g2 = try scratch.alloc(f32, H);
-        const yh2 = try scratch.alloc(f32, H);
-        try k_gru.gru(scratch, g2, yh2, g1, self.g2_w, self.g2_r, self.g2_b, hid[H .. 2 * H], 1, H, H, 1, 1);
+        const g2 = try scratch.alloc(f32, n * H);
+        k_gru.cellBatch(g2, g1, hid1, self.g2_w, self.g2_r, self.g2_b, n, H, H);
         r16(g2);
-        @memcpy(out.hidden_out[0..H], g1);
-        @memcpy(out.hidden_out[H .. 2 * H], g2);
+        for (rows, 0..) |row, i| {
+            @memcpy(out.hidden_out[row * 2 * H ..][0..H], g1[i * H ..][0..H]);
+            @memcpy(out.hidden_out[row * 2 * H + H ..][0..H], g2[i * H ..][0..H]);
+        }
 
         // decoder state = LN(GRU2 + residual_proj)  (f16 LN)
-        const state = try scratch.alloc(f32, H);
+        const state = try scratch.alloc(f32, n * H);
         for (state, 0..) |*v, i| v.* = g2[i] + rproj[i];
         r16(state);
-        k_ln.layerNormRow(state, self.state_norm_w, self.state_norm_b, EPS);
+        k_ln.layerNorm(state, n, H, self.state_norm_w, self.state_norm_b, EPS);
         r16(state);
 
         // query = state @ W303 (f32)
-        const query = try scratch.alloc(f32, H);
-        k_mm.matmul(query, state, self.query_w, 1, H, H);
+        const query = try scratch.alloc(f32, n * H);
+        k_mm.matmul(query, state, self.query_w, n, H, H);
 
-        // energy[t] = tanh(query + projected_keys[t] + locproj[t]) @ W305  (f32)
+        // per-row location-aware attention over that row's encoder memory
+        const pa = try scratch.alloc(f32, T);
+        const la = try scratch.alloc(f32, LOC * T);
+        const la_t = try scratch.alloc(f32, T * LOC);
+        const locproj = try scratch.alloc(f32, T * H);
         const tanhbuf = try scratch.alloc(f32, T * H);
-        for (0..T) |t| {
-            for (0..H) |j| {
-                tanhbuf[t * H + j] = std.math.tanh(query[j] + pk[t * H + j] + locproj[t * H + j]);
-            }
-        }
         const energy = try scratch.alloc(f32, T);
-        k_mm.matmul(energy, tanhbuf, self.energy_w, T, H, 1);
-
-        // location-aware penalty + masking + softmax
-        var expected: f32 = 0;
-        for (0..T) |t| expected += pa[t] * pos[t];
-        const attn = out.prev_attn_out; // reuse output buffer for attention
-        for (0..T) |t| {
-            const penalty = @abs(pos[t] - expected) * 0.1;
-            attn[t] = energy[t] - penalty;
-        }
-        // mask: where encoder_mask (padding) -> -inf, then softmax
         const keep = try scratch.alloc(bool, T);
-        for (0..T) |t| keep[t] = encoder_mask[t] == 0;
-        k_soft.softmaxRow(attn, keep);
-        out.attn_argmax.* = @intCast(k_reduce.argmax(attn));
+        const ctx = try scratch.alloc(f32, n * CTX);
+        for (rows, 0..) |row, i| {
+            const pk = projected_keys[row * T * H ..][0 .. T * H];
+            const q = query[i * H ..][0..H];
+            for (pa, prev_attn[row * T ..][0..T]) |*d, v| d.* = f16u.round(v);
 
-        // context = attn @ encoder_outputs -> [192], then context_norm (f16)
-        const ctx = try scratch.alloc(f32, CTX);
-        k_mm.matmul(ctx, attn, eo, 1, T, CTX);
-        r16(ctx);
-        k_ln.layerNormRow(ctx, self.ctx_norm_w, self.ctx_norm_b, EPS);
-        r16(ctx);
+            // location features: conv(prev_attn) -> [16,T] (f16) -> proj -> [T,96] (f32)
+            k_conv.conv1d(la, pa, self.loc_conv, null, 1, T, LOC, 11, 1, 5, 5, 1, 1);
+            r16(la);
+            for (0..LOC) |c| {
+                for (0..T) |t| la_t[t * LOC + c] = la[c * T + t];
+            }
+            k_mm.matmul(locproj, la_t, self.loc_w, T, LOC, H);
+
+            // energy[t] = tanh(query + projected_keys[t] + locproj[t]) @ W305  (f32)
+            for (0..T) |t| {
+                for (0..H) |j| {
+                    tanhbuf[t * H + j] = std.math.tanh(q[j] + pk[t * H + j] + locproj[t * H + j]);
+                }
+            }
+            k_mm.matmul(energy, tanhbuf, self.energy_w, T, H, 1);
+
+            // location-aware penalty + masking + softmax
+            var expected: f32 = 0;
+            for (0..T) |t| expected += pa[t] * pos[t];
+            const attn = out.prev_attn_out[row * T ..][0..T]; // reuse output buffer for attention
+            for (0..T) |t| {
+                const penalty = @abs(pos[t] - expected) * 0.1;
+                attn[t] = energy[t] - penalty;
+            }
+            // mask: where encoder_mask (padding) -> -inf, then softmax
+            for (0..T) |t| keep[t] = encoder_mask[row * T + t] == 0;
+            k_soft.softmaxRow(attn, keep);
+            out.attn_argmax[i] = @intCast(k_reduce.argmax(attn));
+
+            // context = attn @ encoder_outputs -> [192], then context_norm (f16)
+            const c_row = ctx[i * CTX ..][0..CTX];
+            k_mm.matmul(c_row, attn, encoder_outputs[row * T * CTX ..][0 .. T * CTX], 1, T, CTX);
+            r16(c_row);
+            k_ln.layerNormRow(c_row, self.ctx_norm_w, self.ctx_norm_b, EPS);
+            r16(c_row);
+        }
 
         // fuse: context_proj([state|context]) -> tanh -> fusion_norm
-        const concat = try scratch.alloc(f32, H + CTX);
-        @memcpy(concat[0..H], state);
-        @memcpy(concat[H..], ctx);
-        const fused = try scratch.alloc(f32, H);
-        k_mm.gemm(fused, concat, self.ctx_proj_w, self.ctx_proj_b, 1, H + CTX, H, true, 1.0, 1.0);
+        const concat = try scratch.alloc(f32, n * (H + CTX));
+        for (0..n) |i| {
+            @memcpy(concat[i * (H + CTX) ..][0..H], state[i * H ..][0..H]);
+            @memcpy(concat[i * (H + CTX) + H ..][0..CTX], ctx[i * CTX ..][0..CTX]);
+        }
+        const fused = try scratch.alloc(f32, n * H);
+        k_mm.gemm(fused, concat, self.ctx_proj_w, self.ctx_proj_b, n, H + CTX, H, true, 1.0, 1.0);
         for (fused) |*v| v.* = std.math.tanh(v.*);
         r16(fused);
-        k_ln.layerNormRow(fused, self.fusion_norm_w, self.fusion_norm_b, EPS);
+        k_ln.layerNorm(fused, n, H, self.fusion_norm_w, self.fusion_norm_b, EPS);
         r16(fused);
 
         // output_in_proj -> output_proj -> logits -> argmax
-        const oin = try scratch.alloc(f32, EMB);
-        k_mm.gemm(oin, fused, self.out_in_w, self.out_in_b, 1, H, EMB, true, 1.0, 1.0);
-        const logits = try scratch.alloc(f32, VOCAB);
-        k_mm.matmul(logits, oin, self.out_w, 1, EMB, VOCAB);
-        out.next_token_id.* = @intCast(k_reduce.argmax(logits));
+        const oin = try scratch.alloc(f32, n * EMB);
+        k_mm.gemm(oin, fused, self.out_in_w, self.out_in_b, n, H, EMB, true, 1.0, 1.0);
+        const logits = try scratch.alloc(f32, n * VOCAB);
+        k_mm.matmul(logits, oin, self.out_w, n, EMB, VOCAB);
+        for (0..n) |i| out.next_token_ids[i] = @intCast(k_reduce.argmax(logits[i * VOCAB ..][0..VOCAB]));
     }
 };
 
@@ -18,6 +18,7 @@ const std = @import("std");
 const pkg = @import("../pkg.zig");
 const k_mm = @import("../kernels/matmul.zig");
 const k_ln = @import("../kernels/layernorm.zig");
+const k_attn = @import("../kernels/attention.zig");
 const k_soft = @import("../kernels/softmax.zig");
 const act = @import("../kernels/activations.zig");
 const k_gather = @import("../kernels/gather.zig");
@@ -31,33 +32,50 @@ pub const VOCAB: usize = 21367;
 pub const MAXPOS: usize = 416;
 pub const NLAYERS: usize = 4;
 pub const EPS: f32 = 1e-5;
+
+/// Scratch bound for one greedy decode whose prefix and output fill MAXPOS:
+/// the K/V cache, the prefill activations and attention panels, and a decode
+/// step's workspace, plus slack for alignment and index arrays. Handles
+/// pre-size their scratch arenas to it.
+pub const SCRATCH_BYTES: usize = blk: {
+    const t_pad = (MAXPOS + 63) / 64 * 64;
+    const floats = 2 * NLAYERS * MAXPOS * D // k/v cache
+        + MAXPOS * D // prefill hidden states
+        + MAXPOS * (7 * D + FF) // prefill ln, qkv, ctx, out, ff1, ff2
+        + D * (MAXPOS + 2 * t_pad) // attention panels
+        + D + (5 * D + FF) + 2 * MAXPOS; // decode row, step workspace, attention
+    break :blk floats * @sizeOf(f32) + 64 * 1024;
+};
 const SCALE: f32 = 0.13363062095621219; // 1/sqrt(56)
 
 const Layer = struct {
-    in_w: []f32, // [3D, D]
-    in_b: []f32, // [3D]
-    out_w: []f32, // [D, D]
-    out_b: []f32, // [D]
-    l1_w: []f32, // [FF, D]
-    l1_b: []f32, // [FF]
-    l2_w: []f32, // [D, FF]
-    l2_b: []f32, // [D]
-    n1_w: []f32, // [D]
-    n1_b: []f32,
-    n2_w: []f32,
-    n2_b: []f32,
+    in_w: []const f32, // [3D, D]
+    in_b: []const f32, // [3D]
+    out_w: []const f32, // [D, D]
+    out_b: []const f32, // [D]
+    l1_w: []const f32, // [FF, D]
+    l1_b: []const f32, // [FF]
+    l2_w: []const f32, // [D, FF]
+    l2_b: []const f32, // [D]
+    n1_w: []const f32, // [D]
+    n1_b: []const f32,
+    n2_w: []const f32,
+    n2_b: []const f32,
 };
 
 pub const P2G = struct {
     alloc: std.mem.Allocator,
-    emb: []f32, // [VOCAB, D]  (also the tied output projection)
-    pos: []f32, // [MAXPOS, D]
-    fn_w: []f32, // final norm weight [D]
-    fn_b: []f32,
+    emb: []const f32, // [VOCAB, D]  (also the tied output projection)
+    pos: []const f32, // [MAXPOS, D]
+    fn_w: []const f32, // final norm weight [D]
+    fn_b: []const f32,
     layers: [NLAYERS]Layer,
     owned: std.ArrayList([]f32),
 
-    fn take(self: *P2G, p: *const pkg.Package, name: []const u8) ![]f32 {
+    /// Weight tensor `name`: borrowed in place from a pinned (mapped) package
+    /// when possible, else an owned f32 copy freed by `deinit`.
+    fn take(self: *P2G, p: *const pkg.Package, name: []const u8) ![]const f32 {
+        if (try p.viewF32(name)) |view| return view;
         const t = try p.getF32(self.alloc, name);
         try self.owned.append(self.alloc, t);
         return t;
@@ -120,13 +138,10 @@ pub const P2G = struct {
         }
         if (dbg.embpos) |d| @memcpy(d, x);
 
-        // boolean keep mask per query row reused across layers/heads
-        const keep = try sc.alloc(bool, T);
         const ln = try sc.alloc(f32, T * D);
         const qkv = try sc.alloc(f32, T * 3 * D);
         const ctx = try sc.alloc(f32, T * D);
         const op = try sc.alloc(f32, T * D);
-        const scores = try sc.alloc(f32, T);
         const ln2 = try sc.alloc(f32, T * D);
         const ff1 = try sc.alloc(f32, T * FF);
         const ff2 = try sc.alloc(f32, T * D);
@@ -137,25 +152,7 @@ pub const P2G = struct {
             @memcpy(ln, x);
             k_ln.layerNorm(ln, T, D, L.n1_w, L.n1_b, EPS);
             k_mm.linear(qkv, ln, L.in_w, L.in_b, T, D, 3 * D);
-            for (0..HEADS) |h| {
-                const qo = h * HEAD;
-                const ko = D + h * HEAD;
-                const vo = 2 * D + h * HEAD;
-                for (0..T) |i| {
-                    for (0..T) |j| keep[j] = (j < prefix) or (i >= prefix and j <= i);
-                    for (0..T) |j| {
-                        var s: f32 = 0;
-                        for (0..HEAD) |d| s += qkv[i * 3 * D + qo + d] * qkv[j * 3 * D + ko + d];
-                        scores[j] = s * SCALE;
-                    }
-                    k_soft.softmaxRow(scores, keep);
-                    for (0..HEAD) |d| {
-                        var accv: f32 = 0;
-                        for (0..T) |j| accv += scores[j] * qkv[j * 3 * D + vo + d];
-                        ctx[i * D + h * HEAD + d] = accv;
-                    }
-                }
-            }
+            try k_attn.attention(HEAD, sc, ctx, D, qkv, 3 * D, qkv[D..], qkv[2 * D ..], 3 * D, T, HEADS, SCALE, prefix);
             k_mm.linear(op, ctx, L.out_w, L.out_b, T, D, D);
             for (0..T * D) |i| x[i] += op[i];
             // ---- feed-forward (pre-norm) ----
@@ -181,52 +178,6 @@ pub const P2G = struct {
         k_mm.linear(out, hidden[(T - 1) * D ..][0..D], self.emb, null, 1, D, VOCAB);
     }
 
-    // One pre-norm transformer block over a single token's hidden state `x`
-    // (length D), attending to cached keys/values for positions 0..=cur.
-    // `attn_acc`, when non-null, accumulates this layer's head-summed attention
-    // weights over cached positions 0..=cur (used to derive output->input alignment).
-    fn stepLayer(self: *const P2G, L: Layer, x: []f32, kc: []f32, vc: []f32, cur: usize, attn_acc: ?[]f32, sc: anytype) !void {
-        _ = self;
-        const ln = sc[0..D];
-        @memcpy(ln, x);
-        k_ln.layerNormRow(ln, L.n1_w, L.n1_b, EPS);
-        var qkv: [3 * D]f32 = undefined;
-        k_mm.linear(&qkv, ln, L.in_w, L.in_b, 1, D, 3 * D);
-        @memcpy(kc[cur * D ..][0..D], qkv[D .. 2 * D]);
-        @memcpy(vc[cur * D ..][0..D], qkv[2 * D .. 3 * D]);
-        const ctx = sc[D .. 2 * D];
-        const scores = sc[2 * D .. 2 * D + (cur + 1)];
-        for (0..HEADS) |h| {
-            const qo = h * HEAD;
-            for (0..cur + 1) |j| {
-                var s: f32 = 0;
-                for (0..HEAD) |d| s += qkv[qo + d] * kc[j * D + h * HEAD + d];
-                scores[j] = s * SCALE;
-            }
-            k_soft.softmaxRow(scores, null);
-            if (attn_acc) |acc| {
-                for (0..cur + 1) |j| acc[j] += scores[j];
-            }
-            for (0..HEAD) |d| {
-                var accv: f32 = 0;
-                for (0..cur + 1) |j| accv += scores[j] * vc[j * D + h * HEAD + d];
-                ctx[h * HEAD + d] = accv;
-            }
-        }
-        var op: [D]f32 = undefined;
-        k_mm.linear(&op, ctx, L.out_w, L.out_b, 1, D, D);
-        for (0..D) |i| x[i] += op[i];
-        const ln2 = sc[2 * D .. 3 * D];
-        @memcpy(ln2, x);
-        k_ln.layerNormRow(ln2, L.n2_w, L.n2_b, EPS);
-        var ff1: [FF]f32 = undefined;
-        k_mm.linear(&ff1, ln2, L.l1_w, L.l1_b, 1, D, FF);
-        for (&ff1) |*v| v.* = act.gelu(v.*);
-        var ff2: [D]f32 = undefined;
-        k_mm.linear(&ff2, &ff1, L.l2_w, L.l2_b, 1, FF, D);
-        for (0..D) |i| x[i] += ff2[i];
-    }
-
     /// KV-cached greedy decode — identical output to `greedy`, O(T) per step.
     /// Prefill runs the full (bidirectional) forward over the prefix and caches
     /// K/V; each subsequent token processes one position against the cache.
@@ -240,85 +191,370 @@ pub const P2G = struct {
         out: []i64,
         align_out: ?[]i64,
     ) !usize {
-        const prefix = prefix_ids.len;
-        const kc = try sc.alloc([]f32, NLAYERS);
-        const vc = try sc.alloc([]f32, NLAYERS);
-        for (0..NLAYERS) |l| {
-            kc[l] = try sc.alloc(f32, MAXPOS * D);
-            vc[l] = try sc.alloc(f32, MAXPOS * D);
+        var count: [1]usize = undefined;
+        try self.greedyBatch(sc, prefix_ids, &[_]usize{prefix_ids.len}, &[_]usize{max_new}, max_new, eos, pad, null, out, align_out, &count);
+        return count[0];
+    }
+
+    /// `greedyCached` over B prefixes stored back to back (`lengths[b]` ids
+    /// each). Row b's ids, at most `max_new[b]`, land in out[b*stride ..] and
+    /// its alignments likewise in `align_out`; counts[b] is how many. The
+    /// prefill projections run once over every prefix's positions (attention
+    /// stays within each prefix), and each decode step runs the projections and
+    /// the tied vocabulary projection as one matmul over the rows still
+    /// decoding; a row drops out at eos/pad or its limit. Every row's output is
+    /// bit-identical to `greedyCached` on that row alone.
+    ///
+    /// `shortlist`, when given, is an ascending list of the token ids decoding
+    /// may emit (it should include eos); each step then scores only those rows
+    /// of the tied embedding.
+    pub fn greedyBatch(
+        self: *const P2G,
+        sc: std.mem.Allocator,
+        prefixes: []const i64,
+        lengths: []const usize,
+        max_new: []const usize,
+        stride: usize,
+        eos: i64,
+        pad: i64,
+        shortlist: ?[]const u32,
+        out: []i64,
+        align_out: ?[]i64,
+        counts: []usize,
+    ) !void {
+        const B = lengths.len;
+        std.debug.assert(max_new.len == B and counts.len == B and out.len >= B * stride);
+        if (align_out) |a| @memset(a[0 .. B * stride], -1);
+
+        // Row b caches K/V for the positions it can reach: its prefix plus all
+        // but the last of its generated tokens.
+        const kv_base = try sc.alloc(usize, B + 1);
+        kv_base[0] = 0;
+        for (0..B) |b| {
+            std.debug.assert(max_new[b] <= stride and lengths[b] > 0);
+            if (lengths[b] >= MAXPOS) return error.SequenceTooLong;
+            kv_base[b + 1] = kv_base[b] + @min(MAXPOS, lengths[b] + max_new[b]) * D;
         }
-        const work = try sc.alloc(f32, 3 * D + MAXPOS); // stepLayer scratch
-        const align_buf = try sc.alloc(f32, MAXPOS); // head-summed attention scratch
-        if (align_out) |a| {
-            for (a) |*v| v.* = -1;
+        const kc = try sc.alloc(f32, NLAYERS * kv_base[B]);
+        const vc = try sc.alloc(f32, NLAYERS * kv_base[B]);
+        const cache: KvCache = .{ .k = kc, .v = vc, .base = kv_base };
+
+        // ---- prefill: one forward over every prefix, caching K/V ----
+        const xp = try sc.alloc(f32, prefixes.len * D);
+        try self.forwardCachePrefill(sc, prefixes, lengths, xp, cache);
+
+        const cur = try sc.alloc(usize, B);
+        const x = try sc.alloc(f32, B * D);
+        var end: usize = 0;
+        for (0..B) |r| {
+            end += lengths[r];
+            cur[r] = lengths[r];
+            counts[r] = 0;
+            @memcpy(x[r * D ..][0..D], xp[(end - 1) * D ..][0..D]);
         }
+        try self.decodeLoop(sc, cache, lengths, cur, x, max_new, stride, eos, pad, shortlist, out, align_out, counts);
+    }
 
-        // ---- prefill: full bidirectional forward over the prefix, caching K/V ----
-        const xp = try sc.alloc(f32, prefix * D);
-        try self.forwardCachePrefill(sc, prefix_ids, xp, kc, vc);
-        const logits = try sc.alloc(f32, VOCAB);
-        var hrow: [D]f32 = undefined;
-        @memcpy(&hrow, xp[(prefix - 1) * D ..][0..D]);
-        k_ln.layerNormRow(&hrow, self.fn_w, self.fn_b, EPS);
-        k_mm.linear(logits, &hrow, self.emb, null, 1, D, VOCAB);
+    /// The greedy loop behind `greedyBatch` and `greedyFrom`. Row b's cache
+    /// holds its prefix of lengths[b] positions and any tokens already fed;
+    /// x[b*D ..] is the final-block hidden state (not yet normalized) that
+    /// predicts its next token, which goes to position cur[b], and counts[b]
+    /// tokens are already in its out/align_out rows.
+    fn decodeLoop(
+        self: *const P2G,
+        sc: std.mem.Allocator,
+        cache: KvCache,
+        lengths: []const usize,
+        cur: []usize,
+        x: []f32,
+        max_new: []const usize,
+        stride: usize,
+        eos: i64,
+        pad: i64,
+        shortlist: ?[]const u32,
+        out: []i64,
+        align_out: ?[]i64,
+        counts: []usize,
+    ) !void {
+        const B = lengths.len;
+        const rows = try sc.alloc(usize, B); // live row -> batch row
+        const tok = try sc.alloc(i64, B); // per live row
+        const next = try sc.alloc(usize, B);
+        const pos = try sc.alloc(usize, 2 * B); // per live row: position, then key limit
+        const work = try sc.alloc(f32, B * (D + 3 * D + FF + D) + MAXPOS);
+        const align_buf = try sc.alloc(f32, B * MAXPOS); // head-summed attention per live row
+        for (0..B) |r| rows[r] = r;
+        var live = B;
+        try self.nextTokens(sc, x[0 .. B * D], shortlist, next, tok[0..B]);
 
-        var n: usize = 0;
-        var cur = prefix;
-        var tok: i64 = @intCast(k_reduce.argmax(logits));
         while (true) {
-            if (tok == eos or tok == pad) break;
-            const emit_idx = n;
-            out[n] = tok;
-            n += 1;
-            if (n >= max_new or cur >= MAXPOS) break;
-            // process `tok` at position `cur`
-            var x: [D]f32 = undefined;
-            const e = self.emb[@as(usize, @intCast(tok)) * D ..][0..D];
-            const pe = self.pos[cur * D ..][0..D];
-            for (0..D) |j| x[j] = e[j] + pe[j];
-            if (align_out != null) @memset(align_buf[0 .. cur + 1], 0);
+            // emit each live row's token, then compact the rows that continue
+            var kept: usize = 0;
+            for (0..live) |i| {
+                const row = rows[i];
+                if (tok[i] == eos or tok[i] == pad or counts[row] >= max_new[row]) continue;
+                out[row * stride + counts[row]] = tok[i];
+                counts[row] += 1;
+                if (counts[row] >= max_new[row] or cur[row] >= MAXPOS) continue;
+                rows[kept] = row;
+                tok[kept] = tok[i];
+                kept += 1;
+            }
+            live = kept;
+            if (live == 0) break;
+
+            // process each row's `tok` at position `cur`
+            const xs = x[0 .. live * D];
+            const at = pos[0..live];
+            const lim = pos[live .. 2 * live];
+            for (0..live) |i| {
+                at[i] = cur[rows[i]];
+                lim[i] = at[i] + 1;
+                const e = self.emb[@as(usize, @intCast(tok[i])) * D ..][0..D];
+                const pe = self.pos[at[i] * D ..][0..D];
+                for (0..D) |j| xs[i * D + j] = e[j] + pe[j];
+            }
+            const acc: ?[]f32 = if (align_out != null) align_buf[0 .. live * MAXPOS] else null;
+            if (acc) |a| @memset(a, 0);
             for (0..NLAYERS) |l| {
-                const acc: ?[]f32 = if (align_out != null and l == NLAYERS - 1) align_buf[0 .. cur + 1] else null;
-                try self.stepLayer(self.layers[l], &x, kc[l], vc[l], cur, acc, work);
+                self.stepLayer(l, xs, rows[0..live], at, lim, cache, if (l == NLAYERS - 1) acc else null, work);
             }
-            // output->input alignment: phoneme position (in [2, prefix-1)) with the
-            // most attention from this token; index is 0-based into the source phonemes.
-            if (align_out) |a| {
-                if (prefix > 3) {
-                    var best: usize = 2;
-                    var bestv: f32 = align_buf[2];
-                    var j: usize = 3;
-                    while (j < prefix - 1) : (j += 1) {
-                        if (align_buf[j] > bestv) {
-                            bestv = align_buf[j];
-                            best = j;
-                        }
-                    }
-                    a[emit_idx] = @intCast(best - 2);
+            for (0..live) |i| {
+                const row = rows[i];
+                if (align_out) |a| {
+                    if (alignIndex(align_buf[i * MAXPOS ..], lengths[row])) |ai| a[row * stride + counts[row] - 1] = ai;
                 }
+                cur[row] += 1;
             }
-            cur += 1;
-            k_ln.layerNormRow(&x, self.fn_w, self.fn_b, EPS);
-            k_mm.linear(logits, &x, self.emb, null, 1, D, VOCAB);
-            tok = @intCast(k_reduce.argmax(logits));
+            try self.nextTokens(sc, xs, shortlist, next[0..live], tok[0..live]);
         }
-        return n;
     }
 
-    // Full forward over the prefix (bidirectional), writing per-layer K/V caches
-    // and the prefix hidden states into `xp` ([prefix*D]).
-    fn forwardCachePrefill(self: *const P2G, sc: std.mem.Allocator, ids: []const i64, xp: []f32, kc: [][]f32, vc: [][]f32) !void {
+    /// Output->input alignment of a token whose head-summed last-layer
+    /// attention over the positions is `attn`: the phoneme position (in
+    /// [2, prefix-1)) it attends to most, as a 0-based source-phoneme index.
+    fn alignIndex(attn: []const f32, prefix: usize) ?i64 {
+        if (prefix <= 3) return null;
+        var best: usize = 2;
+        var bestv: f32 = attn[2];
+        var j: usize = 3;
+        while (j < prefix - 1) : (j += 1) {
+            if (attn[j] > bestv) {
+                bestv = attn[j];
+                best = j;
+            }
+        }
+        return @intCast(best - 2);
+    }
+
+    /// Incremental prefill for a growing prefix: runs `ids` at positions
+    /// [cached, cached + ids.len) through the blocks, attending to the first
+    /// `cached` positions and to each other (bidirectionally), and appends
+    /// their K/V to `kc`/`vc` ([NLAYERS, MAXPOS, D] each, owned by the caller).
+    /// Unlike a full prefill, positions already cached never see the new ones.
+    pub fn extend(self: *const P2G, sc: std.mem.Allocator, kc: []f32, vc: []f32, cached: usize, ids: []const i64) !void {
+        const n = ids.len;
+        if (cached + n > MAXPOS) return error.SequenceTooLong;
+        const lim = try sc.alloc(usize, n);
+        @memset(lim, cached + n);
+        const x = try sc.alloc(f32, n * D);
+        try self.forwardRows(sc, hostCache(kc, vc), ids, cached, lim, x, null);
+    }
+
+    /// Greedy decode after `extend`: the first `cached` prefix positions are in
+    /// `kc`/`vc`, `tail` is the rest of the prefix (ending in tgt), and
+    /// `forced` are output tokens to keep. The tail attends to the whole prefix
+    /// and the forced tokens causally, both in one pass; the forced tokens are
+    /// copied to `out` and decoding continues after them, as `greedyCached`
+    /// would, up to `max_new` tokens in all. Cached positions are not changed.
+    /// Returns the token count; `align_out` gets every token's alignment.
+    pub fn greedyFrom(
+        self: *const P2G,
+        sc: std.mem.Allocator,
+        kc: []f32,
+        vc: []f32,
+        cached: usize,
+        tail: []const i64,
+        forced: []const i64,
+        max_new: usize,
+        eos: i64,
+        pad: i64,
+        shortlist: ?[]const u32,
+        out: []i64,
+        align_out: ?[]i64,
+    ) !usize {
+        const prefix = cached + tail.len;
+        const f = @min(forced.len, max_new);
+        if (tail.len == 0 or prefix + f > MAXPOS) return error.SequenceTooLong;
+        if (align_out) |a| @memset(a[0..max_new], -1);
+        const n = tail.len + f;
+        const ids = try sc.alloc(i64, n);
+        @memcpy(ids[0..tail.len], tail);
+        @memcpy(ids[tail.len..], forced[0..f]);
+        const lim = try sc.alloc(usize, n);
+        for (lim, 0..) |*v, i| v.* = if (i < tail.len) prefix else cached + i + 1;
+        const acc: ?[]f32 = if (align_out != null) try sc.alloc(f32, n * MAXPOS) else null;
+        const x = try sc.alloc(f32, n * D);
+        const cache = hostCache(kc, vc);
+        try self.forwardRows(sc, cache, ids, cached, lim, x, acc);
+        @memcpy(out[0..f], forced[0..f]);
+        if (align_out) |a| {
+            // forced token j was fed as row tail.len + j
+            for (0..f) |j| {
+                if (alignIndex(acc.?[(tail.len + j) * MAXPOS ..], prefix)) |ai| a[j] = ai;
+            }
+        }
+        var cur = [1]usize{prefix + f};
+        var count = [1]usize{f};
+        if (f == max_new) return f;
+        try self.decodeLoop(sc, cache, &[_]usize{prefix}, &cur, x[(n - 1) * D ..][0..D], &[_]usize{max_new}, max_new, eos, pad, shortlist, out, align_out, &count);
+        return count[0];
+    }
+
+    /// A caller-owned [NLAYERS, MAXPOS, D] K/V cache as a one-row `KvCache`.
+    fn hostCache(kc: []f32, vc: []f32) KvCache {
+        std.debug.assert(kc.len == NLAYERS * MAXPOS * D and vc.len == kc.len);
+        const base = struct {
+            const v = [2]usize{ 0, MAXPOS * D };
+        };
+        return .{ .k = kc, .v = vc, .base = &base.v };
+    }
+
+    /// `ids` at positions start.. of cache row 0 through every block, row i
+    /// attending to keys [0, lim[i]); writes their K/V and leaves the hidden
+    /// states (before the final norm) in `x`. `attn_acc` ([ids.len*MAXPOS]),
+    /// when given, gets each row's head-summed last-layer attention.
+    fn forwardRows(self: *const P2G, sc: std.mem.Allocator, cache: KvCache, ids: []const i64, start: usize, lim: []const usize, x: []f32, attn_acc: ?[]f32) !void {
+        const n = ids.len;
+        const kv_rows = try sc.alloc(usize, n);
+        @memset(kv_rows, 0);
+        const at = try sc.alloc(usize, n);
+        for (at, 0..) |*v, i| v.* = start + i;
+        const work = try sc.alloc(f32, n * (D + 3 * D + FF + D) + MAXPOS);
+        for (0..n) |i| {
+            const e = self.emb[@as(usize, @intCast(ids[i])) * D ..][0..D];
+            const pe = self.pos[(start + i) * D ..][0..D];
+            for (0..D) |j| x[i * D + j] = e[j] + pe[j];
+        }
+        if (attn_acc) |a| @memset(a, 0);
+        for (0..NLAYERS) |l| self.stepLayer(l, x, kv_rows, at, lim, cache, if (l == NLAYERS - 1) attn_acc else null, work);
+    }
+
+    /// Per-layer K/V caches of a batch: row b, layer l owns
+    /// k/v[l*base[B] + base[b] ..][0 .. base[b+1]-base[b]] ([positions, D]).
+    const KvCache = struct {
+        k: []f32,
+        v: []f32,
+        base: []const usize,
+
+        fn rowK(c: KvCache, l: usize, b: usize) []f32 {
+            const n = c.base[c.base.len - 1];
+            return c.k[l * n + c.base[b] .. l * n + c.base[b + 1]];
+        }
+
+        fn rowV(c: KvCache, l: usize, b: usize) []f32 {
+            const n = c.base[c.base.len - 1];
+            return c.v[l * n + c.base[b] .. l * n + c.base[b + 1]];
+        }
+    };
+
+    /// Greedy next token of each row of final-block hidden states `x` ([R*D],
+    /// normalized in place): the argmax over the tied output projection (or
+    /// just its `shortlist` rows), found without writing out the logits.
+    fn nextTokens(self: *const P2G, sc: std.mem.Allocator, x: []f32, shortlist: ?[]const u32, ids: []usize, tok: []i64) !void {
+        const R = tok.len;
+        k_ln.layerNorm(x, R, D, self.fn_w, self.fn_b, EPS);
+        try k_mm.linearArgmax(sc, ids, x, self.emb, R, D, VOCAB, shortlist);
+        for (ids, tok) |id, *t| t.* = @intCast(id);
+    }
+
+    // One pre-norm transformer block (layer `l`) over R new positions: `x`
+    // [R*D] holds their hidden states, row i sits at position at[i] of cache
+    // row kv_rows[i] and attends to its keys/values for positions [0, lim[i]).
+    // Every row's K/V is written before any attends, so rows of one cache row
+    // may see each other. `attn_acc`, when non-null, accumulates row i's
+    // head-summed attention weights into attn_acc[i*MAXPOS ..][0..lim[i]] (used
+    // to derive output->input alignment).
+    fn stepLayer(
+        self: *const P2G,
+        l: usize,
+        x: []f32,
+        kv_rows: []const usize,
+        at: []const usize,
+        lim: []const usize,
+        cache: KvCache,
+        attn_acc: ?[]f32,
+        work: []f32,
+    ) void {
+        const L = self.layers[l];
+        const R = kv_rows.len;
+        const ln = work[0 .. R * D];
+        const qkv = work[R * D ..][0 .. R * 3 * D];
+        const ctx = work[R * 4 * D ..][0 .. R * D];
+        const ff1 = work[R * 5 * D ..][0 .. R * FF];
+        const scores_buf = work[R * (5 * D + FF) ..][0..MAXPOS];
+        @memcpy(ln, x);
+        k_ln.layerNorm(ln, R, D, L.n1_w, L.n1_b, EPS);
+        k_mm.linear(qkv, ln, L.in_w, L.in_b, R, D, 3 * D);
+        for (0..R) |i| {
+            const q = qkv[i * 3 * D ..][0 .. 3 * D];
+            @memcpy(cache.rowK(l, kv_rows[i])[at[i] * D ..][0..D], q[D .. 2 * D]);
+            @memcpy(cache.rowV(l, kv_rows[i])[at[i] * D ..][0..D], q[2 * D .. 3 * D]);
+        }
+        for (0..R) |i| {
+            const kc = cache.rowK(l, kv_rows[i]);
+            const vc = cache.rowV(l, kv_rows[i]);
+            const q = qkv[i * 3 * D ..][0..D];
+            const keys = lim[i];
+            const scores = scores_buf[0..keys];
+            for (0..HEADS) |h| {
+                const qo = h * HEAD;
+                for (0..keys) |j| {
+                    var s: f32 = 0;
+                    for (0..HEAD) |d| s += q[qo + d] * kc[j * D + h * HEAD + d];
+                    scores[j] = s * SCALE;
+                }
+                k_soft.softmaxRow(scores, null);
+                if (attn_acc) |acc| {
+                    for (0..keys) |j| acc[i * MAXPOS + j] += scores[j];
+                }
+                for (0..HEAD) |d| {
+                    var accv: f32 = 0;
+                    for (0..keys) |j| accv += scores[j] * vc[j * D + h * HEAD + d];
+                    ctx[i * D + h * HEAD + d] = accv;
+                }
+            }
+        }
+        const op = ln; // LN1 output is no longer needed
+        k_mm.linear(op, ctx, L.out_w, L.out_b, R, D, D);
+        for (x, op) |*v, o| v.* += o;
+        @memcpy(ln, x);
+        k_ln.layerNorm(ln, R, D, L.n2_w, L.n2_b, EPS);
+        k_mm.linear(ff1, ln, L.l1_w, L.l1_b, R, D, FF);
+        for (ff1) |*v| v.* = act.gelu(v.*);
+        const ff2 = ctx;
+        k_mm.linear(ff2, ff1, L.l2_w, L.l2_b, R, FF, D);
+        for (x, ff2) |*v, f| v.* += f;
+    }
+
+    // Full forward over prefixes stored back to back (each bidirectional
+    // within itself), writing their per-layer K/V caches and hidden states
+    // into `xp` ([sum(lengths)*D]).
+    fn forwardCachePrefill(self: *const P2G, sc: std.mem.Allocator, ids: []const i64, lengths: []const usize, xp: []f32, cache: KvCache) !void {
         const T = ids.len;
-        for (0..T) |t| {
-            const e = self.emb[@as(usize, @intCast(ids[t])) * D ..][0..D];
-            const pe = self.pos[t * D ..][0..D];
-            for (0..D) |j| xp[t * D + j] = e[j] + pe[j];
+        var off: usize = 0;
+        for (lengths) |len| {
+            for (0..len) |t| {
+                const e = self.emb[@as(usize, @intCast(ids[off + t])) * D ..][0..D];
+                const pe = self.pos[t * D ..][0..D];
+                for (0..D) |j| xp[(off + t) * D + j] = e[j] + pe[j];
+            }
+            off += len;
         }
         const ln = try sc.alloc(f32, T * D);
         const qkv = try sc.alloc(f32, T * 3 * D);
         const ctx = try sc.alloc(f32, T * D);
         const op = try sc.alloc(f32, T * D);
-        const scores = try sc.alloc(f32, T);
         const ff1 = try sc.alloc(f32, T * FF);
         const ff2 = try sc.alloc(f32, T * D);
         for (0..NLAYERS) |li| {
@@ -326,25 +562,17 @@ pub const P2G = struct {
             @memcpy(ln, xp);
             k_ln.layerNorm(ln, T, D, L.n1_w, L.n1_b, EPS);
             k_mm.linear(qkv, ln, L.in_w, L.in_b, T, D, 3 * D);
-            for (0..T) |t| {
-                @memcpy(kc[li][t * D ..][0..D], qkv[t * 3 * D + D .. t * 3 * D + 2 * D]);
-                @memcpy(vc[li][t * D ..][0..D], qkv[t * 3 * D + 2 * D .. t * 3 * D + 3 * D]);
-            }
-            for (0..HEADS) |h| {
-                const qo = h * HEAD;
-                for (0..T) |i| {
-                    for (0..T) |j| {
-                        var s: f32 = 0;
-                        for (0..HEAD) |d| s += qkv[i * 3 * D + qo + d] * kc[li][j * D + h * HEAD + d];
-                        scores[j] = s * SCALE;
-                    }
-                    k_soft.softmaxRow(scores[0..T], null);
-                    for (0..HEAD) |d| {
-                        var accv: f32 = 0;
-                        for (0..T) |j| accv += scores[j] * vc[li][j * D + h * HEAD + d];
-                        ctx[i * D + h * HEAD + d] = accv;
-                    }
+            off = 0;
+            for (lengths, 0..) |len, b| {
+                const kc = cache.rowK(li, b);
+                const vc = cache.rowV(li, b);
+                for (0..len) |t| {
+                    const r = qkv[(off + t) * 3 * D ..][0 .. 3 * D];
+                    @memcpy(kc[t * D ..][0..D], r[D .. 2 * D]);
+                    @memcpy(vc[t * D ..][0..D], r[2 * D .. 3 * D]);
                 }
+                try k_attn.attention(HEAD, sc, ctx[off * D ..][0 .. len * D], D, qkv[off * 3 * D ..][0 .. len * 3 * D], 3 * D, kc, vc, D, len, HEADS, SCALE, len);
+                off += len;
             }
             k_mm.linear(op, ctx, L.out_w, L.out_b, T, D, D);
             for (0..T * D) |i| xp[i] += op[i];
@@ -492,3 +720,126 @@ test "p2g greedy decode matches PyTorch token ids" {
     defer alloc.free(ref_align);
     try t_.expectEqualSlices(i64, ref_align, aln[0..n3]);
 }
+
+test "greedyBatch rows equal greedyCached on each prefix, stopping at eos" {
+    const alloc = t_.allocator;
+    var wpkg = try pkg.parse(alloc, @embedFile("hama_p2g"));
+    defer wpkg.deinit();
+    var model = try P2G.init(alloc, &wpkg);
+    defer model.deinit();
+    var fx = try pkg.parse(alloc, @embedFile("fixture_p2g_greedy"));
+    defer fx.deinit();
+    const full = try fx.getI64(alloc, "prefix_ids");
+    defer alloc.free(full);
+    const pad: i64 = @bitCast(std.mem.readInt(u64, (try fx.must("pad_id")).bytes[0..8], .little));
+
+    var arena = std.heap.ArenaAllocator.init(alloc);
+    defer arena.deinit();
+    const sc = arena.allocator();
+    // Prefixes of different lengths, each ending in the fixture's <tgt>.
+    const P = full.len;
+    const lengths = [_]usize{ P, 4, P - P / 3, 3 };
+    const max_new = [_]usize{ 16, 9, 0, 16 };
+    const stride = 16;
+    const ids = try sc.alloc(i64, P + 4 + (P - P / 3) + 3);
+    var off: usize = 0;
+    for (lengths) |len| {
+        @memcpy(ids[off..][0 .. len - 1], full[0 .. len - 1]);
+        ids[off + len - 1] = full[P - 1];
+        off += len;
+    }
+    // A token the first row emits mid-decode stands in for eos, so rows stop at
+    // different steps.
+    var probe: [stride]i64 = undefined;
+    _ = try model.greedyCached(sc, ids[0..P], stride, -1, pad, &probe, null);
+    const eos = probe[6];
+
+    var out: [lengths.len * stride]i64 = undefined;
+    var aln: [lengths.len * stride]i64 = undefined;
+    var counts: [lengths.len]usize = undefined;
+    try model.greedyBatch(sc, ids, &lengths, &max_new, stride, eos, pad, null, &out, &aln, &counts);
+    off = 0;
+    for (lengths, max_new, 0..) |len, mn, b| {
+        var want: [stride]i64 = undefined;
+        var want_aln: [stride]i64 = undefined;
+        const n = if (mn == 0) 0 else try model.greedyCached(sc, ids[off..][0..len], mn, eos, pad, &want, &want_aln);
+        try t_.expectEqual(n, counts[b]);
+        try t_.expectEqualSlices(i64, want[0..n], out[b * stride ..][0..n]);
+        try t_.expectEqualSlices(i64, want_aln[0..n], aln[b * stride ..][0..n]);
+        off += len;
+    }
+    try t_.expect(counts[0] <= 6);
+
+    // A prefix that fills every position leaves no room to decode.
+    var long: [MAXPOS]i64 = undefined;
+    for (&long, 0..) |*v, i| v.* = full[i % P];
+    try t_.expectError(error.SequenceTooLong, model.greedyBatch(sc, &long, &.{MAXPOS}, &.{1}, stride, eos, pad, null, &out, &aln, counts[0..1]));
+}
+
+test "greedyFrom over a host cache continues greedyCached and keeps forced tokens" {
+    const alloc = t_.allocator;
+    var wpkg = try pkg.parse(alloc, @embedFile("hama_p2g"));
+    defer wpkg.deinit();
+    var model = try P2G.init(alloc, &wpkg);
+    defer model.deinit();
+    var fx = try pkg.parse(alloc, @embedFile("fixture_p2g_greedy"));
+    defer fx.deinit();
+    const full = try fx.getI64(alloc, "prefix_ids");
+    defer alloc.free(full);
+    const pad: i64 = @bitCast(std.mem.readInt(u64, (try fx.must("pad_id")).bytes[0..8], .little));
+
+    var arena = std.heap.ArenaAllocator.init(alloc);
+    defer arena.deinit();
+    const sc = arena.allocator();
+    const kc = try sc.alloc(f32, NLAYERS * MAXPOS * D);
+    const vc = try sc.alloc(f32, NLAYERS * MAXPOS * D);
+    const mn = 16;
+    var want: [mn]i64 = undefined;
+    var want_aln: [mn]i64 = undefined;
+    const n = try model.greedyCached(sc, full, mn, -1, pad, &want, &want_aln);
+
+    // Nothing cached, whole prefix as the tail: the same decode.
+    var out: [mn]i64 = undefined;
+    var aln: [mn]i64 = undefined;
+    try t_.expectEqual(n, try model.greedyFrom(sc, kc, vc, 0, full, &.{}, mn, -1, pad, null, &out, &aln));
+    try t_.expectEqualSlices(i64, want[0..n], out[0..n]);
+    try t_.expectEqualSlices(i64, want_aln[0..n], aln[0..n]);
+
+    // Re-feeding its own first tokens leaves the greedy continuation unchanged.
+    try t_.expectEqual(n, try model.greedyFrom(sc, kc, vc, 0, full, want[0..5], mn, -1, pad, null, &out, &aln));
+    try t_.expectEqualSlices(i64, want[0..n], out[0..n]);
+
+    // A cached block: the forced tokens are kept and decoding goes on after them.
+    const P = full.len;
+    try model.extend(sc, kc, vc, 0, full[0 .. P - 1]);
+    const got = try model.greedyFrom(sc, kc, vc, P - 1, full[P - 1 ..], want[0..5], mn, -1, pad, null, &out, &aln);
+    try t_.expectEqual(@as(usize, mn), got);
+    try t_.expectEqualSlices(i64, want[0..5], out[0..5]);
+    try t_.expectError(error.SequenceTooLong, model.extend(sc, kc, vc, MAXPOS - 1, full[0..2]));
+}
+
+test "a full-length decode fits in SCRATCH_BYTES" {
+    const alloc = t_.allocator;
+    var wpkg = try pkg.parse(alloc, @embedFile("hama_p2g"));
+    defer wpkg.deinit();
+    var model = try P2G.init(alloc, &wpkg);
+    defer model.deinit();
+    var fx = try pkg.parse(alloc, @embedFile("fixture_p2g_greedy"));
+    defer fx.deinit();
+    const full = try fx.getI64(alloc, "prefix_ids");
+    defer alloc.free(full);
+    const pad: i64 = @bitCast(std.mem.readInt(u64, (try fx.must("pad_id")).bytes[0..8], .little));
+
+    const buf = try alloc.alloc(u8, SCRATCH_BYTES);
+    defer alloc.free(buf);
+    var ids: [MAXPOS]i64 = undefined;
+    for (&ids, 0..) |*v, i| v.* = full[i % (full.len - 1)];
+    var out: [MAXPOS]i64 = undefined;
+    var aln: [MAXPOS]i64 = undefined;
+    // The longest prefix, then a typical prefix with the rest of MAXPOS to decode.
+    for ([_]usize{ MAXPOS - 1, 200 }) |P| {
+        ids[P - 1] = full[full.len - 1];
+        var fba = std.heap.FixedBufferAllocator.init(buf);
+        _ = try model.greedyCached(fba.allocator(), ids[0..P], MAXPOS - P, -1, pad, &out, &aln);
+    }
+}
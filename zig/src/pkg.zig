@@ -11,10 +11,17 @@
 //! sidesteps alignment hazards and gives kernels contiguous arrays. Upcasting
 //! f16->f32 at load is lossless, so it preserves the graph's fp16-rounded
 //! weight values exactly.
+//!
+//! When the bytes outlive the models built from them (a `MappedFile` kept by
+//! the native handle), the package is `pinned` and `viewF32` hands out f32
+//! tensors in place: mapped read-only and shared, they cost no private memory
+//! and one page-cache copy serves every process that maps the same file.
 
 const std = @import("std");
 const f16u = @import("f16.zig");
 
+const native_endian = @import("builtin").cpu.arch.endian();
+
 pub const DType = enum(u8) {
     f32 = 0,
     f16 = 1,
@@ -43,6 +50,9 @@ pub const Package = struct {
     tensors: []Tensor,
     dims_pool: []u32,
     arena: std.mem.Allocator,
+    /// Set by a caller that keeps `bytes` alive and unmodified for the lifetime
+    /// of every model built from this package, so tensors may be borrowed.
+    pinned: bool = false,
 
     pub fn deinit(self: *Package) void {
         self.arena.free(self.tensors);
@@ -88,6 +98,17 @@ pub const Package = struct {
         return out;
     }
 
+    /// Borrow an f32 tensor in place when the package is `pinned` and the data
+    /// is usable as-is (stored as f32, 4-byte aligned, little-endian host).
+    /// Returns null when the caller must copy with `getF32` instead.
+    pub fn viewF32(self: *const Package, name: []const u8) !?[]const f32 {
+        const t = try self.must(name);
+        if (!self.pinned or t.dtype != .f32 or native_endian != .little) return null;
+        if (@intFromPtr(t.bytes.ptr) % @alignOf(f32) != 0) return null;
+        const ptr: [*]const f32 = @ptrCast(@alignCast(t.bytes.ptr));
+        return ptr[0..t.numel()];
+    }
+
     pub fn getI64(self: *const Package, allocator: std.mem.Allocator, name: []const u8) ![]i64 {
         const t = try self.must(name);
         if (t.dtype != .i64) return error.NotI64Tensor;
@@ -176,6 +197,41 @@ pub fn parse(allocator: std.mem.Allocator, bytes: []const u8) !Package {
     };
 }
 
+/// A `.hama` file mapped read-only (MAP_SHARED) for the native loaders. Parse
+/// `bytes()` with `parse`, set `pinned`, and keep the mapping open for as long
+/// as any model borrows from it.
+pub const MappedFile = struct {
+    file: std.Io.File,
+    map: std.Io.File.MemoryMap,
+
+    fn io() std.Io {
+        return std.Io.Threaded.global_single_threaded.io();
+    }
+
+    pub fn open(path: []const u8) !MappedFile {
+        const file = try std.Io.Dir.cwd().openFile(io(), path, .{});
+        errdefer file.close(io());
+        const len = try file.length(io());
+        if (len == 0) return error.Truncated;
+        const map = try file.createMemoryMap(io(), .{
+            .len = @intCast(len),
+            .protection = .{ .read = true, .write = false },
+            .populate = false,
+        });
+        return .{ .file = file, .map = map };
+    }
+
+    pub fn bytes(self: *const MappedFile) []const u8 {
+        return self.map.memory;
+    }
+
+    pub fn close(self: *MappedFile) void {
+        self.map.destroy(io());
+        self.file.close(io());
+        self.* = undefined;
+    }
+};
+
 inline fn align16(n: usize) usize {
     return (n + 15) & ~@as(usize, 15);
 }
@@ -217,3 +273,36 @@ test "parse real encoder.hama package" {
     try std.testing.expectEqual(@as(usize, 96 * 192), row.len);
     for (row) |v| try std.testing.expect(std.math.isFinite(v));
 }
+
+test "mapped package borrows aligned f32 tensors in place" {
+    const alloc = std.testing.allocator;
+    // Write a tiny f32 package to disk and load it back through the mapping.
+    const hama = @embedFile("fixture_encoder");
+    var tmp = std.testing.tmpDir(.{});
+    defer tmp.cleanup();
+    const io = std.testing.io;
+    try tmp.dir.writeFile(io, .{ .sub_path = "fx.hama", .data = hama });
+    const path = try tmp.dir.realPathFileAlloc(io, "fx.hama", alloc);
+    defer alloc.free(path);
+
+    var mapped = try MappedFile.open(path);
+    defer mapped.close();
+    try std.testing.expectEqualSlices(u8, hama, mapped.bytes());
+
+    var p = try parse(alloc, mapped.bytes());
+    defer p.deinit();
+    var borrowed: usize = 0;
+    for (p.tensors) |t| {
+        if (t.dtype != .f32) continue;
+        try std.testing.expect((try p.viewF32(t.name)) == null); // not pinned yet
+        p.pinned = true;
+        const view = (try p.viewF32(t.name)).?;
+        p.pinned = false;
+        const copy = try p.getF32(alloc, t.name);
+        defer alloc.free(copy);
+        try std.testing.expectEqualSlices(f32, copy, view);
+        try std.testing.expectEqual(@intFromPtr(t.bytes.ptr), @intFromPtr(view.ptr));
+        borrowed += 1;
+    }
+    try std.testing.expect(borrowed > 0);
+}
@@ -3,11 +3,16 @@
 
 pub const pkg = @import("pkg.zig");
 pub const f16u = @import("f16.zig");
+pub const scratch = @import("scratch.zig");
+pub const threads = @import("threads.zig");
 pub const matmul = @import("kernels/matmul.zig");
 pub const conv1d = @import("kernels/conv1d.zig");
+pub const fft = @import("kernels/fft.zig");
+pub const attention = @import("kernels/attention.zig");
 pub const layernorm = @import("kernels/layernorm.zig");
 pub const softmax = @import("kernels/softmax.zig");
 pub const activations = @import("kernels/activations.zig");
+pub const libm = @import("kernels/libm.zig");
 pub const reduce = @import("kernels/reduce.zig");
 pub const gather = @import("kernels/gather.zig");
 pub const gru = @import("kernels/gru.zig");
@@ -22,11 +27,16 @@ test {
     _ = @import("models/p2g.zig");
     _ = @import("pkg.zig");
     _ = @import("f16.zig");
+    _ = @import("scratch.zig");
+    _ = @import("threads.zig");
     _ = @import("kernels/matmul.zig");
     _ = @import("kernels/conv1d.zig");
+    _ = @import("kernels/fft.zig");
+    _ = @import("kernels/attention.zig");
     _ = @import("kernels/layernorm.zig");
     _ = @import("kernels/softmax.zig");
     _ = @import("kernels/activations.zig");
+    _ = @import("kernels/libm.zig");
     _ = @import("kernels/reduce.zig");
     _ = @import("kernels/gather.zig");
     _ = @import("kernels/gru.zig");
@@ -0,0 +1,147 @@
+//! Reusable scratch arenas for native handles.
+//!
+//! A `Pool` lends each in-flight call its own arena and takes it back when the
+//! call returns, reset with its capacity retained. Repeated calls on a handle
+//! therefore stop mapping and unmapping pages once the largest call has been
+//! seen, while concurrent calls on the same handle still never share scratch.
+//! The pool holds as many arenas as the peak number of concurrent callers.
+//! A handle whose worst-case call is known sets `reserve`, and each new arena
+//! starts at that size with its pages already faulted in.
+
+const std = @import("std");
+
+pub const Pool = struct {
+    child: std.mem.Allocator,
+    locked: std.atomic.Value(bool) = .init(false),
+    free: ?*Slot = null,
+    peak: std.atomic.Value(usize) = .init(0),
+    /// Bytes every new arena is pre-sized and pre-faulted to (0: grow on demand).
+    reserve: usize = 0,
+
+    pub const Slot = struct {
+        arena: std.heap.ArenaAllocator,
+        next: ?*Slot = null,
+
+        pub fn allocator(slot: *Slot) std.mem.Allocator {
+            return slot.arena.allocator();
+        }
+
+        /// Grow the arena to one block of at least `bytes` and touch every
+        /// page, so calls that fit never map or fault memory again.
+        fn preheat(slot: *Slot, bytes: usize) !void {
+            @memset(try slot.arena.allocator().alloc(u8, bytes), 0);
+            // A new block is over-allocated for growth; keep just `bytes`.
+            _ = slot.arena.reset(.{ .retain_with_limit = bytes });
+        }
+    };
+
+    pub fn create(child: std.mem.Allocator) !*Pool {
+        const pool = try child.create(Pool);
+        pool.* = .{ .child = child };
+        return pool;
+    }
+
+    /// Free every idle arena and the pool itself. No call may be in flight.
+    pub fn destroy(pool: *Pool) void {
+        pool.trim();
+        pool.child.destroy(pool);
+    }
+
+    /// Borrow an arena: an idle one if any, else a fresh one.
+    pub fn acquire(pool: *Pool) !*Slot {
+        pool.lock();
+        const idle = pool.free;
+        if (idle) |s| pool.free = s.next;
+        pool.unlock();
+        if (idle) |s| return s;
+        const slot = try pool.child.create(Slot);
+        slot.* = .{ .arena = .init(pool.child) };
+        if (pool.reserve > 0) {
+            errdefer {
+                slot.arena.deinit();
+                pool.child.destroy(slot);
+            }
+            try slot.preheat(pool.reserve);
+        }
+        return slot;
+    }
+
+    /// Return a borrowed arena, recording its size and keeping its capacity.
+    pub fn release(pool: *Pool, slot: *Slot) void {
+        _ = pool.peak.fetchMax(slot.arena.queryCapacity(), .monotonic);
+        _ = slot.arena.reset(.retain_capacity);
+        pool.lock();
+        slot.next = pool.free;
+        pool.free = slot;
+        pool.unlock();
+    }
+
+    /// Largest scratch footprint (bytes) any single call has needed so far.
+    pub fn peakBytes(pool: *const Pool) usize {
+        return pool.peak.load(.monotonic);
+    }
+
+    /// Free the retained capacity of every idle arena. Arenas currently lent
+    /// out are unaffected and return to the pool as usual.
+    pub fn trim(pool: *Pool) void {
+        pool.lock();
+        var it = pool.free;
+        pool.free = null;
+        pool.unlock();
+        while (it) |slot| {
+            it = slot.next;
+            slot.arena.deinit();
+            pool.child.destroy(slot);
+        }
+    }
+
+    // Critical sections are a couple of pointer swaps, so spin rather than park.
+    fn lock(pool: *Pool) void {
+        while (pool.locked.cmpxchgWeak(false, true, .acquire, .monotonic) != null) std.atomic.spinLoopHint();
+    }
+
+    fn unlock(pool: *Pool) void {
+        pool.locked.store(false, .release);
+    }
+};
+
+const t = std.testing;
+
+test "scratch pool reuses a released arena with its capacity" {
+    const pool = try Pool.create(t.allocator);
+    defer pool.destroy();
+
+    const a = try pool.acquire();
+    _ = try a.allocator().alloc(u8, 100_000);
+    pool.release(a);
+    try t.expect(pool.peakBytes() >= 100_000);
+
+    const b = try pool.acquire();
+    try t.expectEqual(a, b);
+    try t.expect(b.arena.queryCapacity() >= 100_000);
+    // Concurrent borrowers get distinct arenas.
+    const c = try pool.acquire();
+    try t.expect(c != b);
+    pool.release(c);
+    pool.release(b);
+
+    pool.trim();
+    try t.expect(pool.free == null);
+    try t.expect(pool.peakBytes() >= 100_000);
+}
+
+test "scratch pool pre-sizes new arenas to its reserve" {
+    const pool = try Pool.create(t.allocator);
+    defer pool.destroy();
+    pool.reserve = 1 << 20;
+
+    const a = try pool.acquire();
+    const cap = a.arena.queryCapacity();
+    try t.expect(cap >= 1 << 20);
+    // Allocations within the reserve do not grow the arena.
+    _ = try a.allocator().alloc(u8, 600_000);
+    _ = try a.allocator().alloc(f32, 100_000);
+    try t.expectEqual(cap, a.arena.queryCapacity());
+    pool.release(a);
+    try t.expectEqual(cap, a.arena.queryCapacity());
+}
@@ -0,0 +1,181 @@
+//! Engine-wide intra-op worker pool.
+//!
+//! `parallelFor` splits an index range into contiguous chunks and runs them on
+//! the pool's workers plus the calling thread, returning once every chunk is
+//! done. Kernels partition only independent outputs (rows, columns, channels,
+//! heads, GRU directions), so results are bit-identical for any thread count.
+//!
+//! The pool runs one job at a time. A `parallelFor` issued while another job
+//! is in flight (a nested call from inside a chunk, or a second host thread
+//! calling into the engine) runs inline on its caller instead of queueing, so
+//! request-level parallelism never oversubscribes the cores.
+//!
+//! The size defaults to the CPU count and is set with `setNumThreads`
+//! (`hama_set_num_threads`; the Python binding applies `HAMA_NUM_THREADS`).
+//! Workers are spawned lazily on the first parallel job. Single-threaded
+//! builds (wasm) always run inline.
+
+const std = @import("std");
+const builtin = @import("builtin");
+
+const supported = !builtin.single_threaded;
+pub const MAX_THREADS = 256;
+/// Smallest amount of work (multiply-adds) worth handing to another thread;
+/// below it the wake-up latency costs more than the work saves.
+pub const MIN_TASK_COST = 1 << 18;
+
+const Job = struct {
+    run: *const fn (ctx: *const anyopaque, begin: usize, end: usize) void,
+    ctx: *const anyopaque,
+    n: usize,
+    count: usize,
+    next: usize,
+    done: usize,
+
+    fn bounds(self: *const Job, idx: usize) [2]usize {
+        return .{ self.n * idx / self.count, self.n * (idx + 1) / self.count };
+    }
+};
+
+// Everything below is guarded by `lock`, except `busy` (which a submitter
+// holds for the whole job) and `configured` (read racily as a hint).
+var lock: std.Io.Mutex = .init;
+var work_cond: std.Io.Condition = .init;
+var done_cond: std.Io.Condition = .init;
+var busy: std.atomic.Value(bool) = .init(false);
+var configured: std.atomic.Value(usize) = .init(0); // 0 = CPU count
+var cpu_count: std.atomic.Value(usize) = .init(0); // 0 = not yet queried
+var workers: [MAX_THREADS - 1]std.Thread = undefined;
+var n_workers: usize = 0;
+var stopping = false;
+var job: Job = undefined;
+var job_live = false;
+
+fn io() std.Io {
+    return std.Io.Threaded.global_single_threaded.io();
+}
+
+/// Threads (including the caller) a parallel job is split across.
+pub fn numThreads() usize {
+    if (!supported) return 1;
+    const n = configured.load(.monotonic);
+    if (n != 0) return n;
+    var cpus = cpu_count.load(.monotonic);
+    if (cpus == 0) {
+        cpus = std.math.clamp(std.Thread.getCpuCount() catch 1, 1, MAX_THREADS);
+        cpu_count.store(cpus, .monotonic);
+    }
+    return cpus;
+}
+
+/// `min_chunk` for `parallelFor` when each index costs `cost` multiply-adds.
+pub fn grain(cost: usize) usize {
+    return @max(1, MIN_TASK_COST / @max(cost, 1));
+}
+
+/// Resize the pool (`n` = 0 restores the CPU-count default). Waits for an
+/// in-flight job to finish, then retires the current workers; new ones are
+/// spawned on the next parallel job.
+pub fn setNumThreads(n: usize) void {
+    if (!supported) return;
+    while (busy.cmpxchgWeak(false, true, .acquire, .monotonic) != null) std.Thread.yield() catch {};
+    defer busy.store(false, .release);
+    stopWorkers();
+    configured.store(@min(n, MAX_THREADS), .monotonic);
+}
+
+/// Call `body(ctx, begin, end)` over a partition of [0, n) into at most
+/// `numThreads()` contiguous ranges of at least `min_chunk` indices each.
+pub fn parallelFor(
+    n: usize,
+    min_chunk: usize,
+    ctx: anytype,
+    comptime body: fn (@TypeOf(ctx), usize, usize) void,
+) void {
+    const Ctx = @TypeOf(ctx);
+    const chunks = @min(numThreads(), n / @max(min_chunk, 1));
+    if (!supported or chunks <= 1) return body(ctx, 0, n);
+    if (busy.cmpxchgStrong(false, true, .acquire, .monotonic) != null) return body(ctx, 0, n);
+    defer busy.store(false, .release);
+
+    const Thunk = struct {
+        fn run(erased: *const anyopaque, begin: usize, end: usize) void {
+            const typed: *const Ctx = @ptrCast(@alignCast(erased));
+            body(typed.*, begin, end);
+        }
+    };
+    spawnWorkers(chunks - 1);
+
+    lock.lockUncancelable(io());
+    job = .{ .run = Thunk.run, .ctx = @ptrCast(&ctx), .n = n, .count = chunks, .next = 0, .done = 0 };
+    job_live = true;
+    work_cond.broadcast(io());
+    // The caller works too, so the job completes even if no worker wakes.
+    while (job.next < job.count) {
+        const b = job.bounds(job.next);
+        job.next += 1;
+        lock.unlock(io());
+        Thunk.run(@ptrCast(&ctx), b[0], b[1]);
+        lock.lockUncancelable(io());
+        job.done += 1;
+    }
+    while (job.done < job.count) done_cond.waitUncancelable(io(), &lock);
+    job_live = false;
+    lock.unlock(io());
+}
+
+fn workerMain() void {
+    lock.lockUncancelable(io());
+    defer lock.unlock(io());
+    while (true) {
+        while (!stopping and !(job_live and job.next < job.count)) work_cond.waitUncancelable(io(), &lock);
+        if (stopping) return;
+        const b = job.bounds(job.next);
+        job.next += 1;
+        const run = job.run;
+        const ctx = job.ctx;
+        lock.unlock(io());
+        run(ctx, b[0], b[1]);
+        lock.lockUncancelable(io());
+        job.done += 1;
+        if (job.done == job.count) done_cond.signal(io());
+    }
+}
+
+// Called with `busy` held.
+fn spawnWorkers(want: usize) void {
+    while (n_workers < want) : (n_workers += 1) {
+        // Fewer workers only means fewer chunks run concurrently.
+        workers[n_workers] = std.Thread.spawn(.{ .stack_size = 1 << 20 }, workerMain, .{}) catch return;
+    }
+}
+
+// Called with `busy` held.
+fn stopWorkers() void {
+    lock.lockUncancelable(io());
+    stopping = true;
+    work_cond.broadcast(io());
+    lock.unlock(io());
+    for (workers[0..n_workers]) |w| w.join();
+    n_workers = 0;
+    lock.lockUncancelable(io());
+    stopping = false;
+    lock.unlock(io());
+}
+
+const t = std.testing;
+
+fn fillSquares(out: []u64, begin: usize, end: usize) void {
+    for (begin..end) |i| out[i] = @as(u64, i) * i;
+}
+
+test "parallelFor covers every index exactly once across pool sizes" {
+    defer setNumThreads(0);
+    var out: [1000]u64 = undefined;
+    for ([_]usize{ 1, 2, 3, 8 }) |n| {
+        setNumThreads(n);
+        @memset(&out, 0);
+        parallelFor(out.len, 1, @as([]u64, &out), fillSquares);
+        for (out, 0..) |v, i| try t.expectEqual(@as(u64, i) * i, v);
+    }
+}